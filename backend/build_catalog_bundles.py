@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Offline job that pre-translates Lambalia's static catalogs into per-language bundles.
+
+Run after changing any static catalog (meal categories, premium tiers, charity
+activity types, reference recipes, heritage dishes):
+
+    python build_catalog_bundles.py                 # every supported language
+    python build_catalog_bundles.py es fr sw        # selected languages
+    python build_catalog_bundles.py --force es      # retranslate even if up to date
+
+Only bundles whose English source changed are rebuilt, and strings already
+translated in the previous version are reused.
+"""
+
+import asyncio
+import sys
+
+from server import catalog_bundle_service, client
+
+
+async def main(argv):
+    force = "--force" in argv
+    languages = [arg for arg in argv if not arg.startswith("--")] or None
+
+    await catalog_bundle_service.load_bundles()
+    summary = await catalog_bundle_service.build_bundles(languages=languages, force=force)
+
+    for entry in summary["built"]:
+        print(f"✅ Built {entry['catalog']} [{entry['language']}] version {entry['version']}")
+    for entry in summary["skipped"]:
+        print(f"⏭️  Up to date {entry['catalog']} [{entry['language']}] version {entry['version']}")
+    for entry in summary["failed"]:
+        print(f"❌ Failed {entry['catalog']} [{entry.get('language', '-')}]: {entry['error']}")
+
+    client.close()
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
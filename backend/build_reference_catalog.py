@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Build step for the reference recipe catalog.
+
+Compiles NATIVE_RECIPES_BY_COUNTRY and RECIPE_METADATA into
+reference_recipes_catalog.json with stable recipe IDs. The API loads this
+artifact at import and falls back to compiling in process when it is missing
+or older than the source tables, so rerun after editing them:
+
+    python build_reference_catalog.py
+"""
+
+import sys
+
+from expanded_reference_recipes import CATALOG_ARTIFACT_PATH, build_catalog_artifact
+
+
+def main():
+    artifact = build_catalog_artifact()
+    print(f"✅ Built {CATALOG_ARTIFACT_PATH.name}: {len(artifact['recipes'])} recipes "
+          f"(source {artifact['source_hash'][:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
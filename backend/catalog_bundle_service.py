@@ -0,0 +1,271 @@
+# Catalog Bundle Service - Pre-translated static catalogs served per language
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import string
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+CatalogBuilder = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class CatalogBundleService:
+    """
+    Translates static catalogs (meal categories, premium tiers, charity activity
+    types, reference recipes, heritage dishes) once per language and serves the
+    stored bundles, so repeat requests never reach the translation backend.
+
+    A bundle is a string table mapping each English source string to its
+    translation. Localizing a catalog walks the English payload and swaps the
+    translatable fields through that table; the localized payload is memoized
+    per (catalog, language, version, variant).
+
+    Sentences built per request (e.g. a note naming the requested cuisine) are
+    registered as templates with {placeholders}: the template is translated
+    once and the placeholders are filled in when the payload is localized.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.bundles_collection = db.catalog_bundles
+        self.logger = logging.getLogger(__name__)
+
+        # catalog name -> {"builder": callable, "fields": set of translatable keys, "templates": set of templates}
+        self.catalogs: Dict[str, Dict[str, Any]] = {}
+
+        # (catalog, language) -> bundle document
+        self.bundles: Dict[tuple, Dict[str, Any]] = {}
+
+        # (catalog, language, version, variant) -> localized payload
+        self.localized_cache: Dict[tuple, Any] = {}
+
+        self.build_concurrency = 8
+
+    def register_catalog(self, name: str, builder: CatalogBuilder, fields: Iterable[str], templates: Iterable[str] = ()):
+        """
+        Register a static catalog and the keys whose values should be translated.
+        templates: sentences with {placeholders} served under those keys but missing
+        from the builder's payload; they are translated along with the catalog.
+        """
+        self.catalogs[name] = {"builder": builder, "fields": set(fields), "templates": set(templates)}
+
+    async def load_bundles(self):
+        """Warm the in-memory bundle table from the database"""
+        try:
+            bundles = await self.bundles_collection.find({}, {"_id": 0}).to_list(length=None)
+            for bundle in bundles:
+                bundle["strings"] = {entry["source"]: entry["text"] for entry in bundle.get("strings", [])}
+                self.bundles[(bundle["catalog"], bundle["language"])] = bundle
+            self.localized_cache.clear()
+            self.logger.info(f"Loaded {len(bundles)} catalog bundles")
+        except Exception as e:
+            self.logger.error(f"Failed to load catalog bundles: {str(e)}")
+
+    async def localize(
+        self,
+        name: str,
+        payload: Any,
+        language: Optional[str],
+        variant: str = "",
+        params: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """Return the payload with translatable fields replaced from the pre-built bundle
+
+        `variant` distinguishes different payloads served from the same catalog
+        (e.g. one cuisine out of the heritage dish catalog) in the memo cache, so
+        it must also identify `params`, the values filled into template strings.
+        """
+        catalog = self.catalogs.get(name)
+        if not catalog:
+            return payload
+
+        bundle = self.bundles.get((name, language)) if language and language != "en" else None
+        if not bundle and not params:
+            return payload
+
+        cache_key = (name, language if bundle else "en", bundle["version"] if bundle else None, variant)
+        if cache_key not in self.localized_cache:
+            self.localized_cache[cache_key] = self._apply_strings(
+                self._to_plain(payload), catalog["fields"], bundle["strings"] if bundle else {},
+                catalog["templates"], params or {}
+            )
+        return self.localized_cache[cache_key]
+
+    async def build_bundles(
+        self,
+        languages: Optional[List[str]] = None,
+        catalogs: Optional[List[str]] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """Offline job: translate every registered catalog into each language and store the bundles"""
+        from translation_service import get_translation_service
+
+        translation_service = await get_translation_service()
+        if languages is None:
+            languages = [code for code in translation_service.get_supported_languages() if code != "en"]
+
+        summary = {"built": [], "skipped": [], "failed": []}
+
+        for name in (catalogs or list(self.catalogs.keys())):
+            if name not in self.catalogs:
+                summary["failed"].append({"catalog": name, "error": "Unknown catalog"})
+                continue
+
+            payload = await self._build_source(name)
+            templates = self.catalogs[name]["templates"]
+            source_strings = sorted(self._collect_strings(payload, self.catalogs[name]["fields"]) | templates)
+            version = self._compute_version(source_strings)
+
+            for language in languages:
+                if language == "en":
+                    continue
+
+                existing = self.bundles.get((name, language))
+                if existing and existing["version"] == version and not force:
+                    summary["skipped"].append({"catalog": name, "language": language, "version": version})
+                    continue
+
+                try:
+                    # Strings already translated for an older version are reused
+                    previous = existing["strings"] if existing else {}
+                    strings = await self._translate_strings(
+                        translation_service, source_strings, language, previous, templates
+                    )
+
+                    bundle = {
+                        "catalog": name,
+                        "language": language,
+                        "version": version,
+                        "source_count": len(source_strings),
+                        "translated_count": len(strings),
+                        "built_at": datetime.utcnow()
+                    }
+                    # Source strings contain dots, so they are stored as pairs rather than field names
+                    await self.bundles_collection.replace_one(
+                        {"catalog": name, "language": language},
+                        {**bundle, "strings": [{"source": text, "text": translated} for text, translated in strings.items()]},
+                        upsert=True
+                    )
+                    self.bundles[(name, language)] = {**bundle, "strings": strings}
+                    summary["built"].append({"catalog": name, "language": language, "version": version})
+
+                except Exception as e:
+                    self.logger.error(f"Failed to build {name} bundle for {language}: {str(e)}")
+                    summary["failed"].append({"catalog": name, "language": language, "error": str(e)})
+
+        self.localized_cache.clear()
+        return summary
+
+    def get_bundle_status(self) -> Dict[str, Any]:
+        """Summarize which bundles are built and how much of each source they cover"""
+        status = {}
+        for (name, language), bundle in self.bundles.items():
+            status.setdefault(name, {})[language] = {
+                "version": bundle["version"],
+                "translated_count": bundle.get("translated_count", 0),
+                "source_count": bundle.get("source_count", 0),
+                "built_at": bundle.get("built_at")
+            }
+        return {
+            "registered_catalogs": sorted(self.catalogs.keys()),
+            "bundles": status
+        }
+
+    # PRIVATE HELPER METHODS
+
+    async def _build_source(self, name: str) -> Any:
+        """Produce the English payload for a catalog"""
+        result = self.catalogs[name]["builder"]()
+        if inspect.isawaitable(result):
+            result = await result
+        return self._to_plain(result)
+
+    async def _translate_strings(
+        self,
+        translation_service,
+        source_strings: List[str],
+        language: str,
+        previous: Dict[str, str],
+        templates: Set[str]
+    ) -> Dict[str, str]:
+        """
+        Translate each unique source string once, skipping ones already translated.
+        A template whose translation lost or renamed a placeholder stays untranslated.
+        """
+        strings = {text: previous[text] for text in source_strings if text in previous}
+        pending = [text for text in source_strings if text not in strings]
+        semaphore = asyncio.Semaphore(self.build_concurrency)
+
+        async def translate(text: str):
+            async with semaphore:
+                result = await translation_service.translate_text(text, language)
+                if not result.get("success"):
+                    return
+                if text in templates and self._placeholders(result["translated_text"]) != self._placeholders(text):
+                    self.logger.warning(f"Dropped {language} translation of template with mangled placeholders: {text}")
+                    return
+                strings[text] = result["translated_text"]
+
+        await asyncio.gather(*(translate(text) for text in pending))
+        return strings
+
+    def _collect_strings(self, value: Any, fields: Set[str], translatable: bool = False) -> Set[str]:
+        """Gather every string that sits under a translatable key"""
+        collected = set()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                collected |= self._collect_strings(item, fields, translatable or key in fields)
+        elif isinstance(value, list):
+            for item in value:
+                collected |= self._collect_strings(item, fields, translatable)
+        elif translatable and isinstance(value, str) and value.strip():
+            collected.add(value)
+        return collected
+
+    def _apply_strings(
+        self,
+        value: Any,
+        fields: Set[str],
+        strings: Dict[str, str],
+        templates: Set[str],
+        params: Dict[str, str],
+        translatable: bool = False
+    ) -> Any:
+        """Copy the payload replacing translatable strings found in the bundle and filling templates"""
+        if isinstance(value, dict):
+            return {
+                key: self._apply_strings(item, fields, strings, templates, params, translatable or key in fields)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._apply_strings(item, fields, strings, templates, params, translatable) for item in value]
+        if translatable and isinstance(value, str):
+            text = strings.get(value, value)
+            return text.format_map(params) if value in templates else text
+        return value
+
+    def _placeholders(self, template: str) -> Optional[Set[str]]:
+        """Placeholder names in a template, or None if its braces do not parse"""
+        try:
+            return {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+        except ValueError:
+            return None
+
+    def _to_plain(self, value: Any) -> Any:
+        """Convert pydantic models nested in a payload into plain dicts"""
+        if hasattr(value, "dict") and callable(value.dict):
+            return value.dict()
+        if isinstance(value, dict):
+            return {key: self._to_plain(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._to_plain(item) for item in value]
+        return value
+
+    def _compute_version(self, source_strings: List[str]) -> str:
+        """Version a bundle by the hash of its English source strings"""
+        digest = hashlib.sha256(json.dumps(source_strings, ensure_ascii=False).encode()).hexdigest()
+        return digest[:12]
@@ -0,0 +1,528 @@
+# Chain Inventory Sync - background, incremental product catalog sync for ethnic grocery store chains
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+from pymongo import UpdateOne
+
+from ingredient_canonicalizer import CANONICAL_VERSION, get_ingredient_canonicalizer
+
+# Run states
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Recorded catalog pages, one directory per chain: <chain_id>/page_<n>.json
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "chain_inventory")
+
+
+class ChainInventoryFetcher:
+    """
+    Pages through one chain's product catalog and normalizes its items.
+
+    Subclasses name the chain, the environment variable holding its catalog URL
+    and how to parse one page. Every parsed item has the shape
+    {"sku", "name", "category", "price", "in_stock", "unit"}.
+    """
+
+    chain_id = ""
+    url_env = ""
+    page_size = 250
+    requests_per_second = 5.0
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or os.environ.get(self.url_env)
+
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}?page={page}&limit={self.page_size}"
+
+    def parse_page(self, payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """(items on the page, total page count when the page reports it)"""
+        raise NotImplementedError
+
+
+class HMartFetcher(ChainInventoryFetcher):
+    """H Mart storefront products feed; pages end with an empty product list"""
+
+    chain_id = "h_mart"
+    url_env = "HMART_INVENTORY_URL"
+
+    def parse_page(self, payload):
+        items = []
+        for product in payload.get("products", []):
+            for variant in product.get("variants", []) or [{}]:
+                sku = variant.get("sku") or f"{product.get('id')}-{variant.get('id', 0)}"
+                title = product.get("title", "")
+                if variant.get("title") and variant["title"] != "Default Title":
+                    title = f"{title} {variant['title']}"
+                items.append({
+                    "sku": str(sku),
+                    "name": title.strip(),
+                    "category": product.get("product_type") or None,
+                    "price": _price(variant.get("price")),
+                    "in_stock": bool(variant.get("available", True)),
+                    "unit": variant.get("title") if variant.get("title") != "Default Title" else None
+                })
+        return items, None
+
+
+class PatelBrothersFetcher(ChainInventoryFetcher):
+    """Patel Brothers catalog API; every page reports the last page number"""
+
+    chain_id = "patel_brothers"
+    url_env = "PATEL_BROTHERS_INVENTORY_URL"
+    page_size = 200
+
+    def parse_page(self, payload):
+        items = [
+            {
+                "sku": str(item["item_code"]),
+                "name": (item.get("description") or "").strip(),
+                "category": item.get("department") or None,
+                "price": _price(item.get("unit_price")),
+                "in_stock": (item.get("qty_on_hand") or 0) > 0,
+                "unit": item.get("pack_size") or None
+            }
+            for item in payload.get("data", {}).get("items", []) if item.get("item_code")
+        ]
+        return items, payload.get("meta", {}).get("last_page")
+
+
+class Ranch99Fetcher(ChainInventoryFetcher):
+    """99 Ranch Market product list; pages are derived from the reported item total"""
+
+    chain_id = "ranch_99"
+    url_env = "RANCH99_INVENTORY_URL"
+    page_size = 100
+    requests_per_second = 3.0
+
+    def page_url(self, page):
+        return f"{self.base_url}?pageNum={page}&pageSize={self.page_size}"
+
+    def parse_page(self, payload):
+        result = payload.get("result", {})
+        items = [
+            {
+                "sku": str(item["product_id"]),
+                "name": (item.get("name") or "").strip(),
+                "category": item.get("category_name") or None,
+                "price": _price(item.get("price")),
+                "in_stock": item.get("stock_status", "in_stock") == "in_stock",
+                "unit": item.get("spec") or None
+            }
+            for item in result.get("list", []) if item.get("product_id")
+        ]
+        total = result.get("total")
+        return items, math.ceil(total / self.page_size) if total is not None else None
+
+
+def _price(value: Any) -> Optional[float]:
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return None
+
+
+def default_fetchers() -> List[ChainInventoryFetcher]:
+    return [HMartFetcher(), PatelBrothersFetcher(), Ranch99Fetcher()]
+
+
+class HostRateLimiter:
+    """Token bucket: at most `rate` requests per second to one host, bursting up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ChainInventorySync:
+    """
+    Keeps chain_inventory in step with each chain's online catalog.
+
+    A sync runs in the background and streams the catalog page by page:
+      - pages are fetched concurrently, throttled per host by a token bucket
+      - each page is parsed as it arrives and every item is hashed; only items
+        whose content hash differs from the stored one are written, as batched
+        unordered bulk_write upserts running alongside the fetches
+      - items missing from a complete sync are marked discontinued
+    With fixtures_dir set, pages are read from recorded JSON files instead of
+    the network, so fetchers can be exercised without the chains' sites.
+    """
+
+    def __init__(
+        self,
+        db,
+        fetchers: Optional[List[ChainInventoryFetcher]] = None,
+        fixtures_dir: Optional[str] = None,
+        concurrency: int = 4,
+        batch_size: int = 1000,
+        request_timeout_seconds: float = 20.0
+    ):
+        self.db = db
+        self.inventory = db.chain_inventory
+        self.runs = db.chain_inventory_syncs
+        self.logger = logging.getLogger(__name__)
+        self.canonicalizer = get_ingredient_canonicalizer()
+
+        self.fetchers = {fetcher.chain_id: fetcher for fetcher in (fetchers or default_fetchers())}
+        self.fixtures_dir = fixtures_dir
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout_seconds)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._limiters: Dict[str, HostRateLimiter] = {}
+        # chain id -> (run id, task) for syncs in progress
+        self._running: Dict[str, Tuple[str, asyncio.Task]] = {}
+        # run id -> live progress of a running sync
+        self._progress: Dict[str, Dict[str, Any]] = {}
+
+        self.stats = {"runs": 0, "completed": 0, "failed": 0, "items_written": 0, "pages_fetched": 0}
+
+    # LIFECYCLE
+
+    async def create_indexes(self):
+        await self.inventory.create_index([("chain_id", 1), ("sku", 1)], unique=True)
+        await self.inventory.create_index([("ingredient_terms", 1), ("chain_id", 1)])
+        await self.runs.create_index("id", unique=True)
+        await self.runs.create_index([("chain_id", 1), ("started_at", -1)])
+
+    async def stop(self):
+        for _, task in self._running.values():
+            task.cancel()
+        await asyncio.gather(*(task for _, task in self._running.values()), return_exceptions=True)
+        self._running = {}
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # SYNC RUNS
+
+    async def start(self, chain_id: str) -> Dict[str, Any]:
+        """Start a background sync of one chain, or return the one already running"""
+        if chain_id not in self.fetchers:
+            raise ValueError(f"No inventory fetcher available for {chain_id}")
+        if chain_id in self._running:
+            return await self.get_run(self._running[chain_id][0])
+
+        run = self._new_run(chain_id)
+        await self.runs.insert_one(dict(run))
+        task = asyncio.create_task(self._run_in_background(run))
+        self._running[chain_id] = (run["id"], task)
+        return self._public(run)
+
+    async def run(self, chain_id: str) -> Dict[str, Any]:
+        """Sync one chain and wait for it to finish"""
+        if chain_id not in self.fetchers:
+            raise ValueError(f"No inventory fetcher available for {chain_id}")
+        run = self._new_run(chain_id)
+        await self.runs.insert_one(dict(run))
+        return await self._sync(run)
+
+    async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        progress = self._progress.get(run_id)
+        if progress is not None:
+            # Live throughput for a sync still running
+            elapsed = (datetime.utcnow() - progress["started_at"]).total_seconds()
+            return self._public({
+                **progress,
+                "elapsed_seconds": round(elapsed, 2),
+                "items_per_second": round(progress["items_seen"] / elapsed, 1) if elapsed else 0
+            })
+        run = await self.runs.find_one({"id": run_id}, {"_id": 0})
+        return self._public(run) if run else None
+
+    async def get_runs(self, chain_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        query = {"chain_id": chain_id} if chain_id else {}
+        runs = await self.runs.find(query, {"_id": 0}).sort("started_at", -1).limit(limit).to_list(length=limit)
+        return [self._public(self._progress.get(run["id"], run)) for run in runs]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": {chain_id: run_id for chain_id, (run_id, _) in self._running.items()},
+            "chains": sorted(self.fetchers)
+        }
+
+    # PRIVATE HELPER METHODS
+
+    async def _run_in_background(self, run: Dict[str, Any]):
+        try:
+            await self._sync(run)
+        except Exception as e:
+            self.logger.error(f"Inventory sync {run['id']} for {run['chain_id']} failed: {str(e)}")
+        finally:
+            self._running.pop(run["chain_id"], None)
+
+    async def _sync(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        fetcher = self.fetchers[run["chain_id"]]
+        self.stats["runs"] += 1
+        self._progress[run["id"]] = run
+        start = time.perf_counter()
+
+        # Content hashes of everything stored for the chain; discontinued items
+        # count as changed so they are revived if they reappear
+        known: Dict[str, Optional[str]] = {}
+        async for item in self.inventory.find(
+            {"chain_id": fetcher.chain_id}, {"_id": 0, "sku": 1, "content_hash": 1, "discontinued": 1}
+        ):
+            known[item["sku"]] = None if item.get("discontinued") else item.get("content_hash")
+
+        seen: Set[str] = set()
+        writes: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        writer = asyncio.create_task(self._write_batches(writes, run))
+        pending: List[UpdateOne] = []
+
+        async def enqueue(batch: Optional[List[UpdateOne]]):
+            """Hand a batch to the writer, raising the writer's error rather than waiting on a dead queue"""
+            put = asyncio.ensure_future(writes.put(batch))
+            done, _ = await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if put not in done:
+                put.cancel()
+                # The writer only finishes early by failing; result() re-raises its exception
+                writer.result()
+                raise RuntimeError("Inventory writer stopped before the catalog was written")
+
+        async def process(page: int) -> bool:
+            """Fetch, parse and diff one page; False once the catalog has ended"""
+            nonlocal pending
+            payload = await self._fetch_page(fetcher, page, run)
+            if payload is None:
+                return False
+            items, total_pages = fetcher.parse_page(payload)
+            if total_pages is not None:
+                run["total_pages"] = total_pages
+            now = datetime.utcnow()
+            for item in items:
+                if item["sku"] in seen:
+                    continue
+                seen.add(item["sku"])
+                content_hash = self._content_hash(item)
+                if known.get(item["sku"]) == content_hash:
+                    run["unchanged"] += 1
+                    continue
+                pending.append(UpdateOne(
+                    {"chain_id": fetcher.chain_id, "sku": item["sku"]},
+                    {
+                        "$set": {
+                            **item,
+                            "ingredient_terms": self.canonicalizer.canonical_terms(item["name"]),
+                            "content_hash": content_hash,
+                            "discontinued": False,
+                            "updated_at": now
+                        },
+                        "$setOnInsert": {"first_seen_at": now}
+                    },
+                    upsert=True
+                ))
+                if len(pending) >= self.batch_size:
+                    batch, pending = pending, []
+                    await enqueue(batch)
+            run["items_seen"] = len(seen)
+            run["pages_fetched"] += 1
+            self.stats["pages_fetched"] += 1
+            return bool(items)
+
+        async def gather_pages(coroutines) -> List[Any]:
+            """Run page fetches together; the first failure cancels the rest"""
+            tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        try:
+            more = await process(1)
+            if more and run.get("total_pages"):
+                # The catalog size is known: fetch the remaining pages concurrently
+                semaphore = asyncio.Semaphore(self.concurrency)
+
+                async def bounded(page):
+                    async with semaphore:
+                        await process(page)
+
+                await gather_pages(bounded(page) for page in range(2, run["total_pages"] + 1))
+            else:
+                # Unknown size: fetch windows of pages until one comes back empty
+                page = 2
+                while more:
+                    window = range(page, page + self.concurrency)
+                    more = all(await gather_pages(process(number) for number in window))
+                    page += self.concurrency
+
+            if pending:
+                await enqueue(pending)
+            await enqueue(None)
+            await writer
+
+            if run["failed_pages"]:
+                # A partial catalog cannot tell removed items from unfetched ones
+                raise RuntimeError(f"{len(run['failed_pages'])} catalog pages could not be fetched")
+            run["discontinued"] = await self._mark_discontinued(
+                fetcher.chain_id, [sku for sku, content_hash in known.items() if content_hash and sku not in seen]
+            )
+            run["status"] = COMPLETED
+            self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            writer.cancel()
+            run["status"] = FAILED
+            run["error"] = "Sync cancelled"
+            self.stats["failed"] += 1
+            raise
+        except Exception as e:
+            writer.cancel()
+            run["status"] = FAILED
+            run["error"] = str(e)
+            self.stats["failed"] += 1
+            self.logger.error(f"Inventory sync for {fetcher.chain_id} failed: {str(e)}")
+        finally:
+            self._update_throughput(run, start)
+            run["completed_at"] = datetime.utcnow()
+            self._progress.pop(run["id"], None)
+            await self.runs.update_one({"id": run["id"]}, {"$set": self._stored(run)})
+            if run["status"] == COMPLETED:
+                await self.db.store_chains.update_one(
+                    {"chain_id": fetcher.chain_id},
+                    {"$set": {
+                        "last_inventory_sync": run["completed_at"],
+                        "inventory_items": len(seen)
+                    }}
+                )
+
+        self.logger.info(
+            f"Inventory sync for {fetcher.chain_id}: {run['items_seen']} items, {run['items_written']} written, "
+            f"{run['discontinued']} discontinued in {run['elapsed_seconds']} s"
+        )
+        return self._public(run)
+
+    async def _fetch_page(self, fetcher: ChainInventoryFetcher, page: int, run: Dict[str, Any],
+                          attempts: int = 3) -> Optional[Dict[str, Any]]:
+        """Parsed JSON of one catalog page, or None past the end of the catalog"""
+        if self.fixtures_dir:
+            path = os.path.join(self.fixtures_dir, fetcher.chain_id, f"page_{page}.json")
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as handle:
+                body = handle.read()
+            run["bytes_fetched"] += len(body)
+            return json.loads(body)
+
+        if not fetcher.base_url:
+            raise RuntimeError(f"{fetcher.url_env} is not configured")
+
+        url = fetcher.page_url(page)
+        host = urlparse(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = HostRateLimiter(fetcher.requests_per_second, burst=self.concurrency)
+
+        session = await self._get_session()
+        for attempt in range(attempts):
+            await limiter.acquire()
+            try:
+                async with session.get(url) as response:
+                    if response.status == 404:
+                        return None
+                    response.raise_for_status()
+                    body = await response.read()
+                run["bytes_fetched"] += len(body)
+                return json.loads(body)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                if attempt == attempts - 1:
+                    self.logger.warning(f"Giving up on {url}: {str(e)}")
+                    run["failed_pages"].append(page)
+                    return None
+                await asyncio.sleep(2 ** attempt)
+
+    async def _write_batches(self, writes: asyncio.Queue, run: Dict[str, Any]):
+        while True:
+            batch = await writes.get()
+            if batch is None:
+                return
+            result = await self.inventory.bulk_write(batch, ordered=False)
+            written = result.upserted_count + result.modified_count
+            run["items_written"] += written
+            self.stats["items_written"] += written
+
+    async def _mark_discontinued(self, chain_id: str, skus: List[str]) -> int:
+        discontinued = 0
+        for start in range(0, len(skus), self.batch_size):
+            result = await self.inventory.update_many(
+                {"chain_id": chain_id, "sku": {"$in": skus[start:start + self.batch_size]}},
+                {"$set": {"discontinued": True, "in_stock": False, "updated_at": datetime.utcnow()}}
+            )
+            discontinued += result.modified_count
+        return discontinued
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                headers={"User-Agent": "Lambalia-App/1.0 (contact@lambalia.net)"}
+            )
+        return self._session
+
+    def _content_hash(self, item: Dict[str, Any]) -> str:
+        # The vocabulary version is hashed too, so a vocabulary change rewrites ingredient_terms
+        payload = json.dumps({**item, "_canonical_version": CANONICAL_VERSION}, sort_keys=True,
+                             separators=(",", ":"), default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _update_throughput(self, run: Dict[str, Any], start: float):
+        elapsed = time.perf_counter() - start
+        run["elapsed_seconds"] = round(elapsed, 2)
+        run["items_per_second"] = round(run["items_seen"] / elapsed, 1) if elapsed else 0
+        run["pages_per_second"] = round(run["pages_fetched"] / elapsed, 2) if elapsed else 0
+
+    def _new_run(self, chain_id: str) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "chain_id": chain_id,
+            "status": RUNNING,
+            "source": "fixtures" if self.fixtures_dir else "web",
+            "started_at": datetime.utcnow(),
+            "total_pages": None,
+            "pages_fetched": 0,
+            "failed_pages": [],
+            "bytes_fetched": 0,
+            "items_seen": 0,
+            "items_written": 0,
+            "unchanged": 0,
+            "discontinued": 0
+        }
+
+    def _stored(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: value for name, value in run.items() if name not in ("_id", "id")}
+
+    def _public(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        run = {name: value for name, value in run.items() if name != "_id"}
+        if run.get("total_pages"):
+            run["progress"] = round(min(1.0, run["pages_fetched"] / run["total_pages"]), 3)
+        run["run_id"] = run.pop("id")
+        return run
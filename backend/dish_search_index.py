@@ -0,0 +1,196 @@
+# Dish Search Index - BM25 search with prefix matching and facets over static dish catalogs
+import bisect
+import math
+import re
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+TOKEN = re.compile(r"[^\W_]+")
+STOPWORDS = {"a", "an", "and", "the", "of", "with", "in", "on", "or", "for", "to", "from", "by"}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# A query word that only begins an indexed word scores less than an exact word
+PREFIX_DISCOUNT = 0.7
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN.findall(fold(text)) if token not in STOPWORDS]
+
+
+class DishSearchIndex:
+    """
+    Read-only search structure compiled once from a static dish catalog.
+
+    Each document has weighted text fields (e.g. name above description) and
+    facet values (country, category). At build time every (token, document)
+    pair gets its BM25F score, so a query is a few dict lookups and sums:
+      - every query word must match, exactly or as the start of an indexed word
+        (bisect over the sorted vocabulary), so "jol" finds "jollof"
+      - results are ranked by score, then catalog order
+      - facet counts cover all query matches before the facet filters apply,
+        so clients can show how many results each filter would leave
+    """
+
+    def __init__(self, documents: Iterable[Dict[str, Any]], field_weights: Dict[str, float], facets: Iterable[str]):
+        """documents: {"fields": {field: text}, "facets": {facet: value}, "payload": ...}"""
+        self.field_weights = field_weights
+        self.facet_names = list(facets)
+
+        self._payloads: List[Any] = []
+        # facet -> value -> document positions
+        self._facet_postings: Dict[str, Dict[str, Set[int]]] = {name: {} for name in self.facet_names}
+
+        weighted_tfs: List[Dict[str, float]] = []
+        for position, document in enumerate(documents):
+            self._payloads.append(document["payload"])
+            values = {name: document["facets"].get(name) or "" for name in self.facet_names}
+            for name, value in values.items():
+                self._facet_postings[name].setdefault(value, set()).add(position)
+
+            tfs: Dict[str, float] = {}
+            for field, weight in field_weights.items():
+                text = document["fields"].get(field) or ""
+                if isinstance(text, (list, tuple)):
+                    text = " ".join(text)
+                for token in tokenize(text):
+                    tfs[token] = tfs.get(token, 0.0) + weight
+            weighted_tfs.append(tfs)
+
+        self._all = frozenset(range(len(self._payloads)))
+        lengths = [sum(tfs.values()) for tfs in weighted_tfs]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+
+        document_frequency: Dict[str, int] = {}
+        for tfs in weighted_tfs:
+            for token in tfs:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+
+        count = len(self._payloads)
+        # token -> {position: bm25 score}
+        self._impacts: Dict[str, Dict[int, float]] = {}
+        for position, tfs in enumerate(weighted_tfs):
+            norm = K1 * (1 - B + B * lengths[position] / (average_length or 1.0))
+            for token, tf in tfs.items():
+                df = document_frequency[token]
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                self._impacts.setdefault(token, {})[position] = idf * tf * (K1 + 1) / (tf + norm)
+        self._vocabulary = sorted(self._impacts)
+
+        # Folded facet values, for "contains" filters like country=nigeria
+        self._folded_facets = {
+            name: [(fold(value), value) for value in postings]
+            for name, postings in self._facet_postings.items()
+        }
+
+        self.stats = {"queries": 0, "total_query_us": 0.0}
+
+    # QUERYING
+
+    def search(
+        self,
+        query: str = "",
+        filters: Optional[Dict[str, str]] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Ranked, paged results: {"results", "total", "facets"}. Filters match a
+        facet value exactly or by case-insensitive substring.
+        """
+        start = time.perf_counter()
+
+        scores = self._score(query) if tokenize(query) else None
+        matches = set(scores) if scores is not None else set(self._all)
+
+        facets = {name: self._count_facet(name, matches) for name in self.facet_names}
+
+        for name, wanted in (filters or {}).items():
+            if wanted:
+                matches &= self._filter_positions(name, wanted)
+
+        if scores is not None:
+            ordered = sorted(matches, key=lambda position: (-scores[position], position))
+        else:
+            ordered = sorted(matches)
+
+        offset = max(0, offset)
+        page = ordered[offset:offset + max(0, limit)]
+        results = [
+            {"payload": self._payloads[position], "score": round(scores[position], 4) if scores else None}
+            for position in page
+        ]
+
+        self.stats["queries"] += 1
+        self.stats["total_query_us"] += (time.perf_counter() - start) * 1_000_000
+        return {"results": results, "total": len(ordered), "facets": facets}
+
+    def get_stats(self) -> Dict[str, Any]:
+        queries = self.stats["queries"]
+        return {
+            "documents": len(self._payloads),
+            "tokens": len(self._vocabulary),
+            "queries": queries,
+            "avg_query_us": round(self.stats["total_query_us"] / queries, 1) if queries else 0
+        }
+
+    # PRIVATE HELPER METHODS
+
+    def _score(self, query: str) -> Dict[int, float]:
+        scores: Optional[Dict[int, float]] = None
+        for word in dict.fromkeys(tokenize(query)):
+            word_scores = self._word_scores(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {
+                    position: score + word_scores[position]
+                    for position, score in scores.items() if position in word_scores
+                }
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _word_scores(self, word: str) -> Dict[int, float]:
+        """Best score per document over the exact word and every word it begins"""
+        scores: Dict[int, float] = dict(self._impacts.get(word, {}))
+        index = bisect.bisect_left(self._vocabulary, word)
+        vocabulary = self._vocabulary
+        while index < len(vocabulary) and vocabulary[index].startswith(word):
+            token = vocabulary[index]
+            index += 1
+            if token == word:
+                continue
+            for position, impact in self._impacts[token].items():
+                discounted = impact * PREFIX_DISCOUNT
+                if discounted > scores.get(position, 0.0):
+                    scores[position] = discounted
+        return scores
+
+    def _filter_positions(self, name: str, wanted: str) -> Set[int]:
+        postings = self._facet_postings.get(name, {})
+        if wanted in postings:
+            return postings[wanted]
+        wanted = fold(wanted)
+        positions: Set[int] = set()
+        for folded, value in self._folded_facets.get(name, []):
+            if wanted in folded:
+                positions |= postings[value]
+        return positions
+
+    def _count_facet(self, name: str, matches: Set[int]) -> List[Dict[str, Any]]:
+        counts = [
+            {"value": value, "count": len(positions & matches)}
+            for value, positions in self._facet_postings[name].items()
+        ]
+        return sorted(
+            (facet for facet in counts if facet["count"]),
+            key=lambda facet: (-facet["count"], facet["value"])
+        )
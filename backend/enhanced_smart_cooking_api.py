@@ -266,6 +266,9 @@ def create_enhanced_smart_cooking_router(db, get_current_user):
                 "secret_menu_items": len([item for item in service.fastfood_database if item.is_secret_menu]),
                 "supported_restaurants": len(set(item.restaurant for item in service.fastfood_database)),
                 "ingredient_categories": len(set(ing.category for ing in service.basic_ingredients)),
+                "recipe_index": service.recipe_matcher.get_stats(),
+                "recipe_cache": {**service.recipe_cache_stats, "entries": len(service.recipe_cache)},
+                "autocomplete_index": service.autocomplete.get_stats(),
                 "features": [
                     "SuperCook-style ingredient matching",
                     "HackTheMenu fast food clones",
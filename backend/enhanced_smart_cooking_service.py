@@ -1,15 +1,23 @@
 # Enhanced Smart Cooking Service - SuperCook Style + HackTheMenu Integration
 import os
 import uuid
+import time
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterable
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pydantic import BaseModel
 from enum import Enum
 
 # Import the translation service for AI-powered recipe generation
 from translation_service import get_translation_service
+from ingredient_autocomplete import get_ingredient_autocomplete
+from pantry_recipe_matcher import PantryRecipeMatcher
+from ingredient_canonicalizer import get_ingredient_canonicalizer
 
 class IngredientCategory(str, Enum):
     PROTEINS = "proteins"
@@ -91,6 +99,49 @@ class EnhancedSmartCookingService:
         self.basic_ingredients = self._load_basic_ingredients()
         self.fastfood_database = self._load_fastfood_database()
         
+        # Shared ingredient vocabulary: basic ingredient common names become synonyms
+        self.canonicalizer = get_ingredient_canonicalizer()
+        for ingredient in self.basic_ingredients:
+            self.canonicalizer.register(ingredient.name, ingredient.common_names)
+        
+        # Shared autocomplete index (also fed by heritage and grocery vocabularies)
+        self.autocomplete = get_ingredient_autocomplete()
+        self._register_autocomplete_sources()
+        
+        # Inverted index over built-in and stored recipes for pantry matching
+        self.recipe_matcher = PantryRecipeMatcher()
+        self._index_builtin_recipes()
+        
+        # Recipe results keyed by pantry content hash, max_missing and corpus generation
+        self.recipe_cache = OrderedDict()
+        self.recipe_cache_ttl = 3600  # 1 hour
+        self.recipe_cache_max_entries = 5000
+        self.recipe_cache_stats = {"hits": 0, "misses": 0}
+        
+    def _register_autocomplete_sources(self):
+        """Publish the basic ingredient list and fast food vocabulary to the autocomplete index"""
+        basic_entries = []
+        for ingredient in self.basic_ingredients:
+            payload = {
+                "name": ingredient.name,
+                "category": ingredient.category,
+                "common_names": ingredient.common_names,
+                "storage_tips": ingredient.storage_tips
+            }
+            basic_entries.append({"term": ingredient.name, "popularity": 50, "payload": payload})
+            basic_entries.extend(
+                {"term": name, "popularity": 30, "payload": payload} for name in ingredient.common_names
+            )
+        self.autocomplete.replace_source("basic", basic_entries)
+        
+        fastfood_popularity = {}
+        for item in self.fastfood_database:
+            for ingredient in item.ingredients:
+                fastfood_popularity[ingredient] = fastfood_popularity.get(ingredient, 0) + item.popularity_score / 10
+        self.autocomplete.replace_source("fastfood", [
+            {"term": ingredient, "popularity": score} for ingredient, score in fastfood_popularity.items()
+        ])
+        
     def _load_basic_ingredients(self) -> List[IngredientItem]:
         """Load comprehensive ingredient database similar to SuperCook"""
         return [
@@ -673,16 +724,7 @@ class EnhancedSmartCookingService:
     async def create_user_pantry(self, user_id: str, pantry_name: str = "My Pantry") -> Dict[str, Any]:
         """Create a user's virtual pantry similar to SuperCook"""
         try:
-            pantry = {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "name": pantry_name,
-                "ingredients": [],
-                "excluded_ingredients": [],
-                "dietary_preferences": [],
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
+            pantry = self._new_pantry_document(user_id, pantry_name)
             
             await self.user_pantries_collection.insert_one(pantry)
             
@@ -692,6 +734,8 @@ class EnhancedSmartCookingService:
                 "message": "Virtual pantry created successfully"
             }
             
+        except DuplicateKeyError:
+            return {"success": False, "error": "Pantry already exists for this user"}
         except Exception as e:
             self.logger.error(f"Failed to create pantry: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -699,35 +743,33 @@ class EnhancedSmartCookingService:
     async def add_ingredients_to_pantry(self, user_id: str, ingredients: List[str]) -> Dict[str, Any]:
         """Add ingredients to user's pantry"""
         try:
-            # Find user's pantry
-            pantry = await self.user_pantries_collection.find_one({"user_id": user_id})
-            
-            if not pantry:
-                # Create default pantry
-                result = await self.create_user_pantry(user_id)
-                if not result["success"]:
-                    return result
-                pantry = await self.user_pantries_collection.find_one({"user_id": user_id})
+            # Add ingredients as canonical names (avoids duplicates across synonyms and plurals)
+            for ingredient in ingredients:
+                self.autocomplete.record_selection(ingredient)
+            new_ingredients = self.canonicalizer.canonical_names(ingredients)
             
-            # Add ingredients (avoid duplicates)
-            current_ingredients = set(pantry.get("ingredients", []))
-            new_ingredients = [ing.lower().strip() for ing in ingredients]
-            updated_ingredients = list(current_ingredients.union(set(new_ingredients)))
-            
-            await self.user_pantries_collection.update_one(
+            # Single atomic round trip; creates the default pantry on first use
+            default_pantry = self._new_pantry_document(user_id, "My Pantry")
+            for field in ("ingredients", "updated_at"):
+                default_pantry.pop(field)
+            pantry = await self.user_pantries_collection.find_one_and_update(
                 {"user_id": user_id},
                 {
-                    "$set": {
-                        "ingredients": updated_ingredients,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
+                    "$addToSet": {"ingredients": {"$each": new_ingredients}},
+                    **self._pantry_changed(),
+                    "$setOnInsert": default_pantry
+                },
+                projection={"_id": 0, "ingredients": 1, "excluded_ingredients": 1, "revision": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
             )
+            pantry_hash = await self._store_pantry_hash(user_id, pantry)
             
             return {
                 "success": True,
                 "ingredients_added": len(new_ingredients),
-                "total_ingredients": len(updated_ingredients)
+                "total_ingredients": len(pantry.get("ingredients", [])),
+                "pantry_hash": pantry_hash
             }
             
         except Exception as e:
@@ -740,29 +782,43 @@ class EnhancedSmartCookingService:
         max_missing: 0 = only recipes with all ingredients, 1+ = allow missing ingredients
         """
         try:
-            # Get user's pantry
-            pantry = await self.user_pantries_collection.find_one({"user_id": user_id})
-            if not pantry:
+            # Unchanged pantry contents reuse the previous results; only the stored hash is read for that
+            stored = await self.user_pantries_collection.find_one({"user_id": user_id}, {"_id": 0, "pantry_hash": 1})
+            if not stored:
                 return {"success": False, "error": "No pantry found. Please add ingredients first."}
+            if stored.get("pantry_hash"):
+                cached_result = self._get_cached_recipes(
+                    f"{stored['pantry_hash']}:{max_missing}:{self.recipe_matcher.generation}"
+                )
+                if cached_result:
+                    return {**cached_result, "cache_hit": True}
             
-            available_ingredients = set([ing.lower() for ing in pantry.get("ingredients", [])])
-            excluded_ingredients = set([ing.lower() for ing in pantry.get("excluded_ingredients", [])])
+            pantry = await self.user_pantries_collection.find_one(
+                {"user_id": user_id}, {"_id": 0, "ingredients": 1, "excluded_ingredients": 1, "pantry_hash": 1, "revision": 1}
+            )
+            if not pantry:
+                return {"success": False, "error": "No pantry found. Please add ingredients first."}
             
-            # Basic recipes from ingredients
-            ingredient_based_recipes = await self._generate_ingredient_based_recipes(available_ingredients)
+            available_ingredients = set(self.canonicalizer.canonical_names(pantry.get("ingredients", [])))
+            excluded_ingredients = set(self.canonicalizer.canonical_names(pantry.get("excluded_ingredients", [])))
+            pantry_hash = pantry.get("pantry_hash") or await self._store_pantry_hash(user_id, pantry)
+            cache_key = f"{pantry_hash}:{max_missing}:{self.recipe_matcher.generation}"
             
-            # Fast food clones
-            fastfood_matches = self._match_fastfood_recipes(available_ingredients, max_missing)
+            # Basic, fast food clone and stored recipes through the inverted index
+            matches, total_found = self.recipe_matcher.match(
+                available_ingredients, excluded_ingredients, max_missing, limit=20
+            )
+            found_recipes = []
+            for match in matches:
+                recipe = dict(match["recipe"])
+                recipe["missing_ingredients"] = match["missing_ingredients"]
+                recipe["coverage"] = match["coverage"]
+                found_recipes.append(recipe)
             
             # AI-generated recipes using available ingredients
             ai_recipes = await self._generate_ai_recipes(list(available_ingredients))
-            
-            all_recipes = ingredient_based_recipes + fastfood_matches + ai_recipes
-            
-            # Filter by missing ingredients
-            filtered_recipes = []
-            for recipe in all_recipes:
-                recipe_ingredients = set([ing.lower() for ing in recipe.ingredients_used])
+            for recipe in ai_recipes:
+                recipe_ingredients = set(self.canonicalizer.canonical_names(recipe.ingredients_used))
                 missing = recipe_ingredients - available_ingredients
                 
                 # Remove excluded ingredients
@@ -771,30 +827,161 @@ class EnhancedSmartCookingService:
                 
                 if len(missing) <= max_missing:
                     recipe.missing_ingredients = list(missing)
-                    filtered_recipes.append(recipe)
+                    recipe_data = recipe.dict()
+                    recipe_data["coverage"] = round(1 - len(missing) / len(recipe_ingredients), 4) if recipe_ingredients else 0.0
+                    found_recipes.append(recipe_data)
+                    total_found += 1
             
-            # Sort by completeness (fewer missing ingredients first)
-            filtered_recipes.sort(key=lambda x: len(x.missing_ingredients))
+            # Sort by coverage (fewest missing ingredients relative to recipe size first)
+            found_recipes.sort(key=lambda x: (-x["coverage"], len(x["missing_ingredients"])))
             
-            return {
+            result = {
                 "success": True,
-                "recipes": [recipe.dict() for recipe in filtered_recipes[:20]],  # Limit to 20
-                "total_found": len(filtered_recipes),
+                "recipes": found_recipes[:20],  # Limit to 20
+                "total_found": total_found,
                 "ingredients_used": list(available_ingredients),
-                "max_missing_allowed": max_missing
+                "max_missing_allowed": max_missing,
+                "pantry_hash": pantry_hash
             }
+            self._save_recipes_to_cache(cache_key, result)
+            return {**result, "cache_hit": False}
             
         except Exception as e:
             self.logger.error(f"Recipe search failed: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    async def _generate_ingredient_based_recipes(self, ingredients: set) -> List[RecipeMatch]:
-        """Generate basic recipes based on ingredient combinations"""
-        recipes = []
+    async def load_recipe_corpus(self, batch_size: int = 1000) -> int:
+        """Index the recipes stored in enhanced_recipes for pantry matching"""
+        loaded = 0
+        batch = []
+        cursor = self.recipes_collection.find({}, {"_id": 0})
+        async for recipe in cursor:
+            if not recipe.get("id") or not recipe.get("ingredients_used"):
+                continue
+            batch.append((recipe["id"], recipe["ingredients_used"], recipe))
+            if len(batch) >= batch_size:
+                self.recipe_matcher.add_recipes(batch)
+                loaded += len(batch)
+                batch = []
+        if batch:
+            self.recipe_matcher.add_recipes(batch)
+            loaded += len(batch)
+        
+        self.logger.info(f"Indexed {loaded} stored recipes for pantry matching")
+        return loaded
+    
+    async def save_recipe(self, recipe: RecipeMatch) -> Dict[str, Any]:
+        """Store a recipe in enhanced_recipes and make it matchable right away"""
+        recipe_data = recipe.dict()
+        recipe_data.pop("missing_ingredients", None)
+        await self.recipes_collection.update_one({"id": recipe.id}, {"$set": recipe_data}, upsert=True)
+        self.recipe_matcher.add_recipe(recipe.id, recipe.ingredients_used, recipe_data)
+        return {"success": True, "recipe_id": recipe.id}
+    
+    async def create_pantry_indexes(self) -> int:
+        """
+        Enforce one pantry per user so the upsert in add_ingredients_to_pantry cannot race
+        into duplicates. Pantries already duplicated are merged into the oldest first;
+        returns how many duplicates were removed.
+        """
+        removed = 0
+        duplicates = self.user_pantries_collection.aggregate([
+            {"$sort": {"created_at": 1}},
+            {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ])
+        async for group in duplicates:
+            keep, extra = group["ids"][0], group["ids"][1:]
+            merged = {"ingredients": set(), "excluded_ingredients": set(), "dietary_preferences": set()}
+            async for pantry in self.user_pantries_collection.find({"_id": {"$in": extra}}):
+                for field, values in merged.items():
+                    values.update(pantry.get(field) or [])
+            await self.user_pantries_collection.update_one(
+                {"_id": keep},
+                {
+                    "$addToSet": {field: {"$each": sorted(values)} for field, values in merged.items()},
+                    **self._pantry_changed()
+                }
+            )
+            result = await self.user_pantries_collection.delete_many({"_id": {"$in": extra}})
+            removed += result.deleted_count
         
-        # Simple pattern matching for common recipes
-        if {"eggs", "milk", "flour"}.issubset(ingredients):
-            recipes.append(RecipeMatch(
+        await self.user_pantries_collection.create_index("user_id", unique=True)
+        return removed
+    
+    def _pantry_changed(self) -> Dict[str, Any]:
+        """
+        Update operators every pantry content change carries: the revision moves on and
+        the stored hash is dropped in the same write, so a reader never sees a hash of
+        older contents; _store_pantry_hash then records the new one.
+        """
+        return {
+            "$set": {"updated_at": datetime.utcnow()},
+            "$inc": {"revision": 1},
+            "$unset": {"pantry_hash": ""}
+        }
+    
+    async def _store_pantry_hash(self, user_id: str, pantry: Dict[str, Any]) -> str:
+        """Store the content hash of a pantry revision unless a newer revision was written since"""
+        pantry_hash = self._pantry_hash(pantry.get("ingredients", []), pantry.get("excluded_ingredients", []))
+        await self.user_pantries_collection.update_one(
+            {"user_id": user_id, "revision": pantry.get("revision")},
+            {"$set": {"pantry_hash": pantry_hash}}
+        )
+        return pantry_hash
+    
+    def _pantry_hash(self, ingredients: Iterable[str], excluded_ingredients: Iterable[str]) -> str:
+        """Order-independent fingerprint of a pantry's canonical contents"""
+        available = sorted(set(self.canonicalizer.canonical_names(ingredients)))
+        excluded = sorted(set(self.canonicalizer.canonical_names(excluded_ingredients)))
+        content = "\n".join(available) + "\x00" + "\n".join(excluded)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    
+    def _get_cached_recipes(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Get recipe results from cache"""
+        cached_item = self.recipe_cache.get(cache_key)
+        if cached_item and time.time() - cached_item["timestamp"] < self.recipe_cache_ttl:
+            self.recipe_cache.move_to_end(cache_key)
+            self.recipe_cache_stats["hits"] += 1
+            return cached_item["data"]
+        if cached_item:
+            del self.recipe_cache[cache_key]
+        self.recipe_cache_stats["misses"] += 1
+        return None
+    
+    def _save_recipes_to_cache(self, cache_key: str, result: Dict[str, Any]):
+        """Save recipe results to cache, evicting the least recently used entries"""
+        self.recipe_cache[cache_key] = {"data": result, "timestamp": time.time()}
+        self.recipe_cache.move_to_end(cache_key)
+        while len(self.recipe_cache) > self.recipe_cache_max_entries:
+            self.recipe_cache.popitem(last=False)
+    
+    def _new_pantry_document(self, user_id: str, pantry_name: str) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "name": pantry_name,
+            "ingredients": [],
+            "excluded_ingredients": [],
+            "dietary_preferences": [],
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }
+    
+    def _index_builtin_recipes(self):
+        """Index the basic recipes and fast food clones shipped with the service"""
+        recipes = self._load_basic_recipes() + [self._fastfood_recipe(item) for item in self.fastfood_database]
+        entries = []
+        for recipe in recipes:
+            recipe_data = recipe.dict()
+            recipe_data.pop("missing_ingredients", None)
+            entries.append((recipe.id, recipe.ingredients_used, recipe_data))
+        self.recipe_matcher.add_recipes(entries)
+    
+    def _load_basic_recipes(self) -> List[RecipeMatch]:
+        """Basic recipes built from common pantry staples"""
+        return [
+            RecipeMatch(
                 id="basic_pancakes",
                 name="Basic Pancakes",
                 cuisine_type=CuisineType.AMERICAN,
@@ -811,10 +998,8 @@ class EnhancedSmartCookingService:
                     "Flip and cook until golden"
                 ],
                 source="supercook_clone"
-            ))
-        
-        if {"chicken", "rice", "onion"}.issubset(ingredients):
-            recipes.append(RecipeMatch(
+            ),
+            RecipeMatch(
                 id="chicken_rice_bowl",
                 name="Simple Chicken Rice Bowl",
                 cuisine_type=CuisineType.ASIAN,
@@ -830,10 +1015,8 @@ class EnhancedSmartCookingService:
                     "Serve chicken over rice with vegetables"
                 ], 
                 source="supercook_clone"
-            ))
-        
-        if {"pasta", "tomato", "cheese"}.issubset(ingredients):
-            recipes.append(RecipeMatch(
+            ),
+            RecipeMatch(
                 id="simple_pasta",
                 name="Basic Pasta with Tomato and Cheese",
                 cuisine_type=CuisineType.ITALIAN,
@@ -850,37 +1033,25 @@ class EnhancedSmartCookingService:
                     "Top with cheese and serve"
                 ],
                 source="supercook_clone"
-            ))
-        
-        return recipes
+            )
+        ]
     
-    def _match_fastfood_recipes(self, ingredients: set, max_missing: int) -> List[RecipeMatch]:
-        """Match ingredients to fast food clone recipes"""
-        matches = []
-        
-        for item in self.fastfood_database:
-            item_ingredients = set([ing.lower() for ing in item.ingredients])
-            missing = item_ingredients - ingredients
-            
-            if len(missing) <= max_missing:
-                recipe = RecipeMatch(
-                    id=item.id,
-                    name=item.item_name,
-                    cuisine_type=CuisineType.FAST_FOOD,
-                    complexity=RecipeComplexity.INTERMEDIATE,
-                    prep_time=15,
-                    cook_time=20,
-                    servings=1,
-                    ingredients_used=item.ingredients,
-                    missing_ingredients=list(missing),
-                    instructions=item.instructions.split(". "),
-                    source="hackthemenu",
-                    fast_food_restaurant=item.restaurant,
-                    is_secret_menu=item.is_secret_menu
-                )
-                matches.append(recipe)
-        
-        return matches
+    def _fastfood_recipe(self, item: FastFoodItem) -> RecipeMatch:
+        """Convert a fast food clone into a matchable recipe"""
+        return RecipeMatch(
+            id=item.id,
+            name=item.item_name,
+            cuisine_type=CuisineType.FAST_FOOD,
+            complexity=RecipeComplexity.INTERMEDIATE,
+            prep_time=15,
+            cook_time=20,
+            servings=1,
+            ingredients_used=item.ingredients,
+            instructions=item.instructions.split(". "),
+            source="hackthemenu",
+            fast_food_restaurant=item.restaurant,
+            is_secret_menu=item.is_secret_menu
+        )
     
     async def _generate_ai_recipes(self, ingredients: List[str]) -> List[RecipeMatch]:
         """Use AI to generate creative recipes with available ingredients"""
@@ -891,9 +1062,11 @@ class EnhancedSmartCookingService:
             # Create a simple AI-style recipe based on ingredient combinations
             # This is a mock implementation - replace with actual AI service if available
             recipes = []
+            available = set(self.canonicalizer.canonical_names(ingredients))
+            uses = lambda *names: set(self.canonicalizer.canonical_names(names))
             
             # Generate recipe based on ingredient combinations
-            if "chicken" in ingredients and "rice" in ingredients:
+            if uses("chicken", "rice") <= available:
                 recipes.append(RecipeMatch(
                     id=f"ai_chicken_rice_{uuid.uuid4().hex[:8]}",
                     name="AI-Generated Chicken Rice Bowl",
@@ -902,7 +1075,7 @@ class EnhancedSmartCookingService:
                     prep_time=15,
                     cook_time=25,
                     servings=4,
-                    ingredients_used=[ing for ing in ingredients if ing in ["chicken", "rice", "onion", "garlic", "soy sauce", "oil"]],
+                    ingredients_used=sorted(available & uses("chicken", "rice", "onion", "garlic", "soy sauce", "oil")),
                     instructions=[
                         "Season chicken with salt and pepper, cut into bite-sized pieces",
                         "Heat oil in large pan, cook chicken until golden brown",
@@ -914,7 +1087,7 @@ class EnhancedSmartCookingService:
                     source="lambalia_ai"
                 ))
             
-            elif "eggs" in ingredients and "flour" in ingredients:
+            elif uses("eggs", "flour") <= available:
                 recipes.append(RecipeMatch(
                     id=f"ai_breakfast_{uuid.uuid4().hex[:8]}",
                     name="AI-Generated Breakfast Delight",
@@ -923,7 +1096,7 @@ class EnhancedSmartCookingService:
                     prep_time=10,
                     cook_time=15,
                     servings=2,
-                    ingredients_used=[ing for ing in ingredients if ing in ["eggs", "flour", "milk", "butter", "salt"]],
+                    ingredients_used=sorted(available & uses("eggs", "flour", "milk", "butter", "salt")),
                     instructions=[
                         "Mix flour with a pinch of salt in a bowl",
                         "Whisk eggs and gradually add to flour mixture",
@@ -935,7 +1108,7 @@ class EnhancedSmartCookingService:
                     source="lambalia_ai"
                 ))
             
-            elif "pasta" in ingredients and "tomato" in ingredients:
+            elif uses("pasta", "tomato") <= available:
                 recipes.append(RecipeMatch(
                     id=f"ai_pasta_{uuid.uuid4().hex[:8]}",
                     name="AI-Generated Fresh Pasta Dish",
@@ -944,7 +1117,7 @@ class EnhancedSmartCookingService:
                     prep_time=10,
                     cook_time=20,
                     servings=3,
-                    ingredients_used=[ing for ing in ingredients if ing in ["pasta", "tomato", "garlic", "cheese", "olive oil", "basil"]],
+                    ingredients_used=sorted(available & uses("pasta", "tomato", "garlic", "cheese", "olive oil", "basil")),
                     instructions=[
                         "Cook pasta according to package directions until al dente",
                         "Heat olive oil in large skillet over medium heat",
@@ -989,19 +1162,21 @@ class EnhancedSmartCookingService:
     async def get_ingredient_suggestions(self, query: str) -> List[Dict[str, Any]]:
         """Get ingredient suggestions for autocomplete - SuperCook style"""
         try:
-            query = query.lower().strip()
             suggestions = []
+            seen = set()
             
-            for ingredient in self.basic_ingredients:
-                # Match name or common names
-                if (query in ingredient.name.lower() or 
-                    any(query in name.lower() for name in ingredient.common_names)):
-                    suggestions.append({
-                        "name": ingredient.name,
-                        "category": ingredient.category,
-                        "common_names": ingredient.common_names,
-                        "storage_tips": ingredient.storage_tips
-                    })
+            for match in self.autocomplete.suggest(query, limit=15):
+                # Common names resolve to their basic ingredient entry
+                suggestion = match["payload"] if match["payload"] and "name" in match["payload"] else {
+                    "name": match["term"],
+                    "category": None,
+                    "common_names": [],
+                    "storage_tips": None
+                }
+                if suggestion["name"] in seen:
+                    continue
+                seen.add(suggestion["name"])
+                suggestions.append(suggestion)
             
             return suggestions[:10]  # Limit to 10 suggestions
             
@@ -1029,7 +1204,8 @@ class EnhancedSmartCookingService:
                     "ingredients": pantry.get("ingredients", []),
                     "excluded_ingredients": pantry.get("excluded_ingredients", []),
                     "ingredient_count": len(pantry.get("ingredients", [])),
-                    "last_updated": pantry.get("updated_at")
+                    "last_updated": pantry.get("updated_at"),
+                    "pantry_hash": pantry.get("pantry_hash") or await self._store_pantry_hash(user_id, pantry)
                 }
             }
             
@@ -1040,20 +1216,33 @@ class EnhancedSmartCookingService:
     async def remove_ingredients_from_pantry(self, user_id: str, ingredients: List[str]) -> Dict[str, Any]:
         """Remove ingredients from user's pantry"""
         try:
-            ingredients_to_remove = set([ing.lower().strip() for ing in ingredients])
+            # Canonical names, plus the raw spellings older pantries may still hold
+            canonical_to_remove = self.canonicalizer.canonical_names(ingredients)
+            ingredients_to_remove = set(canonical_to_remove)
+            ingredients_to_remove.update(ing.lower().strip() for ing in ingredients)
             
-            result = await self.user_pantries_collection.update_one(
+            # Atomic removal; the pre-image tells what was removed and what remains
+            before = await self.user_pantries_collection.find_one_and_update(
                 {"user_id": user_id},
                 {
-                    "$pull": {"ingredients": {"$in": list(ingredients_to_remove)}},
-                    "$set": {"updated_at": datetime.utcnow()}
-                }
+                    "$pullAll": {"ingredients": list(ingredients_to_remove)},
+                    **self._pantry_changed()
+                },
+                projection={"_id": 0, "ingredients": 1, "excluded_ingredients": 1, "revision": 1},
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.modified_count > 0:
+            previous_ingredients = before.get("ingredients", []) if before else []
+            remaining = [ing for ing in previous_ingredients if ing not in ingredients_to_remove]
+            if before:
+                pantry_hash = await self._store_pantry_hash(user_id, {
+                    **before, "ingredients": remaining, "revision": (before.get("revision") or 0) + 1
+                })
+            if len(remaining) < len(previous_ingredients):
                 return {
                     "success": True,
-                    "message": f"Removed {len(ingredients_to_remove)} ingredients"
+                    "message": f"Removed {len(canonical_to_remove)} ingredients",
+                    "pantry_hash": pantry_hash
                 }
             else:
                 return {
@@ -1073,4 +1262,8 @@ async def get_enhanced_cooking_service(db) -> EnhancedSmartCookingService:
     global enhanced_cooking_service
     if enhanced_cooking_service is None:
         enhanced_cooking_service = EnhancedSmartCookingService(db)
+        try:
+            await enhanced_cooking_service.load_recipe_corpus()
+        except Exception as e:
+            enhanced_cooking_service.logger.error(f"Failed to index stored recipes: {str(e)}")
     return enhanced_cooking_service
\ No newline at end of file
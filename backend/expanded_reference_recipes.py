@@ -1,7 +1,15 @@
 # Expanded Reference Recipes Database for Lambalia
+import hashlib
+import json
+import logging
 import uuid
 from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
 from models_extension import ReferenceRecipe
+from reference_recipe_catalog import ReferenceRecipeCatalog
+
+logger = logging.getLogger(__name__)
 
 # Native recipes organized by country
 NATIVE_RECIPES_BY_COUNTRY = {
@@ -282,22 +290,43 @@ RECIPE_METADATA = {
     }
 }
 
-def generate_comprehensive_reference_recipes():
-    """Generate comprehensive reference recipes from all countries"""
-    recipes = []
-    
-    # Country codes mapping
-    country_codes = {
-        "Italy": "italy", "Japan": "japan", "Mexico": "mexico", "India": "india",
-        "France": "france", "China": "china", "Thailand": "thailand", "Spain": "spain",
-        "Greece": "greece", "Lebanon": "lebanon", "Morocco": "morocco", "Brazil": "brazil",
-        "Turkey": "turkey", "Russia": "russia", "South Korea": "south_korea", 
-        "Vietnam": "vietnam", "Ethiopia": "ethiopia", "Germany": "germany",
-        "USA": "usa", "UK": "uk", "Australia": "australia", "Canada": "canada"
-    }
+# Country codes mapping
+COUNTRY_CODES = {
+    "Italy": "italy", "Japan": "japan", "Mexico": "mexico", "India": "india",
+    "France": "france", "China": "china", "Thailand": "thailand", "Spain": "spain",
+    "Greece": "greece", "Lebanon": "lebanon", "Morocco": "morocco", "Brazil": "brazil",
+    "Turkey": "turkey", "Russia": "russia", "South Korea": "south_korea", 
+    "Vietnam": "vietnam", "Ethiopia": "ethiopia", "Germany": "germany",
+    "USA": "usa", "UK": "uk", "Australia": "australia", "Canada": "canada"
+}
+
+FEATURED_RECIPE_NAMES = [
+    "Margherita Pizza", "Sushi", "Tacos", "Butter Chicken", "Boeuf Bourguignon",
+    "Pad Thai", "Paella", "Moussaka", "Hummus", "Peking Duck"
+]
+
+# Recipe IDs are derived from country and name, so they survive restarts and match across workers
+RECIPE_ID_NAMESPACE = uuid.UUID("6f1c2b0e-9a4d-5e3b-8c71-2d4f5a6b7c80")
+CATALOG_ARTIFACT_PATH = Path(__file__).parent / "reference_recipes_catalog.json"
+
+def reference_recipe_id(country_code: str, recipe_name: str) -> str:
+    return str(uuid.uuid5(RECIPE_ID_NAMESPACE, f"{country_code}/{recipe_name}"))
+
+def catalog_source_hash() -> str:
+    """Fingerprint of the source tables; a stale artifact is ignored"""
+    source = json.dumps(
+        [NATIVE_RECIPES_BY_COUNTRY, RECIPE_METADATA, COUNTRY_CODES, FEATURED_RECIPE_NAMES],
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+def compile_reference_recipe_records(created_at: datetime = None) -> List[Dict[str, Any]]:
+    """Compile the source tables into plain reference recipe records with stable IDs"""
+    created_at = (created_at or datetime.utcnow()).isoformat()
+    records = []
     
     for country, recipe_names in NATIVE_RECIPES_BY_COUNTRY.items():
-        country_code = country_codes.get(country, country.lower().replace(" ", "_"))
+        country_code = COUNTRY_CODES.get(country, country.lower().replace(" ", "_"))
         
         for recipe_name in recipe_names:
             if recipe_name == "Other":
@@ -315,71 +344,92 @@ def generate_comprehensive_reference_recipes():
                 "significance": f"Traditional {country} dish"
             })
             
-            recipe = ReferenceRecipe(
-                id=str(uuid.uuid4()),
-                name_english=recipe_name,
-                name_local=metadata["local_name"],
-                local_language=metadata["local_language"],
-                country_id=country_code,
-                description=f"Traditional {recipe_name} from {country}",
-                category=metadata["category"],
-                difficulty_level=metadata["difficulty"],
-                estimated_time=metadata["time"],
-                serving_size=metadata["servings"],
-                key_ingredients=metadata["ingredients"],
-                cultural_significance=metadata["significance"],
-                is_featured=recipe_name in [
-                    "Margherita Pizza", "Sushi", "Tacos", "Butter Chicken", "Boeuf Bourguignon",
-                    "Pad Thai", "Paella", "Moussaka", "Hummus", "Peking Duck"
-                ],
-                popularity_score=95 if recipe_name in ["Sushi", "Tacos", "Pizza"] else 
-                               90 if recipe_name in ["Ramen", "Biryani", "Pad Thai"] else 
-                               85
-            )
-            recipes.append(recipe)
+            records.append({
+                "id": reference_recipe_id(country_code, recipe_name),
+                "name_english": recipe_name,
+                "name_local": metadata["local_name"],
+                "local_language": metadata["local_language"],
+                "country_id": country_code,
+                "region_id": None,
+                "description": f"Traditional {recipe_name} from {country}",
+                "category": metadata["category"],
+                "difficulty_level": metadata["difficulty"],
+                "estimated_time": metadata["time"],
+                "serving_size": metadata["servings"],
+                "key_ingredients": metadata["ingredients"],
+                "cultural_significance": metadata["significance"],
+                "image_url": None,
+                "is_featured": recipe_name in FEATURED_RECIPE_NAMES,
+                "popularity_score": 95 if recipe_name in ["Sushi", "Tacos", "Pizza"] else 
+                                   90 if recipe_name in ["Ramen", "Biryani", "Pad Thai"] else 
+                                   85,
+                "created_at": created_at
+            })
     
-    return recipes
+    return records
+
+def build_catalog_artifact(path: Path = CATALOG_ARTIFACT_PATH) -> Dict[str, Any]:
+    """Write the frozen catalog artifact (run build_reference_catalog.py after editing the tables above)"""
+    records = compile_reference_recipe_records()
+    artifact = {
+        "source_hash": catalog_source_hash(),
+        "built_at": datetime.utcnow().isoformat(),
+        "recipes": records
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(artifact, handle, ensure_ascii=False, indent=1)
+    return artifact
 
-# Generate all reference recipes
-COMPREHENSIVE_REFERENCE_RECIPES = generate_comprehensive_reference_recipes()
+def load_reference_recipe_records(path: Path = CATALOG_ARTIFACT_PATH) -> List[Dict[str, Any]]:
+    """Records from the built artifact, or compiled in process if it is missing or stale"""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            artifact = json.load(handle)
+        if artifact.get("source_hash") == catalog_source_hash():
+            return artifact["recipes"]
+        logger.warning("Reference recipe catalog artifact is stale; compiling in process")
+    except FileNotFoundError:
+        logger.warning("Reference recipe catalog artifact not found; compiling in process")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to read reference recipe catalog artifact: {str(e)}")
+    return compile_reference_recipe_records()
+
+# Frozen, indexed catalog of all reference recipes
+_catalog_records = load_reference_recipe_records()
+REFERENCE_CATALOG = ReferenceRecipeCatalog(
+    [ReferenceRecipe(**record) for record in _catalog_records], _catalog_records
+)
+COMPREHENSIVE_REFERENCE_RECIPES = REFERENCE_CATALOG.recipes
 
 def get_recipes_by_country(country_id: str):
     """Get reference recipes for a specific country"""
-    return [recipe for recipe in COMPREHENSIVE_REFERENCE_RECIPES if recipe.country_id == country_id]
+    return REFERENCE_CATALOG.for_country(country_id)
 
 def get_featured_recipes():
     """Get featured reference recipes"""
-    return [recipe for recipe in COMPREHENSIVE_REFERENCE_RECIPES if recipe.is_featured]
+    return REFERENCE_CATALOG.get_featured()
 
 def get_recipe_by_name(recipe_name: str):
     """Get a specific reference recipe by name"""
-    return next((recipe for recipe in COMPREHENSIVE_REFERENCE_RECIPES if recipe.name_english == recipe_name), None)
+    return REFERENCE_CATALOG.get_by_name(recipe_name)
+
+def get_recipe_by_id(recipe_id: str):
+    """Get a specific reference recipe by its stable ID"""
+    return REFERENCE_CATALOG.get(recipe_id)
 
 def get_all_countries_with_recipes():
     """Get list of all countries that have recipes"""
-    countries = set()
-    for recipe in COMPREHENSIVE_REFERENCE_RECIPES:
-        countries.add(recipe.country_id)
-    return sorted(list(countries))
+    return list(REFERENCE_CATALOG.countries)
 
 def get_recipes_by_category(category: str):
     """Get recipes by category"""
-    return [recipe for recipe in COMPREHENSIVE_REFERENCE_RECIPES if recipe.category == category]
+    return REFERENCE_CATALOG.for_category(category)
 
 def search_recipes(query: str):
-    """Search recipes by name or ingredients"""
-    query = query.lower()
-    results = []
-    
-    for recipe in COMPREHENSIVE_REFERENCE_RECIPES:
-        if (query in recipe.name_english.lower() or 
-            query in recipe.name_local.lower() or
-            any(query in ingredient.lower() for ingredient in recipe.key_ingredients)):
-            results.append(recipe)
-    
-    return results
+    """Search recipes by name or ingredients (words are matched from their start)"""
+    return REFERENCE_CATALOG.search(query)
 
 # Export the native recipes data for frontend use
 def get_native_recipes_json():
     """Get the native recipes by country as JSON structure"""
-    return NATIVE_RECIPES_BY_COUNTRY
\ No newline at end of file
+    return NATIVE_RECIPES_BY_COUNTRY
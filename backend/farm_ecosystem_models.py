@@ -264,6 +264,14 @@ class FarmProduct(BaseModel):
     category: ProductCategory
     variety: Optional[str] = None  # "Heirloom", "Cherry", etc.
     description: str
+    canonical_ingredients: List[str] = []  # Canonical ingredient names for recipe sourcing
+    canonical_version: int = 0             # CANONICAL_VERSION the names were computed with
+    
+    # Farm (copied from the farm profile so proximity queries need no join)
+    farm_name: str = ""
+    farm_location: Optional[Dict[str, Any]] = None  # GeoJSON point, 2dsphere indexed
+    farm_certifications: List[CertificationType] = []
+    farm_is_active: bool = True
     
     # Pricing & Units
     unit_type: str = "lb"  # "lb", "bunch", "dozen", "each", "pint", "gallon"
@@ -4,6 +4,7 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
 import logging
 
 from farm_ecosystem_models import (
@@ -11,12 +12,18 @@ from farm_ecosystem_models import (
     FarmVendorApplication, ProductCategory, CertificationType, FarmVendorType,
     ProductAvailability
 )
+from ingredient_canonicalizer import CANONICAL_VERSION, get_ingredient_canonicalizer
+from unified_search_service import get_unified_search
+
+# Head nouns too generic to stand for an ingredient on their own ("basil leaves" is not "leaf")
+GENERIC_HEAD_NOUNS = {"leaf", "seed", "powder", "paste", "sauce", "juice", "oil", "stock", "flake", "extract"}
 
 class LocalFarmMatchingService:
     """Service for matching local farms with cooks and diners based on location and needs"""
     
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
+        self.canonicalizer = get_ingredient_canonicalizer()
     
     def calculate_distance(self, coord1: List[float], coord2: List[float]) -> float:
         """Calculate distance between two coordinates using Haversine formula"""
@@ -32,6 +39,29 @@ class LocalFarmMatchingService:
         
         return r * c
     
+    def ingredient_terms(self, text: str) -> List[str]:
+        """
+        Canonical names an ingredient or product name can be matched on, most specific
+        first: the name without trailing preparation notes, known ingredients it
+        mentions, then each shorter ending down to the head noun ("Roma tomatoes,
+        diced" -> roma tomato, tomato). Listings store all of them and recipe
+        ingredients look all of them up, so either side may be the more specific.
+        """
+        words = self.canonicalizer.key(text.split(",")[0]).split()
+        if not words:
+            return []
+        names = [self.canonicalizer.canonical_name(" ".join(words))]
+        for name in self.canonicalizer.canonical_terms(text):
+            if name not in names:
+                names.append(name)
+        for start in range(1, len(words)):
+            if start == len(words) - 1 and words[-1] in GENERIC_HEAD_NOUNS:
+                break
+            name = self.canonicalizer.canonical_name(" ".join(words[start:]))
+            if name and name not in names:
+                names.append(name)
+        return names
+    
     def is_within_us_zip_code_area(self, zip1: str, zip2: str) -> bool:
         """Check if two US ZIP codes are in the same general area"""
         if len(zip1) >= 3 and len(zip2) >= 3:
@@ -40,8 +70,16 @@ class LocalFarmMatchingService:
     
     async def find_local_farms(self, user_location: Dict[str, Any], postal_code: str, 
                               country: str = "US", max_distance_km: float = 50.0,
-                              filters: Optional[Dict] = None) -> List[Dict]:
-        """Find local farms based on location and filters"""
+                              filters: Optional[Dict] = None, skip: int = 0, limit: int = 50) -> List[Dict]:
+        """
+        Find local farms based on location and filters, nearest first.
+        
+        One $geoNear over the farm_profiles location index: the filters run
+        inside it, distances are computed by the server and pages come from
+        skip/limit, so every farm within max_distance_km is reachable. The
+        location alone decides locality; postal_code and country are kept for
+        callers that pass them.
+        """
         
         query = {
             "is_active": True,
@@ -59,34 +97,61 @@ class LocalFarmMatchingService:
             if filters.get('has_farm_dining'):
                 query['offers_farm_dining'] = True
         
-        farms_cursor = self.db.farm_profiles.find(query, {"_id": 0}).limit(50)
-        farms = await farms_cursor.to_list(length=50)
+        farms = await self.db.farm_profiles.aggregate(
+            self._geo_near_farms(user_location, max_distance_km, query) + [
+                {"$skip": max(0, skip)},
+                {"$limit": limit},
+                {"$project": {"_id": 0}}
+            ]
+        ).to_list(length=limit)
         
-        # Filter by location and add distance
-        local_farms = []
         for farm in farms:
-            if country == "US" and farm["country"] == "US":
-                # US ZIP code area matching for farms
-                if self.is_within_us_zip_code_area(postal_code, farm["postal_code"]):
-                    distance = self.calculate_distance(
-                        user_location["coordinates"], farm["location"]["coordinates"]
-                    )
-                    if distance <= max_distance_km:
-                        farm["distance_km"] = round(distance, 1)
-                        local_farms.append(farm)
-            else:
-                # International distance-based matching
-                distance = self.calculate_distance(
-                    user_location["coordinates"], farm["location"]["coordinates"]
-                )
-                if distance <= max_distance_km:
-                    farm["distance_km"] = round(distance, 1)
-                    local_farms.append(farm)
-        
-        # Sort by distance
-        local_farms.sort(key=lambda x: x["distance_km"])
-        
-        return local_farms
+            farm["distance_km"] = round(farm.pop("distance_m") / 1000, 1)
+        
+        return farms
+    
+    async def find_dining_venues(self, user_location: Dict[str, Any], max_distance_km: float = 50.0,
+                                 venue_filters: Optional[Dict] = None, skip: int = 0, limit: int = 50) -> List[Dict]:
+        """
+        Bookable dining venues at active farms within max_distance_km, nearest farm
+        first: the same $geoNear over farm locations, limited to farms flagged with
+        offers_farm_dining, joined to each farm's venues through the farm_id index
+        and paged after the join.
+        """
+        
+        venue_query = {"is_active": True, "is_accepting_bookings": True}
+        if venue_filters:
+            if venue_filters.get('venue_type'):
+                venue_query['venue_type'] = venue_filters['venue_type']
+            if venue_filters.get('max_capacity'):
+                venue_query['max_capacity'] = {"$gte": venue_filters['max_capacity']}
+        
+        venues = await self.db.farm_profiles.aggregate(
+            self._geo_near_farms(user_location, max_distance_km, {"is_active": True, "offers_farm_dining": True}) + [
+                {"$lookup": {
+                    "from": "farm_dining_venues",
+                    "let": {"farm_id": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$farm_id", "$$farm_id"]}, **venue_query}},
+                        {"$project": {"_id": 0}}
+                    ],
+                    "as": "venue"
+                }},
+                {"$unwind": "$venue"},
+                {"$skip": max(0, skip)},
+                {"$limit": limit},
+                {"$replaceRoot": {"newRoot": {"$mergeObjects": ["$venue", {
+                    "farm_name": "$farm_name",
+                    "distance_m": "$distance_m",
+                    "farm_certifications": {"$ifNull": ["$certifications", []]}
+                }]}}}
+            ]
+        ).to_list(length=limit)
+        
+        for venue in venues:
+            venue["distance_km"] = round(venue.pop("distance_m") / 1000, 1)
+        
+        return venues
     
     async def find_seasonal_products(self, user_location: Dict[str, Any], postal_code: str,
                                    season: str = None, product_categories: List[str] = None,
@@ -117,22 +182,10 @@ class LocalFarmMatchingService:
         if product_categories:
             query["category"] = {"$in": product_categories}
         
-        products_cursor = self.db.farm_products.find(query, {"_id": 0}).limit(100)
-        products = await products_cursor.to_list(length=100)
+        query["farm_is_active"] = True
         
-        # Get farm info and filter by location
-        local_products = []
-        for product in products:
-            farm = await self.db.farm_profiles.find_one({"id": product["farm_id"]}, {"_id": 0})
-            if farm and farm.get("is_active"):
-                distance = self.calculate_distance(
-                    user_location["coordinates"], farm["location"]["coordinates"]
-                )
-                if distance <= max_distance_km:
-                    product["farm_name"] = farm["farm_name"]
-                    product["farm_certifications"] = farm.get("certifications", [])
-                    product["distance_km"] = round(distance, 1)
-                    local_products.append(product)
+        # Nearest products of active farms, by the farm location stored on each listing
+        local_products = await self.nearby_products(user_location, max_distance_km, query, limit=100)
         
         # Sort by distance and seasonality
         local_products.sort(key=lambda x: (x["distance_km"], x.get("seasonal_months") and datetime.utcnow().strftime('%B') not in x["seasonal_months"]))
@@ -142,42 +195,94 @@ class LocalFarmMatchingService:
     async def match_ingredients_to_recipes(self, recipe_ingredients: List[str], 
                                          user_location: Dict[str, Any], postal_code: str,
                                          max_distance_km: float = 30.0) -> Dict[str, List[Dict]]:
-        """Match recipe ingredients to local farm products"""
+        """
+        Match recipe ingredients to local farm products.
+        
+        Every ingredient is resolved at once: one $geoNear over the farm locations
+        stored on the listings, filtered by $in on the indexed canonical
+        ingredient names, returns up to 10 nearest products per ingredient.
+        Each ingredient takes the products of its most specific term that has
+        any ("roma tomatoes" falls back to any tomato only without roma ones).
+        """
+        
+        terms_by_ingredient = {ingredient: self.ingredient_terms(ingredient) for ingredient in recipe_ingredients}
+        wanted = sorted({term for terms in terms_by_ingredient.values() for term in terms})
+        if not wanted:
+            return {}
+        
+        groups = await self.db.farm_products.aggregate([
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": user_location["coordinates"]},
+                "key": "farm_location",
+                "distanceField": "distance_m",
+                "maxDistance": max_distance_km * 1000,
+                "query": {
+                    "canonical_ingredients": {"$in": wanted},
+                    "is_active": True,
+                    "is_available": True
+                },
+                "spherical": True
+            }},
+            {"$project": {"_id": 0}},
+            # Nearest first within each ingredient, as $geoNear returned them
+            {"$addFields": {"matched_ingredient": "$canonical_ingredients"}},
+            {"$unwind": "$matched_ingredient"},
+            {"$match": {"matched_ingredient": {"$in": wanted}}},
+            {"$group": {"_id": "$matched_ingredient", "products": {"$push": "$$ROOT"}}},
+            {"$project": {"products": {"$slice": ["$products", 10]}}}
+        ]).to_list(length=None)
+        
+        products_by_term = {}
+        for group in groups:
+            products = []
+            for product in group["products"]:
+                product.pop("matched_ingredient", None)
+                product["distance_km"] = round(product.pop("distance_m") / 1000, 1)
+                products.append(product)
+            products_by_term[group["_id"]] = products
         
         ingredient_matches = {}
+        for ingredient, terms in terms_by_ingredient.items():
+            term = next((term for term in terms if term in products_by_term), None)
+            if term is not None:
+                ingredient_matches[ingredient] = [dict(product) for product in products_by_term[term]]
         
-        for ingredient in recipe_ingredients:
-            # Search for products that match the ingredient
-            query = {
-                "$or": [
-                    {"product_name": {"$regex": ingredient, "$options": "i"}},
-                    {"variety": {"$regex": ingredient, "$options": "i"}},
-                    {"description": {"$regex": ingredient, "$options": "i"}}
-                ],
-                "is_active": True,
-                "is_available": True
-            }
-            
-            products_cursor = self.db.farm_products.find(query, {"_id": 0}).limit(10)
-            products = await products_cursor.to_list(length=10)
-            
-            local_matches = []
-            for product in products:
-                farm = await self.db.farm_profiles.find_one({"id": product["farm_id"]}, {"_id": 0})
-                if farm:
-                    distance = self.calculate_distance(
-                        user_location["coordinates"], farm["location"]["coordinates"]
-                    )
-                    if distance <= max_distance_km:
-                        product["farm_name"] = farm["farm_name"]
-                        product["distance_km"] = round(distance, 1)
-                        local_matches.append(product)
-            
-            if local_matches:
-                local_matches.sort(key=lambda x: x["distance_km"])
-                ingredient_matches[ingredient] = local_matches
-        
-        return ingredient_matches
+        # Keep the recipe's ingredient order
+        return {
+            ingredient: ingredient_matches[ingredient]
+            for ingredient in recipe_ingredients if ingredient in ingredient_matches
+        }
+    
+    async def nearby_products(self, user_location: Dict[str, Any], max_distance_km: float,
+                              query: Dict[str, Any], limit: int = 100) -> List[Dict]:
+        """Products matching query within max_distance_km, nearest first, with distance_km"""
+        products = await self.db.farm_products.aggregate([
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": user_location["coordinates"]},
+                "key": "farm_location",
+                "distanceField": "distance_m",
+                "maxDistance": max_distance_km * 1000,
+                "query": query,
+                "spherical": True
+            }},
+            {"$limit": limit},
+            {"$project": {"_id": 0}}
+        ]).to_list(length=limit)
+        for product in products:
+            product["distance_km"] = round(product.pop("distance_m") / 1000, 1)
+        return products
+
+    def _geo_near_farms(self, user_location: Dict[str, Any], max_distance_km: float,
+                        query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """$geoNear stage over farm_profiles.location, with distance_m in meters"""
+        return [{"$geoNear": {
+            "near": {"type": "Point", "coordinates": user_location["coordinates"]},
+            "key": "location",
+            "distanceField": "distance_m",
+            "maxDistance": max_distance_km * 1000,
+            "query": query,
+            "spherical": True
+        }}]
 
 class FarmEcosystemService:
     """Main service for managing farm ecosystem operations"""
@@ -186,6 +291,99 @@ class FarmEcosystemService:
         self.db = db
         self.matching_service = LocalFarmMatchingService(db)
     
+    def canonical_product_ingredients(self, product_name: str, variety: Optional[str] = None) -> List[str]:
+        """
+        Canonical ingredient names a product listing supplies: the matching terms of
+        its full name and of its name alone ("Heirloom Tomatoes" -> heirloom tomato,
+        tomato), so a recipe asking for "tomatoes" finds it
+        """
+        names = []
+        for text in (f"{variety or ''} {product_name}", product_name):
+            for name in self.matching_service.ingredient_terms(text):
+                if name not in names:
+                    names.append(name)
+        return names
+    
+    async def backfill_canonical_ingredients(self, batch_size: int = 500) -> int:
+        """Store canonical ingredient names on listings created before them or before the current vocabulary"""
+        updated = 0
+        operations = []
+        cursor = self.db.farm_products.find(
+            {"canonical_version": {"$ne": CANONICAL_VERSION}},
+            {"_id": 0, "id": 1, "product_name": 1, "variety": 1}
+        )
+        async for product in cursor:
+            operations.append(UpdateOne(
+                {"id": product["id"]},
+                {"$set": {
+                    "canonical_ingredients": self.canonical_product_ingredients(
+                        product.get("product_name", ""), product.get("variety")
+                    ),
+                    "canonical_version": CANONICAL_VERSION
+                }}
+            ))
+            if len(operations) >= batch_size:
+                await self.db.farm_products.bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await self.db.farm_products.bulk_write(operations, ordered=False)
+            updated += len(operations)
+        return updated
+    
+    def product_farm_fields(self, farm: Dict[str, Any]) -> Dict[str, Any]:
+        """Farm fields copied onto each of its product listings"""
+        location = farm.get("location") or {}
+        return {
+            "farm_name": farm.get("farm_name", ""),
+            "farm_location": location if location.get("coordinates") else None,
+            "farm_certifications": farm.get("certifications", []),
+            "farm_is_active": bool(farm.get("is_active", True))
+        }
+    
+    async def sync_farm_to_products(self, farm_id: str) -> int:
+        """Copy a farm's current name, location, certifications and status onto its listings"""
+        farm = await self.db.farm_profiles.find_one({"id": farm_id}, {"_id": 0})
+        if not farm:
+            return 0
+        result = await self.db.farm_products.update_many({"farm_id": farm_id}, {"$set": self.product_farm_fields(farm)})
+        # Listings of a renamed, moved or deactivated farm change in search too
+        search = get_unified_search()
+        async for product in self.db.farm_products.find({"farm_id": farm_id}, {"_id": 0}):
+            search.publish_farm_product(product, farm)
+        return result.modified_count
+    
+    async def backfill_farm_dining_flags(self) -> int:
+        """
+        Make offers_farm_dining match the active venues: mark farms created before the
+        flag was kept, and clear it on farms whose venues are all inactive
+        """
+        farm_ids = await self.db.farm_dining_venues.distinct("farm_id", {"is_active": True})
+        flagged = await self.db.farm_profiles.update_many(
+            {"id": {"$in": farm_ids}, "offers_farm_dining": {"$ne": True}},
+            {"$set": {"offers_farm_dining": True}}
+        )
+        cleared = await self.db.farm_profiles.update_many(
+            {"id": {"$nin": farm_ids}, "offers_farm_dining": True},
+            {"$set": {"offers_farm_dining": False}}
+        )
+        return flagged.modified_count + cleared.modified_count
+    
+    async def refresh_farm_dining_flag(self, farm_id: str) -> bool:
+        """Set offers_farm_dining from whether the farm still has an active venue"""
+        venue = await self.db.farm_dining_venues.find_one({"farm_id": farm_id, "is_active": True}, {"_id": 0, "id": 1})
+        offers_dining = venue is not None
+        await self.db.farm_profiles.update_one({"id": farm_id}, {"$set": {"offers_farm_dining": offers_dining}})
+        return offers_dining
+    
+    async def backfill_product_farm_locations(self) -> int:
+        """Copy farm fields onto listings created before they were stored there"""
+        farm_ids = await self.db.farm_products.distinct("farm_id", {"farm_location": {"$exists": False}})
+        updated = 0
+        for farm_id in farm_ids:
+            updated += await self.sync_farm_to_products(farm_id)
+        return updated
+    
     async def create_farm_vendor_application(self, application_data: Dict[str, Any], user_id: str) -> FarmVendorApplication:
         """Create a new farm vendor application"""
         
@@ -263,8 +461,13 @@ class FarmEcosystemService:
             vendor_id=vendor_id,
             **product_data
         )
+        product.canonical_ingredients = self.canonical_product_ingredients(product.product_name, product.variety)
+        product.canonical_version = CANONICAL_VERSION
+        for field, value in self.product_farm_fields(farm).items():
+            setattr(product, field, value)
         
         await self.db.farm_products.insert_one(product.dict())
+        get_unified_search().publish_farm_product(product.dict(), farm)
         
         # Update farm's product catalog
         await self.db.farm_profiles.update_one(
@@ -303,6 +506,22 @@ class FarmEcosystemService:
         )
         
         await self.db.farm_dining_venues.insert_one(venue.dict())
+        # Lets find_local_farms filter on dining inside its $geoNear query
+        await self.refresh_farm_dining_flag(farm["id"])
+        return venue
+    
+    async def set_farm_dining_venue_active(self, venue_id: str, vendor_id: str, is_active: bool) -> Dict[str, Any]:
+        """Open or close one of the vendor's dining venues, keeping the farm's dining flag in step"""
+        venue = await self.db.farm_dining_venues.find_one_and_update(
+            {"id": venue_id, "vendor_id": vendor_id},
+            {"$set": {"is_active": is_active}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not venue:
+            raise ValueError("Dining venue not found")
+        
+        await self.refresh_farm_dining_flag(venue["farm_id"])
         return venue
     
     async def order_farm_products(self, order_data: Dict[str, Any], customer_id: str) -> FarmProductOrder:
@@ -338,12 +557,16 @@ class FarmEcosystemService:
         
         await self.db.farm_product_orders.insert_one(order.dict())
         
-        # Update product quantities (if tracked)
+        # Update product quantities (if tracked); sold-out listings drop out of search
         for item in order_data["items"]:
-            await self.db.farm_products.update_one(
+            product = await self.db.farm_products.find_one_and_update(
                 {"id": item["product_id"], "quantity_available": {"$gte": item["quantity"]}},
-                {"$inc": {"quantity_available": -item["quantity"], "total_orders": 1}}
+                {"$inc": {"quantity_available": -item["quantity"], "total_orders": 1}},
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
             )
+            if product:
+                get_unified_search().publish_farm_product(product, farm)
         
         return order
     
@@ -389,27 +612,25 @@ class FarmEcosystemService:
     
     async def get_local_farms(self, user_location: Dict[str, Any], postal_code: str, 
                             country: str = "US", max_distance_km: float = 50.0,
-                            filters: Optional[Dict] = None) -> List[Dict]:
+                            filters: Optional[Dict] = None, skip: int = 0, limit: int = 50) -> List[Dict]:
         """Get local farms with enhanced information"""
         
         farms = await self.matching_service.find_local_farms(
-            user_location, postal_code, country, max_distance_km, filters
+            user_location, postal_code, country, max_distance_km, filters, skip, limit
+        )
+        
+        # Product and dining venue counts for the whole page, one grouped query each
+        farm_ids = [farm["id"] for farm in farms]
+        product_counts, venue_counts = await asyncio.gather(
+            self._count_by_farm(self.db.farm_products, farm_ids),
+            self._count_by_farm(self.db.farm_dining_venues, farm_ids)
         )
         
         # Enrich with additional information
         enriched_farms = []
         for farm in farms:
-            # Get product count
-            product_count = await self.db.farm_products.count_documents({
-                "farm_id": farm["id"],
-                "is_active": True
-            })
-            
-            # Get dining venues count
-            dining_venues = await self.db.farm_dining_venues.count_documents({
-                "farm_id": farm["id"],
-                "is_active": True
-            })
+            product_count = product_counts.get(farm["id"], 0)
+            dining_venues = venue_counts.get(farm["id"], 0)
             
             farm["product_count"] = product_count
             farm["dining_venues_count"] = dining_venues
@@ -434,16 +655,19 @@ class FarmEcosystemService:
             "winter": []
         }
         
-        for farm in farms:
-            products_cursor = self.db.farm_products.find({
-                "farm_id": farm["id"],
+        # Seasonal listings of every nearby farm in one query
+        farm_products = {}
+        if farms:
+            products = await self.db.farm_products.find({
+                "farm_id": {"$in": [farm["id"] for farm in farms]},
                 "is_active": True,
                 "availability_type": {"$in": ["seasonal", "limited_harvest"]}
-            }, {"_id": 0})
-            
-            products = await products_cursor.to_list(length=100)
-            
+            }, {"_id": 0}).to_list(length=100 * len(farms))
             for product in products:
+                farm_products.setdefault(product["farm_id"], []).append(product)
+        
+        for farm in farms:
+            for product in farm_products.get(farm["id"], [])[:100]:
                 for month in product.get("seasonal_months", []):
                     season = self._month_to_season(month)
                     seasonal_calendar[season].append({
@@ -459,6 +683,16 @@ class FarmEcosystemService:
         
         return seasonal_calendar
     
+    async def _count_by_farm(self, collection, farm_ids: List[str]) -> Dict[str, int]:
+        """Active documents per farm_id, for a page of farms"""
+        if not farm_ids:
+            return {}
+        counts = await collection.aggregate([
+            {"$match": {"farm_id": {"$in": farm_ids}, "is_active": True}},
+            {"$group": {"_id": "$farm_id", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        return {row["_id"]: row["count"] for row in counts}
+    
     def _month_to_season(self, month: str) -> str:
         """Convert month name to season"""
         season_map = {
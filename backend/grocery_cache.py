@@ -0,0 +1,235 @@
+"""
+Grocery Search Cache - bounded two-tier cache for Open Food Facts results
+In-process LRU with byte accounting in front of a shared MongoDB collection,
+serving stale entries while a single background refresh runs per key
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+
+class GrocerySearchCache:
+    """
+    Stale-while-revalidate cache for product search results.
+
+    - Memory tier: LRU bounded by the serialized size of its entries
+    - Shared tier: `grocery_search_cache` collection, visible to every worker
+    - Fresh entries are returned directly; stale entries are returned at once
+      while one background refresh per key updates both tiers
+    - Concurrent misses for the same key share a single upstream fetch
+    - Empty results and upstream failures are cached briefly (negative caching)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        fresh_ttl: timedelta = timedelta(minutes=30),
+        stale_ttl: timedelta = timedelta(hours=24),
+        negative_ttl: timedelta = timedelta(minutes=2)
+    ):
+        self.max_bytes = max_bytes
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+
+        self.collection = None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background_tasks = set()
+
+        self.stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "shared_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "upstream_errors": 0,
+            "evictions": 0
+        }
+
+    def attach_database(self, db):
+        """Enable the shared MongoDB tier"""
+        self.collection = db.grocery_search_cache
+
+    async def create_indexes(self):
+        if self.collection is None:
+            return
+        await self.collection.create_index("key", unique=True)
+        # MongoDB drops documents once they are past their stale window
+        await self.collection.create_index("stale_until", expireAfterSeconds=0)
+
+    async def get(self, key: str, fetcher: Fetcher) -> List[Dict[str, Any]]:
+        """Return cached products for key, fetching or refreshing through fetcher as needed"""
+        now = datetime.utcnow()
+
+        entry = self._get_memory(key, now)
+        if entry is None:
+            entry = await self._get_shared(key, now)
+            if entry is not None:
+                self.stats["shared_hits"] += 1
+                self._put_memory(key, entry)
+
+        if entry is not None:
+            if now < entry["fresh_until"]:
+                self.stats["negative_hits" if entry["negative"] else "fresh_hits"] += 1
+                return entry["products"]
+
+            # Stale: answer immediately and revalidate in the background
+            self.stats["stale_hits"] += 1
+            self._schedule_refresh(key, fetcher)
+            return entry["products"]
+
+        self.stats["misses"] += 1
+        return await self._fetch(key, fetcher)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self._inflight),
+            "shared_tier": self.collection is not None
+        }
+
+    # FETCHING
+
+    async def _fetch(self, key: str, fetcher: Fetcher) -> List[Dict[str, Any]]:
+        """Fetch upstream once per key, however many callers are waiting"""
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                products = await fetcher()
+            except Exception as e:
+                self.stats["upstream_errors"] += 1
+                logger.warning(f"Upstream grocery search failed for {key}: {str(e)}")
+                stale = self._entries.get(key)
+                if stale:
+                    # Keep serving the stale copy and back off before retrying upstream
+                    stale["fresh_until"] = datetime.utcnow() + self.negative_ttl
+                    products = stale["products"]
+                else:
+                    products = []
+                    await self._store(key, [])
+            else:
+                await self._store(key, products)
+            future.set_result(products)
+            return products
+        except BaseException:
+            if not future.done():
+                future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _schedule_refresh(self, key: str, fetcher: Fetcher):
+        if key in self._inflight:
+            return
+        self.stats["refreshes"] += 1
+        task = asyncio.create_task(self._fetch(key, fetcher))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    # MEMORY TIER
+
+    def _get_memory(self, key: str, now: datetime) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry["stale_until"]:
+            self._remove_memory(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key: str, entry: Dict[str, Any]):
+        if key in self._entries:
+            self._remove_memory(key)
+
+        entry["size"] = len(key) + len(json.dumps(entry["products"], default=str))
+        if entry["size"] > self.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self._bytes += entry["size"]
+        while self._bytes > self.max_bytes:
+            evicted_key = next(iter(self._entries))
+            self._remove_memory(evicted_key)
+            self.stats["evictions"] += 1
+
+    def _remove_memory(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry["size"]
+
+    # SHARED TIER
+
+    async def _get_shared(self, key: str, now: datetime) -> Optional[Dict[str, Any]]:
+        if self.collection is None:
+            return None
+        try:
+            document = await self.collection.find_one(
+                {"key": key, "stale_until": {"$gt": now}}, {"_id": 0}
+            )
+        except Exception as e:
+            logger.warning(f"Shared grocery cache read failed: {str(e)}")
+            return None
+        if not document:
+            return None
+        return {
+            "products": document["products"],
+            "negative": document.get("negative", False),
+            "fresh_until": document["fresh_until"],
+            "stale_until": document["stale_until"]
+        }
+
+    async def _store(self, key: str, products: List[Dict[str, Any]]):
+        now = datetime.utcnow()
+        negative = not products
+        fresh_until = now + (self.negative_ttl if negative else self.fresh_ttl)
+        # Negative entries are never served past their short TTL
+        stale_until = fresh_until if negative else now + self.stale_ttl
+        entry = {
+            "products": products,
+            "negative": negative,
+            "fresh_until": fresh_until,
+            "stale_until": stale_until
+        }
+        self._put_memory(key, entry)
+
+        if self.collection is None:
+            return
+        try:
+            await self.collection.update_one(
+                {"key": key},
+                {"$set": {
+                    "products": products,
+                    "negative": negative,
+                    "fresh_until": fresh_until,
+                    "stale_until": stale_until,
+                    "updated_at": now
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Shared grocery cache write failed: {str(e)}")
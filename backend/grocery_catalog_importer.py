@@ -0,0 +1,233 @@
+"""
+Grocery Catalog Importer - loads Open Food Facts dumps into the local grocery_products collection
+Streams JSONL or CSV/TSV exports (optionally gzipped) with constant memory, keeps only
+the fields GroceryAPIService._parse_product_data reads, and supports delta refreshes
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Fields requested from the live API and read by _parse_product_data
+PRODUCT_FIELDS = [
+    "code", "product_name", "brands", "ingredients_text", "nutrition_grades",
+    "categories", "image_url", "stores", "countries_tags"
+]
+
+# Records parsed between event loop yields, whether or not they are written
+YIELD_EVERY = 500
+
+
+class GroceryCatalogImporter:
+    """Import Open Food Facts products into MongoDB for local-first grocery search"""
+
+    def __init__(self, db, batch_size: int = 1000):
+        self.db = db
+        self.products = db.grocery_products
+        self.import_state = db.grocery_import_state
+        self.batch_size = batch_size
+
+    async def create_indexes(self):
+        await self.products.create_index("code", unique=True)
+        await self.products.create_index("last_modified_t")
+        await self.products.create_index(
+            [("product_name", "text"), ("brands", "text"), ("categories", "text"), ("ingredients_text", "text")],
+            weights={"product_name": 10, "brands": 4, "categories": 3, "ingredients_text": 1},
+            name="product_search_text"
+        )
+
+    async def import_file(
+        self,
+        path: str,
+        country: Optional[str] = None,
+        since: Optional[int] = None,
+        source: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a dump into grocery_products.
+
+        country: keep only products sold there (Open Food Facts tag, e.g. "united-states")
+        since: skip products last modified at or before this unix time; defaults to the
+               newest timestamp seen by the previous import of the same source, and 0
+               imports everything
+        """
+        source = source or os.path.basename(path).split(".")[0]
+        if since is None:
+            state = await self.import_state.find_one({"source": source}, {"_id": 0})
+            since = state["last_modified_t"] if state else 0
+
+        country_tag = f"en:{country.lower().replace(' ', '-')}" if country else None
+        stats = {"read": 0, "skipped": 0, "upserted": 0, "updated": 0, "unchanged": 0}
+        newest = since
+        batch = []
+
+        for record in self._iter_records(path):
+            stats["read"] += 1
+            if stats["read"] % YIELD_EVERY == 0:
+                # Parsing is synchronous; yield so the event loop stays responsive
+                # even through long runs of skipped or unchanged records
+                await asyncio.sleep(0)
+            product = self._extract_product(record)
+            if product is None:
+                stats["skipped"] += 1
+                continue
+            if country_tag and country_tag not in product["countries_tags"]:
+                stats["skipped"] += 1
+                continue
+            # A full import (since=0) also keeps records without a last_modified_t
+            if since and product["last_modified_t"] <= since:
+                stats["unchanged"] += 1
+                continue
+
+            newest = max(newest, product["last_modified_t"])
+            batch.append(product)
+            if len(batch) >= self.batch_size:
+                await self._write_batch(batch, stats)
+                batch = []
+
+        if batch:
+            await self._write_batch(batch, stats)
+
+        await self.import_state.update_one(
+            {"source": source},
+            {"$set": {"last_modified_t": newest, "imported_at": datetime.utcnow(), "last_stats": stats}},
+            upsert=True
+        )
+        logger.info(f"Imported {source}: {stats}")
+        return {"source": source, "since": since, "last_modified_t": newest, **stats}
+
+    async def run_periodic_refresh(
+        self,
+        path: str,
+        interval_hours: float = 24,
+        country: Optional[str] = None,
+        on_complete: Optional[Callable[[], Awaitable[Any]]] = None
+    ):
+        """Re-import a regularly replaced delta dump; only newer products are written"""
+        while True:
+            try:
+                if os.path.exists(path):
+                    result = await self.import_file(path, country=country)
+                    if on_complete and (result["upserted"] or result["updated"]):
+                        await on_complete()
+                else:
+                    logger.warning(f"Grocery catalog delta not found: {path}")
+            except Exception as e:
+                logger.error(f"Grocery catalog refresh failed: {str(e)}")
+            await asyncio.sleep(interval_hours * 3600)
+
+    # PRIVATE HELPER METHODS
+
+    def _iter_records(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield one raw record at a time from a JSONL or CSV/TSV file, gzipped or not"""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace", newline="") as handle:
+            name = path[:-3] if path.endswith(".gz") else path
+            if name.endswith((".jsonl", ".json", ".ndjson")):
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+            else:
+                # Open Food Facts ".csv" exports are tab separated
+                header = handle.readline()
+                delimiter = "\t" if "\t" in header else ","
+                columns = next(csv.reader(io.StringIO(header), delimiter=delimiter))
+                csv.field_size_limit(sys.maxsize)
+                for row in csv.DictReader(handle, fieldnames=columns, delimiter=delimiter):
+                    yield row
+
+    def _extract_product(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reduce a raw record to the stored product fields"""
+        code = (record.get("code") or "").strip()
+        name = (record.get("product_name") or "").strip()
+        if not code or not name:
+            return None
+
+        countries = record.get("countries_tags") or []
+        if isinstance(countries, str):
+            countries = [tag.strip() for tag in countries.split(",") if tag.strip()]
+
+        try:
+            last_modified = int(float(record.get("last_modified_t") or 0))
+        except (TypeError, ValueError):
+            last_modified = 0
+
+        product = {field: record.get(field) or "" for field in PRODUCT_FIELDS}
+        product.update({
+            "code": code,
+            "product_name": name,
+            "countries_tags": countries,
+            "image_url": record.get("image_url") or record.get("image_front_url") or None,
+            "last_modified_t": last_modified
+        })
+        return product
+
+    async def _write_batch(self, batch, stats):
+        """Upsert a batch, never overwriting a product with an older revision"""
+        operations = [
+            UpdateOne(
+                {"code": product["code"], "last_modified_t": {"$lt": product["last_modified_t"]}},
+                {"$set": product},
+                upsert=True
+            )
+            for product in batch
+        ]
+        try:
+            result = await self.products.bulk_write(operations, ordered=False)
+            stats["upserted"] += result.upserted_count
+            stats["updated"] += result.modified_count
+        except BulkWriteError as e:
+            # Duplicate key on upsert means the stored revision is already newer
+            details = e.details
+            stats["upserted"] += details.get("nUpserted", 0)
+            stats["updated"] += details.get("nModified", 0)
+            other_errors = [error for error in details.get("writeErrors", []) if error.get("code") != 11000]
+            stats["unchanged"] += len(details.get("writeErrors", [])) - len(other_errors)
+            if other_errors:
+                logger.error(f"Grocery catalog import write errors: {other_errors[:3]}")
+
+
+async def main(argv):
+    """Command line entry point: python grocery_catalog_importer.py DUMP [--country united-states] [--full]"""
+    from dotenv import load_dotenv
+    from pathlib import Path
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+
+    if not argv:
+        print(main.__doc__)
+        return 1
+
+    path = argv[0]
+    country = argv[argv.index("--country") + 1] if "--country" in argv else None
+    since = 0 if "--full" in argv else None
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    importer = GroceryCatalogImporter(client[os.environ['DB_NAME']])
+    await importer.create_indexes()
+    result = await importer.import_file(path, country=country, since=since)
+    print(f"✅ {result}")
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
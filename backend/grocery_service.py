@@ -6,12 +6,16 @@ Provides live grocery product data, ingredients, and nutrition information
 import asyncio
 import aiohttp
 import logging
+import os
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
 import json
 import re
 from pydantic import BaseModel
 
+from grocery_cache import GrocerySearchCache
+from ingredient_autocomplete import get_ingredient_autocomplete
+from ingredient_canonicalizer import get_ingredient_canonicalizer
+
 logger = logging.getLogger(__name__)
 
 class ProductInfo(BaseModel):
@@ -29,10 +33,28 @@ class ProductInfo(BaseModel):
 class GroceryAPIService:
     """Service for interacting with Open Food Facts API"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        search_url: Optional[str] = None,
+        max_connections: int = 20,
+        max_concurrent_requests: int = 8,
+        request_timeout_seconds: float = 10.0
+    ):
         self.base_url = "https://world.openfoodfacts.org/api/v0"
+        self.search_url = search_url or os.environ.get(
+            "OPEN_FOOD_FACTS_SEARCH_URL", "https://world.openfoodfacts.org/cgi/search.pl"
+        )
         self.user_agent = "Lambalia-App/1.0 (contact@lambalia.net)"
         
+        # One pooled session reused across requests (keep-alive, DNS cache)
+        self.max_connections = max_connections
+        self.max_concurrent_requests = max_concurrent_requests
+        self.timeout = aiohttp.ClientTimeout(
+            total=request_timeout_seconds, connect=3.0, sock_read=request_timeout_seconds
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        
         # Common grocery store chains for mapping
         self.store_chains = {
             "walmart": {"name": "Walmart", "commission": 0.06, "delivery": True},
@@ -44,62 +66,118 @@ class GroceryAPIService:
             "aldi": {"name": "Aldi", "commission": 0.05, "delivery": False}
         }
         
-        # Cached results to improve performance
-        self._cache = {}
-        self._cache_expiry = {}
+        # Bounded stale-while-revalidate cache; shared across workers once a database is attached
+        self.cache = GrocerySearchCache()
+        
+        # Local Open Food Facts import (see grocery_catalog_importer.py), searched before the live API
+        self.products_collection = None
+        self.source_stats = {"local": 0, "remote": 0}
         
     async def search_products(self, query: str, limit: int = 20) -> List[ProductInfo]:
         """Search for products using Open Food Facts API"""
         try:
-            cache_key = f"search_{query}_{limit}"
-            if self._is_cached(cache_key):
-                logger.info(f"Returning cached results for: {query}")
-                return self._cache[cache_key]
+            cache_key = f"search:{query.strip().lower()}:{limit}"
+            products = await self.cache.get(cache_key, lambda: self._fetch_products(query, limit))
+            return [ProductInfo(**product) for product in products]
             
-            async with aiohttp.ClientSession() as session:
-                headers = {"User-Agent": self.user_agent}
-                # Use the correct search endpoint
-                url = "https://world.openfoodfacts.org/cgi/search.pl"
-                params = {
-                    "search_terms": query,
-                    "search_simple": "1",
-                    "action": "process",
-                    "json": "1",
-                    "page_size": limit,
-                    "fields": "code,product_name,brands,ingredients_text,nutrition_grades,categories,image_url,stores,countries_tags"
-                }
-                
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        products = []
-                        
-                        for product in data.get("products", []):
-                            try:
-                                product_info = self._parse_product_data(product)
-                                if product_info:
-                                    products.append(product_info)
-                            except Exception as e:
-                                logger.warning(f"Error parsing product: {str(e)}")
-                                continue
-                        
-                        # Cache results for 30 minutes
-                        self._cache[cache_key] = products
-                        self._cache_expiry[cache_key] = datetime.now() + timedelta(minutes=30)
-                        
-                        logger.info(f"Found {len(products)} products for query: {query}")
-                        return products
-                    else:
-                        logger.error(f"API request failed with status: {response.status}")
-                        return []
-                        
         except Exception as e:
             logger.error(f"Error searching products: {str(e)}")
             return []
     
+    async def _fetch_products(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Search the local catalog first and only call Open Food Facts on a miss"""
+        products = await self._search_local(query, limit)
+        if products:
+            self.source_stats["local"] += 1
+            return products
+        
+        self.source_stats["remote"] += 1
+        return await self._fetch_remote(query, limit)
+    
+    async def _search_local(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Full-text search over the imported grocery_products collection"""
+        if self.products_collection is None:
+            return []
+        
+        try:
+            cursor = self.products_collection.find(
+                {"$text": {"$search": query}},
+                {"_id": 0, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+            documents = await cursor.to_list(length=limit)
+        except Exception as e:
+            logger.warning(f"Local grocery catalog search failed: {str(e)}")
+            return []
+        
+        products = []
+        for document in documents:
+            product_info = self._parse_product_data(document)
+            if product_info:
+                products.append(product_info.dict())
+        return products
+    
+    async def _fetch_remote(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Query Open Food Facts; raises on upstream failure so the cache can keep stale data"""
+        session = await self._get_session()
+        params = {
+            "search_terms": query,
+            "search_simple": "1",
+            "action": "process",
+            "json": "1",
+            "page_size": limit,
+            "fields": "code,product_name,brands,ingredients_text,nutrition_grades,categories,image_url,stores,countries_tags"
+        }
+        
+        # Cap in-flight requests to the upstream host; waiting here does not count against the timeout
+        async with self._request_semaphore:
+            async with session.get(self.search_url, params=params) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"API request failed with status: {response.status}")
+                data = await response.json(content_type=None)
+        
+        products = []
+        for product in data.get("products", []):
+            try:
+                product_info = self._parse_product_data(product)
+                if product_info:
+                    products.append(product_info.dict())
+            except Exception as e:
+                logger.warning(f"Error parsing product: {str(e)}")
+                continue
+        
+        logger.info(f"Found {len(products)} products for query: {query}")
+        return products
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_concurrent_requests,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"User-Agent": self.user_agent}
+            )
+            self._request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     async def get_ingredient_suggestions(self, partial_query: str) -> List[str]:
         """Get ingredient suggestions for autocomplete"""
         try:
+            # Shared in-memory index first (ingredients, specialty items, local catalog)
+            indexed = get_ingredient_autocomplete().suggest(partial_query, limit=8)
+            if indexed:
+                return [match["term"] for match in indexed]
+            
             # Search for products with the partial query
             products = await self.search_products(partial_query, limit=10)
             
@@ -183,22 +261,6 @@ class GroceryAPIService:
             logger.warning(f"Error extracting ingredients: {str(e)}")
             return []
     
-    def _is_cached(self, cache_key: str) -> bool:
-        """Check if result is cached and not expired"""
-        if cache_key not in self._cache:
-            return False
-        
-        expiry_time = self._cache_expiry.get(cache_key)
-        if not expiry_time or datetime.now() > expiry_time:
-            # Remove expired cache entry
-            if cache_key in self._cache:
-                del self._cache[cache_key]
-            if cache_key in self._cache_expiry:
-                del self._cache_expiry[cache_key]
-            return False
-        
-        return True
-    
     async def generate_grocery_stores_response(
         self,
         ingredients: List[str],
@@ -207,13 +269,27 @@ class GroceryAPIService:
     ) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
         """Generate grocery store response with real product data"""
         
-        # Search for products for each ingredient
+        # One search per canonical ingredient ("tomatoes" and "tomato" share it),
+        # run concurrently (capped per host by the shared session)
+        canonicalizer = get_ingredient_canonicalizer()
+        unique_ingredients = list(dict.fromkeys(ingredients))
+        canonical_by_ingredient = {
+            ingredient: canonicalizer.canonical_name(ingredient) or ingredient for ingredient in unique_ingredients
+        }
+        canonical_names = list(dict.fromkeys(canonical_by_ingredient.values()))
+        search_results = await asyncio.gather(*[
+            self.search_products(name, limit=5) for name in canonical_names
+        ])
+        products_by_canonical = dict(zip(canonical_names, search_results))
+        products_by_ingredient = {
+            ingredient: products_by_canonical[canonical] for ingredient, canonical in canonical_by_ingredient.items()
+        }
+        
         ingredient_availability = {}
-        all_products = []
+        all_products = [product for products in search_results for product in products]
         
-        for ingredient in ingredients:
-            products = await self.search_products(ingredient, limit=5)
-            all_products.extend(products)
+        for ingredient in unique_ingredients:
+            products = products_by_ingredient[ingredient]
             
             # Convert products to availability format
             availability_data = []
@@ -371,9 +447,13 @@ class GroceryAPIService:
 # Global service instance
 _grocery_service = None
 
-async def get_grocery_service() -> GroceryAPIService:
-    """Get the grocery API service instance"""
+async def get_grocery_service(db=None) -> GroceryAPIService:
+    """Get the grocery API service instance (pass db once to enable the shared cache and local catalog)"""
     global _grocery_service
     if _grocery_service is None:
         _grocery_service = GroceryAPIService()
+    if db is not None and _grocery_service.cache.collection is None:
+        _grocery_service.cache.attach_database(db)
+        await _grocery_service.cache.create_indexes()
+        _grocery_service.products_collection = db.grocery_products
     return _grocery_service
\ No newline at end of file
@@ -1,10 +1,11 @@
 # Heritage Recipes API - Global Cultural Preservation & Specialty Ingredients
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime
 
-from heritage_recipes_service import HeritageRecipesService, CulturalPreservationEngine
+from heritage_recipes_service import HeritageRecipesService, CulturalPreservationEngine, RECIPE_PROJECTION
+from translation_service import get_translation_service
 from heritage_recipes_models import (
     HeritageRecipeSubmission, IngredientSourceRequest, StoreRecommendationRequest,
     CulturalVerificationRequest, HeritageRecipeResponse, IngredientAvailabilityResponse,
@@ -108,16 +109,13 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
         """Get heritage recipes from specific country/region"""
         try:
             country_region = CountryRegion(country_code)
-            recipes = await heritage_service.get_recipes_by_country(country_region, limit)
-            
-            # Filter by minimum authenticity score
-            filtered_recipes = [r for r in recipes if r.get("authenticity_score", 0) >= authenticity_min]
+            recipes = await heritage_service.get_recipes_by_country(country_region, limit, authenticity_min)
             
             return {
                 "success": True,
                 "country": country_code,
-                "total_recipes": len(filtered_recipes),
-                "recipes": filtered_recipes,
+                "total_recipes": len(recipes),
+                "recipes": recipes,
                 "preservation_note": f"These traditional {country_code.replace('_', ' ').title()} recipes are preserved by community members"
             }
             
@@ -134,9 +132,16 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
         ingredients_available: bool = False,
         user_lat: Optional[float] = None,
         user_lng: Optional[float] = None,
-        radius_km: float = 50
+        radius_km: float = 50,
+        limit: int = Query(20, ge=1, le=50),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        collapse_duplicates: bool = Query(
+            False, description="Show one recipe per near-duplicate cluster (groups every match, so slower on common terms)"
+        ),
+        auto_translate: bool = False,
+        accept_language: Optional[str] = Header(None)
     ):
-        """Search heritage recipes with cultural context"""
+        """Search heritage recipes with cultural context, best matches first (auto_translate uses Accept-Language)"""
         try:
             filters = {}
             
@@ -151,13 +156,29 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
                 filters["user_location"] = {"lat": user_lat, "lng": user_lng}
                 filters["search_radius_km"] = radius_km
             
-            recipes = await heritage_service.search_heritage_recipes(q, filters)
+            page = await heritage_service.search_heritage_recipes(
+                q, filters, limit=limit, cursor=cursor, collapse_duplicates=collapse_duplicates
+            )
+            recipes = page["recipes"]
+            
+            translation_summary = None
+            if auto_translate and recipes:
+                translation_service = await get_translation_service()
+                target_language = translation_service.resolve_accept_language(accept_language)
+                if target_language:
+                    translation_summary = await translation_service.translate_fields(
+                        recipes,
+                        ["description", "historical_context", "family_story", "preparation_steps"],
+                        target_language
+                    )
             
             return {
                 "success": True,
                 "query": q,
                 "total_found": len(recipes),
                 "recipes": recipes,
+                "next_cursor": page["next_cursor"],
+                "translation": translation_summary,
                 "search_suggestions": [
                     "Try searching by dish name (e.g., 'ackee', 'callaloo')",
                     "Search by ingredient (e.g., 'plantain', 'scotch bonnet')",
@@ -165,6 +186,8 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
                 ]
             }
             
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
@@ -180,11 +203,20 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
             
             recipe = await heritage_service.submit_heritage_recipe(recipe_data.dict(), current_user_id)
             
+            near_duplicate = None
+            if recipe.duplicate_of:
+                near_duplicate = {
+                    "duplicate_of": recipe.duplicate_of,
+                    "similarity": recipe.duplicate_similarity,
+                    "duplicate_cluster_id": recipe.duplicate_cluster_id
+                }
+            
             return {
                 "success": True,
                 "recipe_id": recipe.id,
                 "message": "Thank you for preserving this cultural treasure!",
                 "status": "submitted_for_community_review",
+                "near_duplicate": near_duplicate,
                 "next_steps": [
                     "Community members will review for authenticity",
                     "Cultural experts may provide feedback",
@@ -200,6 +232,22 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.get("/recipes/{recipe_id}/duplicates", response_model=dict)
+    async def get_recipe_duplicates(recipe_id: str):
+        """Get a heritage recipe's near-duplicate cluster and closest matches"""
+        try:
+            result = await heritage_service.get_recipe_duplicates(recipe_id)
+            
+            if result.get("error"):
+                raise HTTPException(status_code=404, detail=result["error"])
+            
+            return {"success": True, **result}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
     @router.post("/recipes/{recipe_id}/verify", response_model=dict)
     async def verify_recipe_authenticity(
         recipe_id: str,
@@ -227,6 +275,28 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.post("/recipes/{recipe_id}/{action}", response_model=dict)
+    async def record_recipe_engagement(
+        recipe_id: str,
+        action: str,
+        current_user_id: str = Depends(get_current_user)
+    ):
+        """Like (toggle), share or mark a heritage recipe as tried"""
+        if action not in ("like", "share", "tried"):
+            raise HTTPException(status_code=404, detail="Not found")
+        try:
+            result = await heritage_service.record_recipe_engagement(recipe_id, current_user_id, action)
+            
+            if result.get("error"):
+                raise HTTPException(status_code=404, detail=result["error"])
+            
+            return {"success": True, "action": action, **result}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
     # SPECIALTY INGREDIENT SOURCING
     
     @router.get("/ingredients/search", response_model=dict)
@@ -239,12 +309,13 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
     ):
         """Find where to buy specialty Afro-Caribbean ingredients"""
         try:
+            resolver = heritage_service.ingredient_resolver()
             if user_lat and user_lng:
                 user_location = {"lat": user_lat, "lng": user_lng}
-                source_info = await heritage_service.find_ingredient_sources(ingredient, user_location, radius_km)
+                source_info = await heritage_service.find_ingredient_sources(ingredient, user_location, radius_km, resolver)
             else:
                 # Return general info without location-specific data
-                source_info = await heritage_service.find_ingredient_sources(ingredient, {"lat": 0, "lng": 0}, 1000)
+                source_info = await heritage_service.find_ingredient_sources(ingredient, {"lat": 0, "lng": 0}, 1000, resolver)
             
             if source_info.get("error"):
                 return {
@@ -264,7 +335,7 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
             }
             
             if include_substitutes and source_info.get("substitutes"):
-                substitute_info = await heritage_service.get_ingredient_substitutions(ingredient)
+                substitute_info = await heritage_service.get_ingredient_substitutions(ingredient, resolver)
                 response["substitution_guide"] = substitute_info
             
             return response
@@ -526,17 +597,17 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
     async def get_heritage_recipe_details(recipe_id: str):
         """Get detailed information about a specific heritage recipe"""
         try:
-            recipe = await heritage_service.db.heritage_recipes.find_one({"id": recipe_id}, {"_id": 0})
+            recipe = await heritage_service.db.heritage_recipes.find_one({"id": recipe_id}, RECIPE_PROJECTION)
             
             if not recipe:
                 raise HTTPException(status_code=404, detail="Recipe not found")
             
             # Get ingredient sourcing info
             ingredient_sourcing = {}
-            for ingredient_name in recipe.get("specialty_ingredients", []):
-                sourcing_info = await heritage_service.find_ingredient_sources(
-                    ingredient_name, {"lat": 0, "lng": 0}, 1000
-                )
+            sources = await heritage_service.find_ingredient_sources_batch(
+                recipe.get("specialty_ingredients", []), {"lat": 0, "lng": 0}, 1000
+            )
+            for ingredient_name, sourcing_info in sources.items():
                 if not sourcing_info.get("error"):
                     ingredient_sourcing[ingredient_name] = {
                         "rarity": sourcing_info.get("rarity_level"),
@@ -690,21 +761,71 @@ def create_heritage_recipes_router(heritage_service: HeritageRecipesService, get
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    async def require_platform_owner(current_user_id: str):
+        user = await heritage_service.db.users.find_one({"id": current_user_id})
+        if not user or not user.get("is_platform_owner"):
+            raise HTTPException(status_code=403, detail="Platform owner access required")
+    
     @router.post("/stores/sync-inventory/{chain_name}", response_model=dict)
     async def sync_chain_inventory(
         chain_name: str,
         current_user_id: str = Depends(get_current_user)
     ):
-        """Sync inventory data from store chain websites (admin only)"""
+        """Start a background inventory sync from a store chain's catalog (admin only)"""
         try:
+            await require_platform_owner(current_user_id)
             result = await heritage_service.sync_store_chain_inventory(chain_name)
             
+            if result.get("error"):
+                raise HTTPException(status_code=404, detail=result["error"])
+            
             return {
                 "success": True,
                 "sync_result": result,
-                "note": "Web scraping integration is coming soon to automatically track ingredient availability"
+                "note": "Poll /heritage/stores/sync-inventory/runs/{run_id} for progress"
             }
             
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/stores/sync-inventory/runs", response_model=dict)
+    async def get_inventory_sync_runs(
+        chain_name: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=100),
+        current_user_id: str = Depends(get_current_user)
+    ):
+        """Recent inventory sync runs with throughput, newest first (admin only)"""
+        try:
+            await require_platform_owner(current_user_id)
+            runs = await heritage_service.inventory_sync.get_runs(chain_name.lower() if chain_name else None, limit)
+            return {
+                "success": True,
+                "runs": runs,
+                "sync_stats": heritage_service.inventory_sync.get_stats()
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/stores/sync-inventory/runs/{run_id}", response_model=dict)
+    async def get_inventory_sync_run(
+        run_id: str,
+        current_user_id: str = Depends(get_current_user)
+    ):
+        """Progress and throughput of one inventory sync run (admin only)"""
+        try:
+            await require_platform_owner(current_user_id)
+            run = await heritage_service.inventory_sync.get_run(run_id)
+            if not run:
+                raise HTTPException(status_code=404, detail="Sync run not found")
+            return {"success": True, "run": run}
+            
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
@@ -216,6 +216,17 @@ class HeritageRecipe(BaseModel):
     source_verification: Optional[str] = None # How authenticity was verified
     elder_approved: bool = False              # Approved by community elders
     community_ratings: Dict[str, float] = {} # Authenticity ratings
+    rating_sum: float = 0.0                   # Sum of community_ratings, kept with $inc
+    rating_count: int = 0                     # Number of community_ratings
+    authenticity_bonus: float = 0.0           # Score bonus from verification source, history and family story
+    authenticity_score: float = 3.0           # Stored CulturalPreservationEngine score, used for ranking
+    
+    # Near-Duplicate Detection
+    minhash_signature: List[int] = []         # MinHash of ingredient and instruction shingles
+    lsh_bands: List[str] = []                 # LSH band keys, indexed for candidate lookup
+    duplicate_cluster_id: Optional[str] = None  # Shared by near-duplicate recipes (first recipe's id)
+    duplicate_of: Optional[str] = None        # Closest earlier recipe when flagged as a near-duplicate
+    duplicate_similarity: float = 0.0         # Estimated Jaccard similarity to duplicate_of
     
     # Ingredient Sourcing
     where_to_buy_ingredients: List[Dict[str, str]] = []  # Store recommendations
@@ -251,6 +262,7 @@ class SpecialtyIngredient(BaseModel):
     ingredient_name_local: Optional[str] = None  # Local/traditional name
     scientific_name: Optional[str] = None        # Botanical/scientific name
     alternative_names: List[str] = []            # Other names it's known by
+    name_keys: List[str] = []                    # Folded lookup keys of every name, indexed for batch resolution
     
     # Origin & Cultural Context
     origin_countries: List[CountryRegion] = []
@@ -315,6 +327,7 @@ class EthnicGroceryStore(BaseModel):
     
     # Geographic Data
     location: Dict[str, float] = {}              # {"lat": x, "lng": y}
+    geo_location: Optional[Dict[str, Any]] = None # GeoJSON point of location, 2dsphere-indexed
     service_radius_km: float = Field(default=50.0, ge=1.0, le=200.0)
     
     # Store Details
@@ -1,9 +1,17 @@
 # Heritage Recipes Service - Global Cultural Preservation & Specialty Ingredients
 import asyncio
+import base64
+import json
 import math
+import os
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import logging
 
 from heritage_recipes_models import (
@@ -11,6 +19,38 @@ from heritage_recipes_models import (
     HeritageCollection, CountryRegion, IngredientRarity, CulturalSignificance,
     AuthenticityLevel
 )
+from chain_inventory_sync import ChainInventorySync
+from recipe_minhash import DUPLICATE_THRESHOLD, get_recipe_minhasher
+from ingredient_autocomplete import get_ingredient_autocomplete, specialty_entries
+from ingredient_canonicalizer import IngredientCanonicalizer, get_ingredient_canonicalizer
+from unified_search_service import get_unified_search
+
+# The single rolled-up heritage_insights document
+INSIGHTS_ID = "global"
+# Recipe counter -> community_engagement_stats field
+INSIGHTS_COUNTERS = {
+    "likes_count": "total_recipe_likes",
+    "shares_count": "total_recipe_shares",
+    "tried_count": "recipes_tried"
+}
+
+# heritage_contributions: contributor usernames kept per culture/dish pair, and recent contributors overall
+CONTRIBUTION_SAMPLE_SIZE = 50
+RECENT_CONTRIBUTORS = 10
+
+# Recipe reads leave out the stored near-duplicate fingerprint
+RECIPE_PROJECTION = {"_id": 0, "minhash_signature": 0, "lsh_bands": 0}
+# Most LSH candidates compared against a new recipe's signature
+DUPLICATE_CANDIDATE_LIMIT = 200
+
+# Text index weights for heritage recipe search (names outrank ingredients, then prose)
+HERITAGE_SEARCH_WEIGHTS = {
+    "recipe_name": 10,
+    "recipe_name_local": 8,
+    "traditional_ingredients.name": 5,
+    "description": 3,
+    "historical_context": 1
+}
 
 class CulturalPreservationEngine:
     """Engine for cultural recipe preservation and authenticity verification"""
@@ -18,30 +58,67 @@ class CulturalPreservationEngine:
     @staticmethod
     def calculate_authenticity_score(recipe: HeritageRecipe, community_feedback: List[Dict]) -> float:
         """Calculate authenticity score based on community feedback and verification"""
-        base_score = 3.0  # Start with neutral score
-        
-        # Elder approval adds significant weight
-        if recipe.elder_approved:
-            base_score += 1.5
-        
-        # Community ratings
-        if recipe.community_ratings:
-            avg_rating = sum(recipe.community_ratings.values()) / len(recipe.community_ratings)
-            base_score = (base_score + avg_rating) / 2
+        return CulturalPreservationEngine.score_from_components(
+            recipe.elder_approved,
+            sum(recipe.community_ratings.values()),
+            len(recipe.community_ratings),
+            CulturalPreservationEngine.calculate_authenticity_bonus(recipe)
+        )
+    
+    @staticmethod
+    def calculate_authenticity_bonus(recipe: HeritageRecipe) -> float:
+        """Part of the score fixed by the recipe's own content"""
+        bonus = 0.0
         
         # Contributor credibility
         if recipe.source_verification:
-            base_score += 0.5
+            bonus += 0.5
         
         # Historical context adds authenticity
         if recipe.historical_context and len(recipe.historical_context) > 100:
-            base_score += 0.3
+            bonus += 0.3
         
         # Family story adds personal authenticity
         if recipe.family_story and len(recipe.family_story) > 50:
-            base_score += 0.2
+            bonus += 0.2
         
-        return min(5.0, max(1.0, base_score))
+        return bonus
+    
+    @staticmethod
+    def score_from_components(elder_approved: bool, rating_sum: float, rating_count: int, bonus: float) -> float:
+        """Authenticity score from the components stored on each recipe"""
+        base_score = 3.0  # Start with neutral score
+        
+        # Elder approval adds significant weight
+        if elder_approved:
+            base_score += 1.5
+        
+        # Community ratings
+        if rating_count:
+            base_score = (base_score + rating_sum / rating_count) / 2
+        
+        return min(5.0, max(1.0, base_score + bonus))
+    
+    @staticmethod
+    def authenticity_score_expression() -> Dict[str, Any]:
+        """score_from_components as an aggregation expression over the stored fields, for pipeline updates"""
+        base = {"$cond": [{"$eq": ["$elder_approved", True]}, 4.5, 3.0]}
+        rated = {"$cond": [
+            {"$gt": [{"$ifNull": ["$rating_count", 0]}, 0]},
+            {"$divide": [{"$add": [base, {"$divide": ["$rating_sum", "$rating_count"]}]}, 2]},
+            base
+        ]}
+        return {"$min": [5.0, {"$max": [1.0, {"$add": [rated, {"$ifNull": ["$authenticity_bonus", 0.0]}]}]}]}
+    
+    @staticmethod
+    def authenticity_fields(recipe: HeritageRecipe) -> Dict[str, Any]:
+        """Every materialized authenticity field, for inserts and backfills"""
+        return {
+            "rating_sum": float(sum(recipe.community_ratings.values())),
+            "rating_count": len(recipe.community_ratings),
+            "authenticity_bonus": CulturalPreservationEngine.calculate_authenticity_bonus(recipe),
+            "authenticity_score": CulturalPreservationEngine.calculate_authenticity_score(recipe, [])
+        }
     
     @staticmethod
     def assess_ingredient_rarity(ingredient_name: str, availability_data: Dict) -> IngredientRarity:
@@ -83,6 +160,94 @@ class CulturalPreservationEngine:
         except:
             return float('inf')
 
+def geo_point(location: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """GeoJSON point for a {"lat", "lng"} location, or None when it is incomplete"""
+    try:
+        return {"type": "Point", "coordinates": [float(location["lng"]), float(location["lat"])]}
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def user_heritage_contribution(user: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The heritage fields a user profile contributes to heritage_contributions, or None"""
+    if not user:
+        return None
+    
+    def entries(text: Optional[str]) -> Dict[str, str]:
+        # Folded key -> name as first written, for a comma-separated profile field
+        folded: Dict[str, str] = {}
+        for part in (text or "").split(","):
+            name = " ".join(part.split())
+            if name:
+                folded.setdefault(name.lower(), name)
+        return folded
+    
+    background = " ".join((user.get("cultural_background") or "").split())
+    dishes = entries(user.get("native_dishes"))
+    specialties = entries(user.get("consultation_specialties"))
+    if not (background or dishes or specialties):
+        return None
+    return {
+        "username": user.get("username"),
+        "cultural_background": background,
+        "culture": background.lower(),
+        "dishes": dishes,
+        "specialties": specialties,
+        "native_dishes": user.get("native_dishes") or "",
+        "consultation_specialties": user.get("consultation_specialties") or ""
+    }
+
+def specialty_name_keys(ingredient: Dict[str, Any]) -> List[str]:
+    """Folded lookup keys for a specialty ingredient's name, local name and alternative names"""
+    canonicalizer = get_ingredient_canonicalizer()
+    names = [ingredient.get("ingredient_name"), ingredient.get("ingredient_name_local"),
+             *ingredient.get("alternative_names", [])]
+    return list(dict.fromkeys(key for key in (canonicalizer.key(name) for name in names if name) if key))
+
+class SpecialtyIngredientResolver:
+    """
+    Maps ingredient names to specialty_ingredients documents, a whole batch per query.
+    
+    Names are folded with the ingredient canonicalizer and matched (with their
+    known synonyms) against the indexed name_keys field in one $in query.
+    Results, including misses, are memoized for the resolver's lifetime, so
+    create one per request and pass it to every lookup that request makes.
+    """
+    
+    def __init__(self, db: AsyncIOMotorDatabase, canonicalizer: Optional[IngredientCanonicalizer] = None):
+        self.db = db
+        self.canonicalizer = canonicalizer or get_ingredient_canonicalizer()
+        self._resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.queries = 0
+    
+    async def resolve(self, names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Specialty ingredient document (or None) for each name"""
+        pending = {}
+        for name in dict.fromkeys(names):
+            if name and name not in self._resolved:
+                key = self.canonicalizer.key(name)
+                pending[name] = [key, *(synonym for synonym in self.canonicalizer.synonyms(name) if synonym != key)]
+        
+        keys = sorted({key for name_keys in pending.values() for key in name_keys if key})
+        if keys:
+            self.queries += 1
+            documents = await self.db.specialty_ingredients.find(
+                {"name_keys": {"$in": keys}}, {"_id": 0}
+            ).to_list(length=None)
+            by_key = {}
+            for document in documents:
+                for key in document.get("name_keys", []):
+                    by_key.setdefault(key, document)
+            for name, name_keys in pending.items():
+                # The name's own spelling wins over a synonym's
+                self._resolved[name] = next((by_key[key] for key in name_keys if key in by_key), None)
+        else:
+            self._resolved.update(dict.fromkeys(pending))
+        
+        return {name: self._resolved.get(name) for name in names if name}
+    
+    async def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return (await self.resolve([name])).get(name)
+
 class HeritageRecipesService:
     """Main service for global heritage recipe preservation and specialty ingredient sourcing"""
     
@@ -90,6 +255,18 @@ class HeritageRecipesService:
         self.db = db
         self.preservation_engine = CulturalPreservationEngine()
         self.logger = logging.getLogger(__name__)
+        
+        # Short-lived cache for the featured collections and diaspora pages
+        self.page_cache: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self.page_cache_ttl = 120
+        self.page_cache_size = 500
+        
+        # Background chain catalog syncs; CHAIN_INVENTORY_FIXTURES points at recorded pages instead of the web
+        self.inventory_sync = ChainInventorySync(db, fixtures_dir=os.environ.get("CHAIN_INVENTORY_FIXTURES"))
+        
+        # Set while heritage_contributions is rebuilt from users; profile changes meanwhile trigger another pass
+        self._contributions_rebuilding = False
+        self._contributions_missed = False
     
     # HERITAGE RECIPE MANAGEMENT
     
@@ -114,74 +291,268 @@ class HeritageRecipesService:
         )
         
         # Analyze ingredient rarity
-        specialty_ingredients = []
-        for ingredient in heritage_recipe.traditional_ingredients:
-            ingredient_name = ingredient.get("name", "")
-            if ingredient_name:
-                # Check if ingredient exists in specialty database
-                specialty_data = await self.db.specialty_ingredients.find_one(
-                    {"ingredient_name": {"$regex": ingredient_name, "$options": "i"}}, {"_id": 0}
-                )
-                if specialty_data and specialty_data.get("rarity_level") in ["rare", "specialty", "imported_only"]:
-                    specialty_ingredients.append(ingredient_name)
+        ingredient_names = [ingredient.get("name", "") for ingredient in heritage_recipe.traditional_ingredients]
+        specialty_data = await self.ingredient_resolver().resolve(ingredient_names)
+        specialty_ingredients = [
+            name for name, data in specialty_data.items()
+            if data and data.get("rarity_level") in ["rare", "specialty", "imported_only"]
+        ]
         
         heritage_recipe.specialty_ingredients = specialty_ingredients
+        for field, value in self.preservation_engine.authenticity_fields(heritage_recipe).items():
+            setattr(heritage_recipe, field, value)
+        
+        # Fingerprint and flag near-duplicates of earlier submissions
+        for field, value in (await self._duplicate_fields(heritage_recipe.dict())).items():
+            setattr(heritage_recipe, field, value)
         
         await self.db.heritage_recipes.insert_one(heritage_recipe.dict())
+        get_unified_search().publish_heritage_recipe(heritage_recipe.dict())
         
         # Update contributor stats
-        await self.db.cultural_contributors.update_one(
+        previous = await self.db.cultural_contributors.find_one_and_update(
             {"user_id": contributor_id},
             {
                 "$inc": {"family_recipes_count": 1},
                 "$push": {"recipes_contributed": heritage_recipe.id}
-            }
+            },
+            projection={"_id": 0, "family_recipes_count": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
+        # Roll the recipe into the preservation insights
+        insights_inc = {}
+        if heritage_recipe.is_public:
+            insights_inc["total_recipes_preserved"] = 1
+            insights_inc[f"recipes_by_country.{self._insights_key(heritage_recipe.country_region)}"] = 1
+        if not (previous or {}).get("family_recipes_count"):
+            insights_inc["active_cultural_contributors"] = 1
+        extra = None
+        if heritage_recipe.preservation_priority >= 4 and not heritage_recipe.elder_approved:
+            # A positive $slice keeps the first ten, as the full query would return
+            summary = heritage_recipe.dict(exclude={"minhash_signature", "lsh_bands"})
+            extra = {"$push": {"preservation_priority_recipes": {"$each": [summary], "$slice": 10}}}
+        await self._update_insights(insights_inc, extra)
+        
         self.logger.info(f"Heritage recipe submitted: {heritage_recipe.id} from {heritage_recipe.country_region}")
         return heritage_recipe
     
-    async def get_recipes_by_country(self, country_region: CountryRegion, limit: int = 20) -> List[Dict[str, Any]]:
-        """Get heritage recipes from specific country/region"""
+    async def get_recipes_by_country(self, country_region: CountryRegion, limit: int = 20,
+                                     authenticity_min: float = 1.0) -> List[Dict[str, Any]]:
+        """Get heritage recipes from specific country/region, most authentic first"""
         
+        # Served in order by the (country_region, is_public, authenticity_score, preservation_priority) index
         recipes = await self.db.heritage_recipes.find(
-            {"country_region": country_region, "is_public": True},
-            {"_id": 0}
-        ).sort("preservation_priority", -1).limit(limit).to_list(length=limit)
+            {"country_region": country_region, "is_public": True, "authenticity_score": {"$gte": authenticity_min}},
+            RECIPE_PROJECTION
+        ).sort([("authenticity_score", -1), ("preservation_priority", -1)]).limit(limit).to_list(length=limit)
         
-        # Enhance with availability data
+        # Enhance with availability data (one lookup for every recipe's ingredients)
+        resolver = self.ingredient_resolver()
+        await resolver.resolve([name for recipe in recipes for name in recipe.get("specialty_ingredients", [])])
         enhanced_recipes = []
         for recipe in recipes:
-            # Calculate authenticity score
-            recipe["authenticity_score"] = self.preservation_engine.calculate_authenticity_score(
-                HeritageRecipe(**recipe), []
-            )
-            
             # Add ingredient sourcing info
-            ingredient_availability = await self._get_ingredient_availability(recipe["specialty_ingredients"])
+            ingredient_availability = await self._get_ingredient_availability(recipe["specialty_ingredients"], resolver)
             recipe["ingredient_sourcing"] = ingredient_availability
             
             enhanced_recipes.append(recipe)
         
         return enhanced_recipes
     
-    async def search_heritage_recipes(self, query: str, filters: Dict[str, Any] = {}) -> List[Dict[str, Any]]:
-        """Search heritage recipes with cultural context"""
+    async def create_search_indexes(self):
+        """Weighted text index behind search_heritage_recipes"""
+        await self.db.heritage_recipes.create_index(
+            [(field, "text") for field in HERITAGE_SEARCH_WEIGHTS],
+            weights=HERITAGE_SEARCH_WEIGHTS,
+            name="heritage_recipe_search_text",
+            # Recipes carry no per-document language field; keep Mongo from reading one
+            language_override="text_search_language"
+        )
+        await self.db.heritage_recipes.create_index([("is_public", 1), ("authenticity_score", -1), ("id", 1)])
+        await self.db.heritage_recipes.create_index([
+            ("country_region", 1), ("is_public", 1), ("authenticity_score", -1), ("preservation_priority", -1)
+        ])
+        await self.db.heritage_recipes.create_index("lsh_bands")
+        await self.db.heritage_recipes.create_index("duplicate_cluster_id")
+    
+    async def backfill_authenticity_scores(self, batch_size: int = 500) -> int:
+        """Store the authenticity fields on recipes saved before they were materialized"""
+        updated = 0
+        batch = []
+        async for recipe in self.db.heritage_recipes.find({"authenticity_bonus": {"$exists": False}}, {"_id": 0}):
+            fields = self.preservation_engine.authenticity_fields(HeritageRecipe(**recipe))
+            batch.append(UpdateOne({"id": recipe["id"]}, {"$set": fields}))
+            if len(batch) >= batch_size:
+                result = await self.db.heritage_recipes.bulk_write(batch, ordered=False)
+                updated += result.modified_count
+                batch = []
+        if batch:
+            result = await self.db.heritage_recipes.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+        return updated
+    
+    async def backfill_duplicate_index(self, batch_size: int = 500) -> int:
+        """
+        Fingerprint recipes saved before near-duplicate detection, oldest first,
+        so each is clustered against the recipes fingerprinted before it. Fields are
+        written in bulk_write batches; recipes of the unwritten batch are matched
+        in memory so the clustering is the same as writing one at a time.
+        """
+        indexed = 0
+        pending = []
+        async for recipe in self.db.heritage_recipes.find(
+            {"minhash_signature": {"$exists": False}}, RECIPE_PROJECTION
+        ).sort([("created_at", 1), ("id", 1)]):
+            fields = await self._duplicate_fields(recipe, unsaved=pending)
+            pending.append({"id": recipe["id"], **fields})
+            if len(pending) >= batch_size:
+                indexed += await self._write_duplicate_fields(pending)
+                pending = []
+        if pending:
+            indexed += await self._write_duplicate_fields(pending)
+        return indexed
+    
+    async def run_duplicate_index_backfill(self):
+        """Startup task: fingerprint unindexed recipes in the background"""
+        try:
+            fingerprinted = await self.backfill_duplicate_index()
+            if fingerprinted:
+                self.logger.info(f"Fingerprinted {fingerprinted} heritage recipes for near-duplicate detection")
+        except Exception as e:
+            self.logger.error(f"Heritage duplicate index backfill failed: {str(e)}")
+    
+    async def find_near_duplicates(self, recipe: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Recipes whose estimated ingredient and instruction similarity to this one
+        reaches DUPLICATE_THRESHOLD, closest first. Candidates share at least one
+        LSH band and come from the indexed lsh_bands field, never a collection scan.
+        """
+        minhasher = get_recipe_minhasher()
+        signature = recipe.get("minhash_signature")
+        if not signature:
+            signature = minhasher.fingerprint(recipe)["minhash_signature"]
+        bands = minhasher.band_keys(signature)
+        if not bands:
+            return []
         
-        # Build search query
-        search_conditions = []
+        candidates = await self.db.heritage_recipes.find(
+            {"lsh_bands": {"$in": bands}, "id": {"$ne": recipe.get("id")}},
+            {"_id": 0, "id": 1, "recipe_name": 1, "country_region": 1, "minhash_signature": 1,
+             "duplicate_cluster_id": 1, "is_public": 1}
+        ).limit(DUPLICATE_CANDIDATE_LIMIT).to_list(length=DUPLICATE_CANDIDATE_LIMIT)
+        
+        matches = []
+        for candidate in candidates:
+            similarity = minhasher.similarity(signature, candidate.pop("minhash_signature", []))
+            if similarity >= DUPLICATE_THRESHOLD:
+                matches.append({**candidate, "similarity": round(similarity, 3)})
+        matches.sort(key=lambda match: (-match["similarity"], match["id"]))
+        return matches[:limit]
+    
+    async def get_recipe_duplicates(self, recipe_id: str) -> Dict[str, Any]:
+        """A recipe's duplicate cluster and its closest near-duplicates"""
+        recipe = await self.db.heritage_recipes.find_one(
+            {"id": recipe_id},
+            {"_id": 0, "id": 1, "minhash_signature": 1, "traditional_ingredients": 1, "preparation_steps": 1,
+             "duplicate_cluster_id": 1, "duplicate_of": 1, "duplicate_similarity": 1}
+        )
+        if not recipe:
+            return {"error": "Recipe not found"}
+        
+        cluster_id = recipe.get("duplicate_cluster_id") or recipe_id
+        cluster, near_duplicates = await asyncio.gather(
+            self.db.heritage_recipes.find(
+                {"duplicate_cluster_id": cluster_id},
+                {"_id": 0, "id": 1, "recipe_name": 1, "country_region": 1, "duplicate_of": 1,
+                 "duplicate_similarity": 1, "is_public": 1, "created_at": 1}
+            ).sort("created_at", 1).to_list(length=100),
+            self.find_near_duplicates(recipe)
+        )
+        return {
+            "recipe_id": recipe_id,
+            "duplicate_cluster_id": cluster_id,
+            "duplicate_of": recipe.get("duplicate_of"),
+            "duplicate_similarity": recipe.get("duplicate_similarity", 0.0),
+            "cluster": cluster,
+            "near_duplicates": near_duplicates
+        }
+    
+    def build_search_pipeline(self, query: str, conditions: List[Dict[str, Any]], limit: int = 20,
+                              cursor: Optional[str] = None, collapse_duplicates: bool = False) -> List[Dict[str, Any]]:
+        """
+        Aggregation for one page of heritage search results.
+        
+        $text selects matches through the weighted text index, relevance is the
+        text score scaled by the stored authenticity score (1-5 maps to x0.6-1.0),
+        and pages continue after the (relevance, id) of the previous page's last
+        recipe, so deep pages cost the same as the first. With collapse_duplicates
+        each duplicate cluster is represented by its best match, which carries the
+        number of other cluster members as duplicate_count; that groups the whole
+        match set before paging, so it is opt-in and costs more on common terms.
+        """
+        match = {"is_public": True}
+        if query:
+            match["$text"] = {"$search": query}
+        if conditions:
+            match["$and"] = conditions
         
-        # Text search
         if query:
-            search_conditions.append({
-                "$or": [
-                    {"recipe_name": {"$regex": query, "$options": "i"}},
-                    {"recipe_name_local": {"$regex": query, "$options": "i"}},
-                    {"description": {"$regex": query, "$options": "i"}},
-                    {"traditional_ingredients.name": {"$regex": query, "$options": "i"}},
-                    {"historical_context": {"$regex": query, "$options": "i"}}
-                ]
-            })
+            relevance = {"$multiply": [
+                {"$meta": "textScore"},
+                {"$add": [0.5, {"$divide": [{"$ifNull": ["$authenticity_score", 3.0]}, 10]}]}
+            ]}
+        else:
+            relevance = {"$ifNull": ["$authenticity_score", 3.0]}
+        
+        pipeline = [
+            {"$match": match},
+            {"$addFields": {"search_relevance": relevance}}
+        ]
+        if collapse_duplicates:
+            # Keep only ids and scores through the group; the page's recipes are joined back by id
+            pipeline.extend([
+                {"$sort": {"search_relevance": -1, "id": 1}},
+                {"$group": {
+                    "_id": {"$ifNull": ["$duplicate_cluster_id", "$id"]},
+                    "id": {"$first": "$id"},
+                    "search_relevance": {"$first": "$search_relevance"},
+                    "cluster_size": {"$sum": 1}
+                }}
+            ])
+        after = self._decode_search_cursor(cursor)
+        if after:
+            pipeline.append({"$match": {"$or": [
+                {"search_relevance": {"$lt": after["relevance"]}},
+                {"search_relevance": after["relevance"], "id": {"$gt": after["id"]}}
+            ]}})
+        pipeline.extend([
+            {"$sort": {"search_relevance": -1, "id": 1}},
+            {"$limit": limit}
+        ])
+        if collapse_duplicates:
+            pipeline.extend([
+                {"$lookup": {
+                    "from": "heritage_recipes",
+                    "localField": "id",
+                    "foreignField": "id",
+                    "as": "recipe"
+                }},
+                {"$unwind": "$recipe"},
+                {"$replaceRoot": {"newRoot": {"$mergeObjects": [
+                    "$recipe",
+                    {"search_relevance": "$search_relevance", "duplicate_count": {"$subtract": ["$cluster_size", 1]}}
+                ]}}}
+            ])
+        pipeline.append({"$project": RECIPE_PROJECTION})
+        return pipeline
+    
+    async def search_heritage_recipes(self, query: str, filters: Dict[str, Any] = {}, limit: int = 20,
+                                      cursor: Optional[str] = None, collapse_duplicates: bool = False) -> Dict[str, Any]:
+        """Search heritage recipes with cultural context; returns a page and the cursor for the next one"""
+        
+        # Build search query
+        search_conditions = []
         
         # Filter by country/region
         if filters.get("country_region"):
@@ -200,20 +571,16 @@ class HeritageRecipesService:
             if available_recipes:
                 search_conditions.append({"id": {"$in": available_recipes}})
         
-        # Execute search
-        final_query = {"$and": search_conditions} if search_conditions else {}
-        final_query["is_public"] = True
+        # Execute search (ranked by text relevance and stored authenticity)
+        pipeline = self.build_search_pipeline(query, search_conditions, limit, cursor, collapse_duplicates)
+        recipes = await self.db.heritage_recipes.aggregate(pipeline).to_list(length=limit)
         
-        recipes = await self.db.heritage_recipes.find(final_query, {"_id": 0}).limit(50).to_list(length=50)
+        next_cursor = None
+        if len(recipes) == limit:
+            last = recipes[-1]
+            next_cursor = self._encode_search_cursor(last["search_relevance"], last["id"])
         
-        # Sort by relevance and authenticity
-        for recipe in recipes:
-            recipe["authenticity_score"] = self.preservation_engine.calculate_authenticity_score(
-                HeritageRecipe(**recipe), []
-            )
-        
-        recipes.sort(key=lambda x: (x["authenticity_score"], x["preservation_priority"]), reverse=True)
-        return recipes
+        return {"recipes": recipes, "next_cursor": next_cursor}
     
     # SPECIALTY INGREDIENT MANAGEMENT
     
@@ -224,8 +591,12 @@ class HeritageRecipesService:
             added_by=contributor_id,
             **ingredient_data
         )
+        ingredient.name_keys = specialty_name_keys(ingredient.dict())
         
         await self.db.specialty_ingredients.insert_one(ingredient.dict())
+        # User-submitted names join the shared ingredient vocabulary on the next load_database_sources
+        get_ingredient_autocomplete().add_terms("specialty", specialty_entries([ingredient.dict()]))
+        await self._update_insights({f"ingredient_rarity.{self._insights_key(ingredient.rarity_level)}": 1})
         
         # Update contributor stats
         await self.db.cultural_contributors.update_one(
@@ -236,48 +607,76 @@ class HeritageRecipesService:
         self.logger.info(f"Specialty ingredient added: {ingredient.ingredient_name}")
         return ingredient
     
+    async def backfill_specialty_name_keys(self, batch_size: int = 500) -> int:
+        """Store name_keys on specialty ingredients added before batch resolution"""
+        updated = 0
+        batch = []
+        projection = {"_id": 0, "id": 1, "ingredient_name": 1, "ingredient_name_local": 1, "alternative_names": 1}
+        async for ingredient in self.db.specialty_ingredients.find({"name_keys": {"$exists": False}}, projection):
+            batch.append(UpdateOne({"id": ingredient["id"]}, {"$set": {"name_keys": specialty_name_keys(ingredient)}}))
+            if len(batch) >= batch_size:
+                result = await self.db.specialty_ingredients.bulk_write(batch, ordered=False)
+                updated += result.modified_count
+                batch = []
+        if batch:
+            result = await self.db.specialty_ingredients.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+        return updated
+    
+    def ingredient_resolver(self) -> SpecialtyIngredientResolver:
+        """Fresh per-request resolver; share it across the lookups one request makes"""
+        return SpecialtyIngredientResolver(self.db)
+    
     async def find_ingredient_sources(self, ingredient_name: str, user_location: Dict[str, float], 
-                                    radius_km: float = 50) -> Dict[str, Any]:
+                                    radius_km: float = 50,
+                                    resolver: Optional[SpecialtyIngredientResolver] = None) -> Dict[str, Any]:
         """Find where to buy a specific specialty ingredient"""
-        
-        # Get ingredient details
-        ingredient = await self.db.specialty_ingredients.find_one(
-            {"ingredient_name": {"$regex": ingredient_name, "$options": "i"}}, {"_id": 0}
+        sources = await self.find_ingredient_sources_batch([ingredient_name], user_location, radius_km, resolver)
+        return sources.get(ingredient_name) or {"error": "Ingredient not found in specialty database"}
+    
+    async def find_ingredient_sources_batch(self, ingredient_names: List[str], user_location: Dict[str, float],
+                                            radius_km: float = 50,
+                                            resolver: Optional[SpecialtyIngredientResolver] = None) -> Dict[str, Dict[str, Any]]:
+        """Sourcing details for many ingredients: one ingredient query and one store query in total"""
+        resolver = resolver or self.ingredient_resolver()
+        ingredients = await resolver.resolve(ingredient_names)
+        
+        # Find nearby stores that carry these ingredients
+        found = {name: ingredient for name, ingredient in ingredients.items() if ingredient}
+        stores_by_ingredient = await self._find_stores_with_ingredients(
+            [ingredient["id"] for ingredient in found.values()], user_location, radius_km
         )
         
-        if not ingredient:
-            return {"error": "Ingredient not found in specialty database"}
-        
-        # Find nearby stores that carry this ingredient
-        nearby_stores = await self._find_stores_with_ingredient(ingredient_name, user_location, radius_km)
-        
-        # Get online sources
-        online_sources = ingredient.get("online_suppliers", [])
-        
-        # Calculate average price
-        price_data = ingredient.get("typical_price_range", {})
-        avg_price = sum(price_data.values()) / len(price_data) if price_data else 0
-        
-        return {
-            "ingredient_name": ingredient["ingredient_name"],
-            "ingredient_name_local": ingredient.get("ingredient_name_local"),
-            "alternative_names": ingredient.get("alternative_names", []),
-            "rarity_level": ingredient["rarity_level"],
-            "nearby_stores": nearby_stores,
-            "online_sources": online_sources,
-            "average_price": avg_price,
-            "substitutes": ingredient.get("common_substitutes", []),
-            "seasonal_info": ingredient.get("seasonal_availability", {}),
-            "storage_tips": ingredient.get("storage_requirements", []),
-            "cultural_uses": ingredient.get("cultural_uses", [])
-        }
+        sources = {}
+        for name, ingredient in ingredients.items():
+            if not ingredient:
+                sources[name] = {"error": "Ingredient not found in specialty database"}
+                continue
+            
+            # Calculate average price
+            price_data = ingredient.get("typical_price_range", {})
+            avg_price = sum(price_data.values()) / len(price_data) if price_data else 0
+            
+            sources[name] = {
+                "ingredient_name": ingredient["ingredient_name"],
+                "ingredient_name_local": ingredient.get("ingredient_name_local"),
+                "alternative_names": ingredient.get("alternative_names", []),
+                "rarity_level": ingredient["rarity_level"],
+                "nearby_stores": stores_by_ingredient.get(ingredient["id"], []),
+                "online_sources": ingredient.get("online_suppliers", []),
+                "average_price": avg_price,
+                "substitutes": ingredient.get("common_substitutes", []),
+                "seasonal_info": ingredient.get("seasonal_availability", {}),
+                "storage_tips": ingredient.get("storage_requirements", []),
+                "cultural_uses": ingredient.get("cultural_uses", [])
+            }
+        return sources
     
-    async def get_ingredient_substitutions(self, ingredient_name: str) -> Dict[str, Any]:
+    async def get_ingredient_substitutions(self, ingredient_name: str,
+                                           resolver: Optional[SpecialtyIngredientResolver] = None) -> Dict[str, Any]:
         """Get substitution suggestions for hard-to-find ingredients"""
-        
-        ingredient = await self.db.specialty_ingredients.find_one(
-            {"ingredient_name": {"$regex": ingredient_name, "$options": "i"}}, {"_id": 0}
-        )
+        resolver = resolver or self.ingredient_resolver()
+        ingredient = await resolver.get(ingredient_name)
         
         if not ingredient:
             return {"error": "Ingredient not found"}
@@ -287,7 +686,9 @@ class HeritageRecipesService:
             "common_substitutes": ingredient.get("common_substitutes", []),
             "substitution_ratios": ingredient.get("substitution_ratio", {}),
             "flavor_impact": "Check flavor profile - substitutes may alter taste",
-            "availability_comparison": await self._compare_substitute_availability(ingredient["common_substitutes"]),
+            "availability_comparison": await self._compare_substitute_availability(
+                ingredient.get("common_substitutes", []), resolver
+            ),
             "authenticity_note": "Using substitutes will modify the traditional recipe"
         }
     
@@ -300,8 +701,20 @@ class HeritageRecipesService:
             added_by=contributor_id,
             **store_data
         )
+        store.geo_location = geo_point(store.location)
         
         await self.db.ethnic_grocery_stores.insert_one(store.dict())
+        get_unified_search().publish_ethnic_store(store.dict())
+        
+        if store.is_active:
+            await self._update_insights({f"stores_by_country.{self._insights_key(store.country)}": 1})
+        
+        # Keep the ingredient -> stores mapping complete
+        if store.specialty_ingredients:
+            await self.db.specialty_ingredients.update_many(
+                {"id": {"$in": store.specialty_ingredients}},
+                {"$addToSet": {"available_at_stores": store.id}}
+            )
         
         # Update contributor stats
         await self.db.cultural_contributors.update_one(
@@ -312,6 +725,26 @@ class HeritageRecipesService:
         self.logger.info(f"Ethnic grocery store registered: {store.store_name}")
         return store
     
+    async def backfill_store_geo_points(self) -> Dict[str, int]:
+        """GeoJSON points for stores and chain locations saved before proximity indexing"""
+        stores = await self.db.ethnic_grocery_stores.update_many(
+            {
+                "geo_location": {"$exists": False},
+                "location.lat": {"$type": "number"},
+                "location.lng": {"$type": "number"}
+            },
+            [{"$set": {"geo_location": {"type": "Point", "coordinates": ["$location.lng", "$location.lat"]}}}]
+        )
+        
+        indexed_chains = set(await self.db.store_chain_locations.distinct("chain_id"))
+        chains = 0
+        async for chain in self.db.store_chains.find({"locations.0": {"$exists": True}}, {"_id": 0, "chain_id": 1, "name": 1, "locations": 1}):
+            if chain["chain_id"] not in indexed_chains:
+                await self._index_chain_locations(chain["chain_id"], chain.get("name", chain["chain_id"]), chain["locations"])
+                chains += 1
+        
+        return {"stores": stores.modified_count, "chains": chains}
+    
     async def find_nearby_ethnic_stores(self, user_location: Dict[str, float], 
                                       country_specialty: Optional[CountryRegion] = None,
                                       radius_km: float = 25) -> List[Dict[str, Any]]:
@@ -322,17 +755,10 @@ class HeritageRecipesService:
         if country_specialty:
             query["specialties"] = country_specialty
         
-        stores = await self.db.ethnic_grocery_stores.find(query, {"_id": 0}).to_list(length=100)
-        
-        # Filter by distance and add distance info
-        nearby_stores = []
-        for store in stores:
-            if store.get("location"):
-                distance = self.preservation_engine.calculate_distance_km(user_location, store["location"])
-                if distance <= radius_km:
-                    store["distance_km"] = round(distance, 1)
-                    store["estimated_travel_time"] = self._estimate_travel_time(distance)
-                    nearby_stores.append(store)
+        # Radius filter and distances come from the 2dsphere index
+        nearby_stores = await self._geo_near_stores(user_location, radius_km, query, limit=100)
+        for store in nearby_stores:
+            store["estimated_travel_time"] = self._estimate_travel_time(store["distance_km"])
         
         # Sort by distance and community rating
         nearby_stores.sort(key=lambda x: (x["distance_km"], -x.get("community_rating", 0)))
@@ -349,31 +775,54 @@ class HeritageRecipesService:
         )
         
         await self.db.heritage_collections.insert_one(collection.dict())
+        if collection.is_featured:
+            self.page_cache.pop("featured_collections", None)
         
         self.logger.info(f"Heritage collection created: {collection.collection_name}")
         return collection
     
     async def get_featured_collections(self) -> List[Dict[str, Any]]:
-        """Get featured heritage recipe collections"""
-        
-        collections = await self.db.heritage_collections.find(
-            {"is_featured": True}, {"_id": 0}
-        ).sort("created_at", -1).limit(10).to_list(length=10)
-        
-        # Enhance with recipe previews
-        for collection in collections:
-            if collection["recipe_ids"]:
-                # Get sample recipes from collection
-                sample_recipes = await self.db.heritage_recipes.find(
-                    {"id": {"$in": collection["recipe_ids"][:3]}}, {"_id": 0}
-                ).to_list(length=3)
-                collection["sample_recipes"] = sample_recipes
+        """Get featured heritage recipe collections, with up to three sample recipes each, in one aggregation"""
+        cached = self._get_cached("featured_collections")
+        if cached is not None:
+            return cached
+        
+        collections = await self.db.heritage_collections.aggregate([
+            {"$match": {"is_featured": True}},
+            {"$sort": {"created_at": -1}},
+            {"$limit": 10},
+            # Recipe previews: the first three recipe ids, joined through the heritage_recipes id index
+            {"$addFields": {"sample_recipe_ids": {"$slice": [{"$ifNull": ["$recipe_ids", []]}, 3]}}},
+            {"$lookup": {
+                "from": "heritage_recipes",
+                "localField": "sample_recipe_ids",
+                "foreignField": "id",
+                "as": "sample_recipes"
+            }},
+            {"$project": {"_id": 0, "sample_recipe_ids": 0, "sample_recipes._id": 0,
+                          "sample_recipes.minhash_signature": 0, "sample_recipes.lsh_bands": 0}}
+        ]).to_list(length=10)
         
+        self._save_cached("featured_collections", collections)
         return collections
     
     async def get_diaspora_recommendations(self, user_heritage: List[CountryRegion], 
                                         user_location: Dict[str, float]) -> Dict[str, Any]:
-        """Get personalized recommendations for diaspora community members"""
+        """
+        Get personalized recommendations for diaspora community members.
+        
+        Comfort recipes for every heritage come from one $unionWith aggregation,
+        fetched alongside the store query, and the rare ingredients of the
+        nearest stores from one $in query. Results are cached per ordered heritage
+        list (the first heritage picks the stores) and ~5 km location cell, with
+        distances measured from the cell centre.
+        """
+        cell = (round(user_location["lat"] / 0.05) * 0.05, round(user_location["lng"] / 0.05) * 0.05)
+        cache_key = ("diaspora", tuple(getattr(heritage, "value", heritage) for heritage in user_heritage),
+                     round(cell[0], 2), round(cell[1], 2))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
         recommendations = {
             "comfort_recipes": [],
@@ -383,31 +832,32 @@ class HeritageRecipesService:
             "community_events": []
         }
         
-        # Get comfort food recipes from user's heritage
-        for heritage in user_heritage:
-            comfort_recipes = await self.db.heritage_recipes.find({
-                "country_region": heritage,
-                "cultural_significance": CulturalSignificance.DIASPORA_COMFORT,
-                "is_public": True
-            }, {"_id": 0}).limit(5).to_list(length=5)
-            recommendations["comfort_recipes"].extend(comfort_recipes)
-        
-        # Find nearby ethnic stores
-        nearby_stores = await self.find_nearby_ethnic_stores(user_location, user_heritage[0] if user_heritage else None)
+        # Comfort food recipes from the user's heritage, fetched together with nearby ethnic stores
+        comfort_recipes, nearby_stores = await asyncio.gather(
+            self._get_comfort_recipes(user_heritage),
+            self.find_nearby_ethnic_stores({"lat": cell[0], "lng": cell[1]}, user_heritage[0] if user_heritage else None)
+        )
+        recommendations["comfort_recipes"] = comfort_recipes
         recommendations["nearby_stores"] = nearby_stores[:5]
         
-        # Check for rare ingredients currently available
-        for store in nearby_stores[:3]:
-            if store.get("specialty_ingredients"):
-                rare_items = await self.db.specialty_ingredients.find({
-                    "id": {"$in": store["specialty_ingredients"]},
-                    "rarity_level": {"$in": ["rare", "imported_only"]}
-                }, {"_id": 0}).limit(3).to_list(length=3)
-                if rare_items:
-                    recommendations["rare_ingredients_available"].extend([
-                        {**item, "available_at": store["store_name"]} for item in rare_items
-                    ])
-        
+        # Check for rare ingredients currently available at the nearest stores
+        stores = [store for store in nearby_stores[:3] if store.get("specialty_ingredients")]
+        ingredient_ids = list(dict.fromkeys(
+            ingredient_id for store in stores for ingredient_id in store["specialty_ingredients"]
+        ))
+        if ingredient_ids:
+            rare_items = await self.db.specialty_ingredients.find({
+                "id": {"$in": ingredient_ids},
+                "rarity_level": {"$in": ["rare", "imported_only"]}
+            }, {"_id": 0}).to_list(length=None)
+            rare_by_id = {item["id"]: item for item in rare_items}
+            for store in stores:
+                store_items = [rare_by_id[i] for i in store["specialty_ingredients"] if i in rare_by_id][:3]
+                recommendations["rare_ingredients_available"].extend([
+                    {**item, "available_at": store["store_name"]} for item in store_items
+                ])
+        
+        self._save_cached(cache_key, recommendations)
         return recommendations
     
     # COMMUNITY VERIFICATION & AUTHENTICITY
@@ -422,8 +872,9 @@ class HeritageRecipesService:
             return {"error": "Insufficient verification credentials"}
         
         # Update recipe with verification
+        rating = float(verification_data["authenticity_rating"])
         verification_entry = {
-            f"community_ratings.{verifier_id}": verification_data["authenticity_rating"],
+            f"community_ratings.{verifier_id}": rating,
             "verified_by": verifier_id,
             "updated_at": datetime.utcnow()
         }
@@ -431,10 +882,12 @@ class HeritageRecipesService:
         if verification_data.get("elder_verification"):
             verification_entry["elder_approved"] = True
         
-        await self.db.heritage_recipes.update_one(
-            {"id": recipe_id},
-            {"$set": verification_entry}
-        )
+        if not await self._apply_rating(recipe_id, verifier_id, rating, verification_entry):
+            return {"error": "Recipe not found"}
+        
+        if verification_data.get("elder_verification"):
+            # Elder-approved recipes leave the preservation priority list
+            await self._update_insights({}, {"$pull": {"preservation_priority_recipes": {"id": recipe_id}}})
         
         # Update verifier stats
         await self.db.cultural_contributors.update_one(
@@ -446,22 +899,78 @@ class HeritageRecipesService:
     
     # ANALYTICS & INSIGHTS
     
+    async def record_recipe_engagement(self, recipe_id: str, user_id: str, action: str) -> Dict[str, Any]:
+        """
+        Record a like (toggles), share or tried-it on a heritage recipe. Likes and
+        tries count once per user; the recipe counters and the insights move by $inc.
+        """
+        counter = {"like": "likes_count", "share": "shares_count", "tried": "tried_count"}.get(action)
+        if counter is None:
+            raise ValueError(f"Unsupported engagement action: {action}")
+        if not await self.db.heritage_recipes.find_one({"id": recipe_id}, {"_id": 0, "id": 1}):
+            return {"error": "Recipe not found"}
+        
+        delta = 1
+        active = True
+        if action in ("like", "tried"):
+            marker = {"recipe_id": recipe_id, "user_id": user_id, "action": action}
+            try:
+                await self.db.heritage_recipe_engagement.insert_one({**marker, "created_at": datetime.utcnow()})
+            except DuplicateKeyError:
+                if action == "tried":
+                    return {"recorded": False, "active": True}
+                # Second like from the same user is an unlike; a concurrent unlike
+                # that removed the marker first already took the like back
+                result = await self.db.heritage_recipe_engagement.delete_one(marker)
+                if result.deleted_count != 1:
+                    return {"recorded": False, "active": False}
+                delta, active = -1, False
+        
+        recipe = await self.db.heritage_recipes.find_one_and_update(
+            {"id": recipe_id},
+            {"$inc": {counter: delta}},
+            projection={"_id": 0, counter: 1},
+            return_document=ReturnDocument.AFTER
+        )
+        await self._update_insights({f"community_engagement_stats.{INSIGHTS_COUNTERS[counter]}": delta})
+        return {"recorded": True, "active": active, counter: (recipe or {}).get(counter, 0)}
+    
     async def get_preservation_insights(self) -> Dict[str, Any]:
-        """Get insights about cultural preservation efforts"""
+        """Get insights about cultural preservation efforts from the rolled-up insights document"""
+        insights = await self.db.heritage_insights.find_one({"id": INSIGHTS_ID}, {"_id": 0})
+        if insights is None or not insights.get("reconciled_at"):
+            insights = await self.reconcile_preservation_insights()
+        
+        def top(counts: Dict[str, int], field: str, limit: int) -> List[Dict[str, Any]]:
+            ranked = sorted(((key, count) for key, count in (counts or {}).items() if count > 0), key=lambda item: -item[1])
+            return [{"_id": key, field: count} for key, count in ranked[:limit]]
+        
+        engagement = insights.get("community_engagement_stats", {})
+        return {
+            "total_recipes_preserved": insights.get("total_recipes_preserved", 0),
+            "recipes_by_country": top(insights.get("recipes_by_country"), "count", 10),
+            "ingredient_rarity_distribution": top(insights.get("ingredient_rarity"), "count", 10),
+            "active_cultural_contributors": insights.get("active_cultural_contributors", 0),
+            "store_coverage_by_country": top(insights.get("stores_by_country"), "store_count", 20),
+            "preservation_priority_recipes": insights.get("preservation_priority_recipes", []),
+            "community_engagement_stats": {name: engagement.get(name, 0) for name in INSIGHTS_COUNTERS.values()},
+            "updated_at": insights.get("updated_at")
+        }
+    
+    async def reconcile_preservation_insights(self) -> Dict[str, Any]:
+        """Recompute heritage_insights from the source collections, correcting any drift in the counters"""
         
         # Recipe preservation stats
         total_recipes = await self.db.heritage_recipes.count_documents({"is_public": True})
         recipes_by_country = await self.db.heritage_recipes.aggregate([
             {"$match": {"is_public": True}},
-            {"$group": {"_id": "$country_region", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]).to_list(length=10)
+            {"$group": {"_id": "$country_region", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
         
         # Ingredient rarity distribution
         ingredient_rarity = await self.db.specialty_ingredients.aggregate([
             {"$group": {"_id": "$rarity_level", "count": {"$sum": 1}}}
-        ]).to_list(length=10)
+        ]).to_list(length=None)
         
         # Active contributors
         active_contributors = await self.db.cultural_contributors.count_documents({
@@ -471,29 +980,366 @@ class HeritageRecipesService:
         # Store coverage
         store_coverage = await self.db.ethnic_grocery_stores.aggregate([
             {"$match": {"is_active": True}},
-            {"$group": {"_id": "$country", "store_count": {"$sum": 1}}},
-            {"$sort": {"store_count": -1}}
-        ]).to_list(length=20)
+            {"$group": {"_id": "$country", "store_count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        
+        # Community engagement, one pass for all three counters
+        engagement = await self.db.heritage_recipes.aggregate([
+            {"$group": {"_id": None, **{
+                name: {"$sum": f"${counter}"} for counter, name in INSIGHTS_COUNTERS.items()
+            }}}
+        ]).to_list(length=1)
         
-        return {
+        now = datetime.utcnow()
+        insights = {
+            "id": INSIGHTS_ID,
             "total_recipes_preserved": total_recipes,
-            "recipes_by_country": recipes_by_country,
-            "ingredient_rarity_distribution": ingredient_rarity,
+            "recipes_by_country": {self._insights_key(row["_id"]): row["count"] for row in recipes_by_country},
+            "ingredient_rarity": {self._insights_key(row["_id"]): row["count"] for row in ingredient_rarity},
             "active_cultural_contributors": active_contributors,
-            "store_coverage_by_country": store_coverage,
+            "stores_by_country": {self._insights_key(row["_id"]): row["store_count"] for row in store_coverage},
             "preservation_priority_recipes": await self._get_priority_preservation_recipes(),
-            "community_engagement_stats": await self._get_community_engagement_stats()
+            "community_engagement_stats": {
+                name: (engagement[0][name] if engagement else 0) for name in INSIGHTS_COUNTERS.values()
+            },
+            "updated_at": now,
+            "reconciled_at": now
+        }
+        await self.db.heritage_insights.replace_one({"id": INSIGHTS_ID}, insights, upsert=True)
+        return insights
+    
+    async def run_insights_reconciliation(self, interval_hours: float = 6):
+        """Periodically rebuild heritage_insights from scratch"""
+        while True:
+            try:
+                await self.reconcile_preservation_insights()
+            except Exception as e:
+                self.logger.error(f"Heritage insights reconciliation failed: {str(e)}")
+            await asyncio.sleep(interval_hours * 3600)
+    
+    # USER HERITAGE CONTRIBUTIONS
+    
+    async def record_user_contribution(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        """
+        Move the heritage_contributions rollup from a user's old profile to the new
+        one (None for a new or removed user): the old contribution is taken back and
+        the new one added, all by $inc, $push and $pull.
+        """
+        old, new = user_heritage_contribution(before), user_heritage_contribution(after)
+        if old == new:
+            return
+        if self._contributions_rebuilding:
+            # The rebuild may or may not have read this user yet; another pass counts it exactly once
+            self._contributions_missed = True
+            return
+        operations = self._contribution_updates(old, -1) + self._contribution_updates(new, 1)
+        try:
+            await self.db.heritage_contributions.bulk_write(operations, ordered=True)
+        except Exception as e:
+            self.logger.error(f"Failed to update heritage contributions: {str(e)}")
+    
+    async def rebuild_user_contributions(self, batch_size: int = 500, max_passes: int = 3) -> int:
+        """
+        Rebuild heritage_contributions from the users collection; returns the contributor count.
+        Profile changes during a pass are not applied incrementally, since the scan may
+        already have counted them; the rebuild runs again until a pass sees none.
+        """
+        self._contributions_rebuilding = True
+        try:
+            for _ in range(max_passes):
+                self._contributions_missed = False
+                contributors = await self._rebuild_contributions_pass(batch_size)
+                if not self._contributions_missed:
+                    break
+            else:
+                self.logger.warning("Heritage contributions changed during every rebuild pass; totals may drift until the next rebuild")
+            return contributors
+        finally:
+            self._contributions_rebuilding = False
+    
+    async def backfill_user_contributions(self) -> int:
+        """Build heritage_contributions once, when it has never been built"""
+        if await self.db.heritage_contributions.find_one({"kind": "summary", "key": "all"}, {"_id": 0, "key": 1}):
+            return 0
+        return await self.rebuild_user_contributions()
+    
+    async def get_user_contributions(self) -> Dict[str, Any]:
+        """Heritage contribution totals from user registrations, read from the rollup"""
+        
+        def ranked(kind: str, limit: Optional[int]):
+            query = self.db.heritage_contributions.find(
+                {"kind": kind, "count": {"$gt": 0}}, {"_id": 0, "key": 1, "name": 1, "count": 1}
+            ).sort("count", -1)
+            return query.limit(limit).to_list(length=limit) if limit else query.to_list(length=None)
+        
+        summary, cultures, dishes, specialties = await asyncio.gather(
+            self.db.heritage_contributions.find_one({"kind": "summary", "key": "all"}, {"_id": 0}),
+            ranked("culture", None),
+            ranked("dish", 20),
+            ranked("specialty", 15)
+        )
+        summary = summary or {}
+        return {
+            "total_contributors": summary.get("count", 0),
+            "cultural_backgrounds": {culture["key"]: culture["count"] for culture in cultures},
+            "top_native_dishes": {dish["name"]: dish["count"] for dish in dishes},
+            "top_consultation_specialties": {specialty["name"]: specialty["count"] for specialty in specialties},
+            "recent_contributors": summary.get("recent_contributors", [])
+        }
+    
+    async def get_dishes_by_culture(self, cultural_background: str, limit: int = 50) -> Dict[str, Any]:
+        """Native dishes contributed by users whose cultural background contains the given text"""
+        wanted = " ".join(cultural_background.split()).lower()
+        # Only the culture keys are matched by text; the dishes are an indexed $in on them
+        cultures = await self.db.heritage_contributions.find(
+            {"kind": "culture", "key": {"$regex": re.escape(wanted)}, "dish_contributors": {"$gt": 0}},
+            {"_id": 0, "key": 1, "dish_contributors": 1, "dish_entries": 1}
+        ).to_list(length=None)
+        
+        dishes_data = []
+        if cultures:
+            culture_dishes = await self.db.heritage_contributions.find(
+                {"kind": "culture_dish", "culture": {"$in": [culture["key"] for culture in cultures]}, "count": {"$gt": 0}},
+                {"_id": 0, "name": 1, "contributors": 1}
+            ).sort("count", -1).limit(limit).to_list(length=limit)
+            for dish in culture_dishes:
+                for contributor in dish.get("contributors", []):
+                    dishes_data.append({"dish_name": dish["name"], "contributor": contributor["username"],
+                                        "consultation_available": contributor["consultation_available"],
+                                        "specialties": contributor["specialties"]})
+        
+        return {
+            "cultural_background": cultural_background,
+            "total_contributors": sum(culture.get("dish_contributors", 0) for culture in cultures),
+            "dishes": dishes_data[:limit],
+            "total_dishes": sum(culture.get("dish_entries", 0) for culture in cultures)
         }
     
     # PRIVATE HELPER METHODS
     
-    async def _get_ingredient_availability(self, ingredient_list: List[str]) -> Dict[str, str]:
+    async def _rebuild_contributions_pass(self, batch_size: int) -> int:
+        await self.db.heritage_contributions.delete_many({})
+        
+        contributors = 0
+        operations = []
+        cursor = self.db.users.find({
+            "$or": [
+                {"native_dishes": {"$nin": [None, ""]}},
+                {"consultation_specialties": {"$nin": [None, ""]}},
+                {"cultural_background": {"$nin": [None, ""]}}
+            ]
+        }, {"_id": 0, "username": 1, "native_dishes": 1, "consultation_specialties": 1, "cultural_background": 1})
+        async for user in cursor:
+            updates = self._contribution_updates(user_heritage_contribution(user), 1)
+            if updates:
+                contributors += 1
+                operations.extend(updates)
+            if len(operations) >= batch_size:
+                await self.db.heritage_contributions.bulk_write(operations, ordered=True)
+                operations = []
+        if operations:
+            await self.db.heritage_contributions.bulk_write(operations, ordered=True)
+        if not contributors:
+            # Leave the summary behind so an empty rollup is not rebuilt on every start
+            await self.db.heritage_contributions.update_one(
+                {"kind": "summary", "key": "all"}, {"$setOnInsert": {"count": 0, "recent_contributors": []}}, upsert=True
+            )
+        return contributors
+    
+    def _contribution_updates(self, contribution: Optional[Dict[str, Any]], sign: int) -> List[UpdateOne]:
+        """heritage_contributions updates adding (sign 1) or taking back (sign -1) one user's contribution"""
+        if not contribution:
+            return []
+        adding = sign > 0
+        username = contribution["username"]
+        
+        def counter(kind: str, key: str, name: str, inc: Dict[str, int], fields: Optional[Dict[str, Any]] = None,
+                    sample: Optional[Tuple[str, Dict[str, Any], int, int]] = None) -> UpdateOne:
+            update: Dict[str, Any] = {"$inc": {field: amount * sign for field, amount in inc.items()}}
+            if adding:
+                update["$setOnInsert"] = {"name": name, **(fields or {})}
+            if sample:
+                field, entry, position, size = sample
+                if adding:
+                    update["$push"] = {field: {"$each": [entry], "$position": position, "$slice": size}}
+                else:
+                    update["$pull"] = {field: {"username": username}}
+            return UpdateOne({"kind": kind, "key": key}, update, upsert=adding)
+        
+        recent = {field: contribution[field] for field in
+                  ("username", "cultural_background", "native_dishes", "consultation_specialties")}
+        operations = [counter("summary", "all", "all", {"count": 1},
+                              sample=("recent_contributors", recent, 0, RECENT_CONTRIBUTORS))]
+        
+        culture = contribution["culture"]
+        dishes = contribution["dishes"]
+        if culture:
+            operations.append(counter("culture", culture, contribution["cultural_background"], {
+                "count": 1, "dish_contributors": 1 if dishes else 0, "dish_entries": len(dishes)
+            }))
+            contributor = {"username": username, "consultation_available": bool(contribution["specialties"]),
+                           "specialties": contribution["consultation_specialties"]}
+            for key, name in dishes.items():
+                operations.append(counter("culture_dish", f"{culture}|{key}", name, {"count": 1}, {"culture": culture},
+                                          sample=("contributors", contributor, 0, CONTRIBUTION_SAMPLE_SIZE)))
+        for key, name in dishes.items():
+            operations.append(counter("dish", key, name, {"count": 1}))
+        for key, name in contribution["specialties"].items():
+            operations.append(counter("specialty", key, name, {"count": 1}))
+        return operations
+    
+    async def _duplicate_fields(self, recipe: Dict[str, Any], unsaved: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Fingerprint fields for a recipe about to be stored, joining the duplicate
+        cluster of its closest earlier near-duplicate (or starting its own).
+        unsaved: fingerprinted recipes not written yet, also considered as earlier recipes
+        """
+        minhasher = get_recipe_minhasher()
+        fields = minhasher.fingerprint(recipe)
+        fields.update({"duplicate_cluster_id": recipe["id"], "duplicate_of": None, "duplicate_similarity": 0.0})
+        if not fields["minhash_signature"]:
+            return fields
+        
+        matches = await self.find_near_duplicates({**recipe, **fields}, limit=1)
+        bands = set(fields["lsh_bands"])
+        for other in unsaved or []:
+            if bands.isdisjoint(other["lsh_bands"]):
+                continue
+            similarity = minhasher.similarity(fields["minhash_signature"], other["minhash_signature"])
+            if similarity >= DUPLICATE_THRESHOLD:
+                matches.append({"id": other["id"], "duplicate_cluster_id": other["duplicate_cluster_id"],
+                                "similarity": round(similarity, 3)})
+        matches.sort(key=lambda match: (-match["similarity"], match["id"]))
+        if matches:
+            closest = matches[0]
+            cluster_id = closest.get("duplicate_cluster_id")
+            if not cluster_id:
+                # Recipe stored before clustering; it founds the cluster
+                cluster_id = closest["id"]
+                await self.db.heritage_recipes.update_one({"id": closest["id"]}, {"$set": {"duplicate_cluster_id": cluster_id}})
+            fields.update({
+                "duplicate_cluster_id": cluster_id,
+                "duplicate_of": closest["id"],
+                "duplicate_similarity": closest["similarity"]
+            })
+            self.logger.info(f"Heritage recipe {recipe['id']} is a near-duplicate of {closest['id']} ({closest['similarity']})")
+        return fields
+    
+    async def _write_duplicate_fields(self, fingerprinted: List[Dict[str, Any]]) -> int:
+        """Store backfilled fingerprint fields in one unordered bulk write"""
+        await self.db.heritage_recipes.bulk_write([
+            UpdateOne({"id": fields["id"]}, {"$set": {k: v for k, v in fields.items() if k != "id"}})
+            for fields in fingerprinted
+        ], ordered=False)
+        return len(fingerprinted)
+    
+    async def _update_insights(self, inc: Dict[str, int], extra: Optional[Dict[str, Any]] = None):
+        """Apply counter changes to the heritage_insights document; reconciliation repairs any miss"""
+        update = {"$set": {"updated_at": datetime.utcnow()}, **(extra or {})}
+        if inc:
+            update["$inc"] = inc
+        try:
+            await self.db.heritage_insights.update_one({"id": INSIGHTS_ID}, update, upsert=True)
+        except Exception as e:
+            self.logger.error(f"Failed to update heritage insights: {str(e)}")
+    
+    def _insights_key(self, value: Any) -> str:
+        """Map a country or rarity value to a safe field name in heritage_insights"""
+        key = str(getattr(value, "value", value) or "unknown")
+        return key.replace(".", "_").lstrip("$") or "unknown"
+    
+    async def _get_comfort_recipes(self, user_heritage: List[CountryRegion], per_heritage: int = 5) -> List[Dict[str, Any]]:
+        """Up to per_heritage diaspora comfort recipes for each heritage, in one aggregation"""
+        if not user_heritage:
+            return []
+        
+        def branch(heritage):
+            return [
+                {"$match": {
+                    "country_region": heritage,
+                    "cultural_significance": CulturalSignificance.DIASPORA_COMFORT,
+                    "is_public": True
+                }},
+                {"$limit": per_heritage},
+                {"$project": RECIPE_PROJECTION}
+            ]
+        
+        pipeline = branch(user_heritage[0]) + [
+            {"$unionWith": {"coll": "heritage_recipes", "pipeline": branch(heritage)}}
+            for heritage in user_heritage[1:]
+        ]
+        return await self.db.heritage_recipes.aggregate(pipeline).to_list(length=None)
+    
+    def _get_cached(self, key: Any) -> Optional[Any]:
+        entry = self.page_cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["timestamp"] > self.page_cache_ttl:
+            del self.page_cache[key]
+            return None
+        self.page_cache.move_to_end(key)
+        return entry["data"]
+    
+    def _save_cached(self, key: Any, data: Any):
+        self.page_cache[key] = {"data": data, "timestamp": time.time()}
+        self.page_cache.move_to_end(key)
+        while len(self.page_cache) > self.page_cache_size:
+            self.page_cache.popitem(last=False)
+    
+    async def _apply_rating(self, recipe_id: str, verifier_id: str, rating: float,
+                            changes: Dict[str, Any], attempts: int = 5) -> bool:
+        """
+        Record a verifier's rating and refresh the materialized score in one update.
+        
+        rating_sum/rating_count move by the difference from the verifier's previous
+        rating (a re-rating replaces it), and authenticity_score is recomputed from
+        the stored fields inside the same pipeline update. The update only applies
+        if the previous rating is still the one read, so concurrent ratings retry.
+        """
+        rating_field = f"community_ratings.{verifier_id}"
+        for _ in range(attempts):
+            current = await self.db.heritage_recipes.find_one({"id": recipe_id}, {"_id": 0, rating_field: 1})
+            if current is None:
+                return False
+            previous = (current.get("community_ratings") or {}).get(verifier_id)
+            
+            result = await self.db.heritage_recipes.update_one(
+                {"id": recipe_id, rating_field: previous if previous is not None else {"$exists": False}},
+                [
+                    {"$set": {
+                        **changes,
+                        "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0.0]}, rating - (previous or 0.0)]},
+                        "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, 0 if previous is not None else 1]}
+                    }},
+                    {"$set": {"authenticity_score": self.preservation_engine.authenticity_score_expression()}}
+                ]
+            )
+            if result.matched_count:
+                return True
+        self.logger.warning(f"Gave up recording rating from {verifier_id} on heritage recipe {recipe_id} after {attempts} attempts")
+        return False
+    
+    def _encode_search_cursor(self, relevance: float, recipe_id: str) -> str:
+        payload = json.dumps({"relevance": relevance, "id": recipe_id}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+    
+    def _decode_search_cursor(self, cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not cursor:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return {"relevance": float(data["relevance"]), "id": str(data["id"])}
+        except Exception:
+            raise ValueError("Invalid search cursor")
+    
+    async def _get_ingredient_availability(self, ingredient_list: List[str],
+                                           resolver: Optional[SpecialtyIngredientResolver] = None) -> Dict[str, str]:
         """Check availability of specialty ingredients"""
+        resolver = resolver or self.ingredient_resolver()
+        resolved = await resolver.resolve(ingredient_list)
         availability = {}
         for ingredient_name in ingredient_list:
-            ingredient_data = await self.db.specialty_ingredients.find_one(
-                {"ingredient_name": {"$regex": ingredient_name, "$options": "i"}}, {"_id": 0}
-            )
+            ingredient_data = resolved.get(ingredient_name)
             if ingredient_data:
                 rarity = ingredient_data.get("rarity_level", "unknown")
                 store_count = len(ingredient_data.get("available_at_stores", []))
@@ -510,32 +1356,58 @@ class HeritageRecipesService:
         
         return availability
     
-    async def _find_stores_with_ingredient(self, ingredient_name: str, user_location: Dict[str, float], 
-                                         radius_km: float) -> List[Dict[str, Any]]:
-        """Find stores that carry a specific ingredient"""
-        
-        # Get ingredient ID
-        ingredient = await self.db.specialty_ingredients.find_one(
-            {"ingredient_name": {"$regex": ingredient_name, "$options": "i"}}, {"_id": 0}
+    async def _find_stores_with_ingredients(self, ingredient_ids: List[str], user_location: Dict[str, float], 
+                                          radius_km: float) -> Dict[str, List[Dict[str, Any]]]:
+        """Nearby active stores carrying each ingredient, nearest first, from one indexed geo query"""
+        if not ingredient_ids:
+            return {}
+        
+        # (geo_location, specialty_ingredients, is_active) index: the ingredient -> nearby stores mapping
+        stores = await self._geo_near_stores(
+            user_location, radius_km,
+            {"specialty_ingredients": {"$in": ingredient_ids}, "is_active": True},
+            limit=50 * len(ingredient_ids)
         )
         
-        if not ingredient:
+        wanted = set(ingredient_ids)
+        stores_by_ingredient: Dict[str, List[Dict[str, Any]]] = {}
+        for store in stores:
+            for ingredient_id in wanted.intersection(store.get("specialty_ingredients", [])):
+                stores_by_ingredient.setdefault(ingredient_id, []).append(store)
+        return stores_by_ingredient
+    
+    async def _geo_near_stores(self, user_location: Dict[str, float], radius_km: float,
+                               query: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Ethnic stores matching query within radius_km, nearest first, with distance_km"""
+        near = geo_point(user_location)
+        if near is None:
             return []
-        
-        # Find stores that carry this ingredient
-        stores = await self.db.ethnic_grocery_stores.find({
-            "specialty_ingredients": ingredient["id"],
-            "is_active": True
-        }, {"_id": 0}).to_list(length=50)
-        
-        # Filter by distance
-        nearby_stores = []
+        stores = await self.db.ethnic_grocery_stores.aggregate([
+            {"$geoNear": {
+                "near": near,
+                "key": "geo_location",
+                "distanceField": "distance_m",
+                "maxDistance": radius_km * 1000,
+                "query": query,
+                "spherical": True
+            }},
+            {"$limit": limit},
+            {"$project": {"_id": 0}}
+        ]).to_list(length=limit)
         for store in stores:
-            if store.get("location"):
-                distance = self.preservation_engine.calculate_distance_km(user_location, store["location"])
-                if distance <= radius_km:
-                    store["distance_km"] = round(distance, 1)
-                    nearby_stores.append(store)
+            store["distance_km"] = round(store.pop("distance_m") / 1000, 1)
+        return stores
+    
+    async def _index_chain_locations(self, chain_id: str, chain_name: str, locations: List[Dict[str, Any]]):
+        """Replace a chain's rows in store_chain_locations (one GeoJSON point per location)"""
+        await self.db.store_chain_locations.delete_many({"chain_id": chain_id})
+        rows = [
+            {**location, "chain_id": chain_id, "chain_name": chain_name, "geo_location": geo_point(location.get("location"))}
+            for location in locations
+        ]
+        rows = [row for row in rows if row["geo_location"]]
+        if rows:
+            await self.db.store_chain_locations.insert_many(rows)
     
     # WEB SCRAPING & INTEGRATION WITH ETHNIC STORE CHAINS
     
@@ -600,6 +1472,9 @@ class HeritageRecipesService:
         
         chain_info = chain_mapping[chain_name.lower()]
         
+        # Chain locations are also stored one per document for 2dsphere lookups
+        await self._index_chain_locations(chain_name.lower(), chain_info["name"], chain_data.get("locations", []))
+        
         # Store chain information for future integration
         await self.db.store_chains.update_one(
             {"chain_id": chain_name.lower()},
@@ -637,6 +1512,36 @@ class HeritageRecipesService:
             "likely_available_at": []
         }
         
+        # Origins for the specialty region match, looked up once for every chain
+        ingredient_data = await self.ingredient_resolver().get(ingredient_name)
+        ingredient_origins = ingredient_data.get("origin_countries", []) if ingredient_data else []
+        
+        # Chains whose synced catalog currently stocks the ingredient
+        terms = get_ingredient_canonicalizer().canonical_terms(ingredient_name)
+        stocked_chains = set(await self.db.chain_inventory.distinct(
+            "chain_id", {"ingredient_terms": {"$in": terms}, "in_stock": True}
+        )) if terms else set()
+        
+        # Nearby locations of every chain, nearest first, from one geo query
+        locations_by_chain: Dict[str, List[Dict[str, Any]]] = {}
+        if chains and geo_point(user_location):
+            nearby = await self.db.store_chain_locations.aggregate([
+                {"$geoNear": {
+                    "near": geo_point(user_location),
+                    "key": "geo_location",
+                    "distanceField": "distance_m",
+                    "maxDistance": radius_km * 1000,
+                    "query": {"chain_id": {"$in": [chain.get("chain_id") for chain in chains]}},
+                    "spherical": True
+                }},
+                {"$project": {"_id": 0, "geo_location": 0}}
+            ]).to_list(length=None)
+            for location in nearby:
+                chain_id = location.pop("chain_id")
+                location.pop("chain_name", None)
+                location["distance_km"] = round(location.pop("distance_m") / 1000, 1)
+                locations_by_chain.setdefault(chain_id, []).append(location)
+        
         # Check ingredient against chain specialties
         for chain in chains:
             chain_score = 0
@@ -652,30 +1557,16 @@ class HeritageRecipesService:
                     chain_score += 2
             
             # Check specialty region match
-            ingredient_data = await self.db.specialty_ingredients.find_one(
-                {"ingredient_name": {"$regex": ingredient_name, "$options": "i"}}, {"_id": 0}
-            )
+            if any(origin in specialties for origin in ingredient_origins):
+                chain_score += 3
             
-            if ingredient_data:
-                ingredient_origins = ingredient_data.get("origin_countries", [])
-                specialty_match = any(origin in specialties for origin in ingredient_origins)
-                if specialty_match:
-                    chain_score += 3
-            
-            # Find nearby locations for this chain
-            chain_locations = chain.get("locations", [])
-            nearby_locations = []
+            # In stock according to the last inventory sync
+            in_inventory = chain.get("chain_id") in stocked_chains
+            if in_inventory:
+                chain_score += 4
             
-            for location in chain_locations:
-                if location.get("location"):
-                    distance = self.preservation_engine.calculate_distance_km(
-                        user_location, location["location"]
-                    )
-                    if distance <= radius_km:
-                        nearby_locations.append({
-                            **location,
-                            "distance_km": round(distance, 1)
-                        })
+            # Nearby locations for this chain
+            nearby_locations = locations_by_chain.get(chain.get("chain_id"), [])
             
             if chain_score > 0 or nearby_locations:
                 availability_results["chain_availability"].append({
@@ -685,6 +1576,7 @@ class HeritageRecipesService:
                     "nearby_locations": len(nearby_locations),
                     "closest_location": nearby_locations[0] if nearby_locations else None,
                     "chain_specialties": specialties,
+                    "in_synced_inventory": in_inventory,
                     "website_integration": chain.get("website_integration", False)
                 })
                 
@@ -697,52 +1589,23 @@ class HeritageRecipesService:
         return availability_results
     
     async def sync_store_chain_inventory(self, chain_name: str) -> Dict[str, Any]:
-        """Sync inventory data from store chain websites (future implementation)"""
-        
-        # This is a placeholder for future web scraping integration
-        # Each chain would need specific scraping logic
-        
-        chain_scrapers = {
-            "h_mart": self._scrape_hmart_inventory,
-            "patel_brothers": self._scrape_patel_inventory,
-            "ranch_99": self._scrape_ranch99_inventory
-        }
-        
-        if chain_name.lower() not in chain_scrapers:
-            return {"error": f"No scraper available for {chain_name}"}
-        
-        # For now, return placeholder data
-        return {
-            "success": True,
-            "chain": chain_name,
-            "last_sync": datetime.utcnow().isoformat(),
-            "items_synced": 0,
-            "status": "scraper_not_implemented",
-            "note": "Web scraping integration coming soon"
-        }
-    
-    async def _scrape_hmart_inventory(self) -> Dict[str, Any]:
-        """Scrape H-Mart website for Korean/Asian ingredient availability"""
-        # Placeholder for H-Mart specific scraping logic
-        return {"status": "not_implemented"}
-    
-    async def _scrape_patel_inventory(self) -> Dict[str, Any]:
-        """Scrape Patel Brothers website for Indian ingredient availability"""
-        # Placeholder for Patel Brothers specific scraping logic
-        return {"status": "not_implemented"}
-    
-    async def _scrape_ranch99_inventory(self) -> Dict[str, Any]:
-        """Scrape 99 Ranch Market website for Asian ingredient availability"""
-        # Placeholder for 99 Ranch specific scraping logic
-        return {"status": "not_implemented"}
+        """Start a background inventory sync for a store chain; poll the returned run for progress"""
+        try:
+            return await self.inventory_sync.start(chain_name.lower())
+        except ValueError as e:
+            return {"error": str(e)}
     
-    async def _compare_substitute_availability(self, substitutes: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    async def _compare_substitute_availability(self, substitutes: List[Dict[str, str]],
+                                               resolver: Optional[SpecialtyIngredientResolver] = None) -> List[Dict[str, Any]]:
         """Compare availability of substitute ingredients"""
+        substitute_names = [substitute.get("substitute", "") for substitute in substitutes]
+        sources = await self.find_ingredient_sources_batch(
+            [name for name in substitute_names if name], {"lat": 0, "lng": 0}, 1000, resolver
+        )
         comparison = []
-        for substitute in substitutes:
-            substitute_name = substitute.get("substitute", "")
+        for substitute_name in substitute_names:
             if substitute_name:
-                availability_data = await self.find_ingredient_sources(substitute_name, {"lat": 0, "lng": 0}, 1000)
+                availability_data = sources[substitute_name]
                 comparison.append({
                     "substitute": substitute_name,
                     "availability": "available" if not availability_data.get("error") else "limited",
@@ -766,22 +1629,4 @@ class HeritageRecipesService:
         return await self.db.heritage_recipes.find({
             "preservation_priority": {"$gte": 4},
             "elder_approved": False
-        }, {"_id": 0}).limit(10).to_list(length=10)
-    
-    async def _get_community_engagement_stats(self) -> Dict[str, int]:
-        """Get community engagement statistics"""
-        total_likes = await self.db.heritage_recipes.aggregate([
-            {"$group": {"_id": None, "total": {"$sum": "$likes_count"}}}
-        ]).to_list(length=1)
-        
-        total_shares = await self.db.heritage_recipes.aggregate([
-            {"$group": {"_id": None, "total": {"$sum": "$shares_count"}}}
-        ]).to_list(length=1)
-        
-        return {
-            "total_recipe_likes": total_likes[0]["total"] if total_likes else 0,
-            "total_recipe_shares": total_shares[0]["total"] if total_shares else 0,
-            "recipes_tried": await self.db.heritage_recipes.aggregate([
-                {"$group": {"_id": None, "total": {"$sum": "$tried_count"}}}
-            ]).to_list(length=1)
-        }
\ No newline at end of file
+        }, RECIPE_PROJECTION).limit(10).to_list(length=10)
\ No newline at end of file
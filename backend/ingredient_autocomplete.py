@@ -0,0 +1,303 @@
+# Ingredient Autocomplete - shared prefix index over every ingredient vocabulary
+import bisect
+import logging
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Set
+
+from ingredient_canonicalizer import get_ingredient_canonicalizer
+
+SEPARATOR = "\x00"
+SHORT_PREFIX_LENGTH = 3
+TOPK_SIZE = 20
+
+
+class IngredientAutocompleteIndex:
+    """
+    In-memory autocomplete index shared by the smart cooking and grocery services.
+
+    Terms come from named sources (basic ingredients, fast food vocabulary,
+    specialty heritage ingredients, the local product catalog) and can be
+    replaced or extended per source without rebuilding the rest.
+
+    Layout:
+      - a sorted array of keys "<suffix>\\0<term>", one per word start of each
+        term, so "pep" finds both "pepper" and "black pepper" with one bisect
+      - a precomputed popularity-ranked top-k table for every prefix of up to
+        three characters, where bisect ranges are too wide to scan per keystroke
+    Typo tolerance retries the prefix with every single-edit variant when the
+    exact prefix returns almost nothing (a likely typo).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+        # normalized term -> {"term", "popularity": {source: score}, "payload"}
+        self._terms: Dict[str, Dict[str, Any]] = {}
+        self._source_terms: Dict[str, Set[str]] = {}
+        self._keys: List[str] = []
+        self._short_topk: Dict[str, List[str]] = {}
+        self._alphabet: Set[str] = set()
+
+        self.stats = {"queries": 0, "fuzzy_queries": 0, "total_query_ms": 0.0, "rebuilds": 0}
+
+    # SOURCE MANAGEMENT
+
+    def replace_source(self, source: str, entries: Iterable[Dict[str, Any]]):
+        """Replace every term contributed by a source"""
+        entries = list(entries)
+        new_terms = {self.normalize(entry["term"]) for entry in entries}
+        new_terms.discard("")
+        removed = self._source_terms.get(source, set()) - new_terms
+
+        touched = set()
+        for term in removed:
+            touched |= self._remove_source_from_term(term, source)
+        touched |= self._upsert_entries(source, entries)
+        self._refresh(touched)
+
+    def add_terms(self, source: str, entries: Iterable[Dict[str, Any]]):
+        """Add or update terms for a source, keeping its existing terms"""
+        self._refresh(self._upsert_entries(source, list(entries)))
+
+    def record_selection(self, term: str, weight: float = 1.0):
+        """Boost a term that users actually picked"""
+        key = self.normalize(term)
+        if key not in self._terms:
+            return
+        popularity = self._terms[key]["popularity"]
+        popularity["usage"] = popularity.get("usage", 0) + weight
+
+        # A score only grows here, so merging into the affected short lists is enough
+        for prefix in self._short_prefixes(key):
+            ranked = self._short_topk.setdefault(prefix, [])
+            if key not in ranked:
+                ranked.append(key)
+            ranked.sort(key=self._rank)
+            del ranked[TOPK_SIZE:]
+
+    # QUERYING
+
+    def suggest(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """Popularity-ranked completions for a partial query"""
+        start = time.perf_counter()
+        prefix = self.normalize(query)
+        results: List[Dict[str, Any]] = []
+        if prefix:
+            exact = self._complete(prefix, limit)
+            results = [self._result(term, "prefix") for term in exact]
+
+            if fuzzy and len(results) < min(limit, 3) and len(prefix) >= 3:
+                self.stats["fuzzy_queries"] += 1
+                seen = set(exact)
+                candidates = set()
+                for variant in self._edit_variants(prefix):
+                    candidates.update(self._complete(variant, limit))
+                fuzzy_terms = sorted(candidates - seen, key=self._rank)[:limit - len(results)]
+                results.extend(self._result(term, "fuzzy") for term in fuzzy_terms)
+
+        self.stats["queries"] += 1
+        self.stats["total_query_ms"] += (time.perf_counter() - start) * 1000
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        queries = self.stats["queries"]
+        return {
+            "terms": len(self._terms),
+            "keys": len(self._keys),
+            "sources": {source: len(terms) for source, terms in self._source_terms.items()},
+            "queries": queries,
+            "fuzzy_queries": self.stats["fuzzy_queries"],
+            "avg_query_ms": round(self.stats["total_query_ms"] / queries, 4) if queries else 0,
+            "rebuilds": self.stats["rebuilds"]
+        }
+
+    def normalize(self, text: str) -> str:
+        """Lowercase, strip accents and collapse whitespace"""
+        text = unicodedata.normalize("NFKD", text or "")
+        text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+        return " ".join(text.replace(SEPARATOR, " ").split())
+
+    # PRIVATE HELPER METHODS
+
+    def _upsert_entries(self, source: str, entries: List[Dict[str, Any]]) -> Set[str]:
+        """Merge entries into the term table; returns short prefixes needing a refresh"""
+        touched = set()
+        new_keys = []
+        source_terms = self._source_terms.setdefault(source, set())
+        for entry in entries:
+            key = self.normalize(entry["term"])
+            if not key:
+                continue
+            record = self._terms.get(key)
+            if record is None:
+                record = {"term": entry["term"].strip(), "popularity": {}, "payload": None}
+                self._terms[key] = record
+                new_keys.extend(self._index_keys(key))
+                self._alphabet.update(key)
+            record["popularity"][source] = float(entry.get("popularity", 1))
+            if entry.get("payload") is not None and record["payload"] is None:
+                record["payload"] = entry["payload"]
+            source_terms.add(key)
+            touched.update(self._short_prefixes(key))
+
+        # Bulk loads sort once; small updates insert in place
+        if len(new_keys) > 64:
+            self._keys.extend(new_keys)
+            self._keys.sort()
+        else:
+            for index_key in new_keys:
+                bisect.insort(self._keys, index_key)
+        return touched
+
+    def _remove_source_from_term(self, key: str, source: str) -> Set[str]:
+        self._source_terms.get(source, set()).discard(key)
+        record = self._terms.get(key)
+        if record is None:
+            return set()
+        record["popularity"].pop(source, None)
+        if not any(name != "usage" for name in record["popularity"]):
+            del self._terms[key]
+            for index_key in self._index_keys(key):
+                position = bisect.bisect_left(self._keys, index_key)
+                if position < len(self._keys) and self._keys[position] == index_key:
+                    del self._keys[position]
+        return self._short_prefixes(key)
+
+    def _refresh(self, prefixes: Set[str]):
+        """Recompute the short-prefix top-k lists (all at once for bulk changes)"""
+        if not prefixes:
+            return
+        if len(prefixes) > len(self._short_topk) // 2:
+            self._rebuild_short_topk()
+            return
+        for prefix in prefixes:
+            terms = self._scan(prefix)
+            if terms:
+                self._short_topk[prefix] = sorted(terms, key=self._rank)[:TOPK_SIZE]
+            else:
+                self._short_topk.pop(prefix, None)
+
+    def _rebuild_short_topk(self):
+        self.stats["rebuilds"] += 1
+        table: Dict[str, Set[str]] = {}
+        for key in self._terms:
+            for prefix in self._short_prefixes(key):
+                table.setdefault(prefix, set()).add(key)
+        self._short_topk = {
+            prefix: sorted(terms, key=self._rank)[:TOPK_SIZE]
+            for prefix, terms in table.items()
+        }
+
+    def _complete(self, prefix: str, limit: int) -> List[str]:
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            return self._short_topk.get(prefix, [])[:limit]
+        return sorted(self._scan(prefix), key=self._rank)[:limit]
+
+    def _scan(self, prefix: str) -> Set[str]:
+        """All terms with a word starting with prefix (bisect range over the sorted keys)"""
+        terms = set()
+        position = bisect.bisect_left(self._keys, prefix)
+        while position < len(self._keys) and self._keys[position].startswith(prefix):
+            index_key = self._keys[position]
+            # Keys are "<suffix>\0<term>"; a prefix running past the suffix cannot match
+            if SEPARATOR not in index_key[:len(prefix)]:
+                terms.add(index_key.split(SEPARATOR, 1)[1])
+            position += 1
+        return terms
+
+    def _index_keys(self, key: str) -> List[str]:
+        return [f"{key[start:]}{SEPARATOR}{key}" for start in self._word_starts(key)]
+
+    def _short_prefixes(self, key: str) -> Set[str]:
+        prefixes = set()
+        for start in self._word_starts(key):
+            suffix = key[start:]
+            for length in range(1, min(SHORT_PREFIX_LENGTH, len(suffix)) + 1):
+                prefixes.add(suffix[:length])
+        return prefixes
+
+    def _word_starts(self, key: str) -> List[int]:
+        return [0] + [i + 1 for i, ch in enumerate(key) if ch in " -" and i + 1 < len(key)]
+
+    def _edit_variants(self, prefix: str) -> Set[str]:
+        """Every string one deletion, transposition, substitution or insertion away"""
+        letters = self._alphabet
+        splits = [(prefix[:i], prefix[i:]) for i in range(len(prefix) + 1)]
+        variants = {left + right[1:] for left, right in splits if right}
+        variants |= {left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1}
+        variants |= {left + ch + right[1:] for left, right in splits if right for ch in letters}
+        variants |= {left + ch + right for left, right in splits for ch in letters}
+        variants.discard(prefix)
+        return {variant for variant in variants if len(variant) >= 2}
+
+    def _rank(self, key: str):
+        popularity = self._terms[key]["popularity"]
+        return (-sum(popularity.values()), len(key), key)
+
+    def _result(self, key: str, match: str) -> Dict[str, Any]:
+        record = self._terms[key]
+        return {
+            "term": record["term"],
+            "score": sum(record["popularity"].values()),
+            "sources": sorted(name for name in record["popularity"] if name != "usage"),
+            "payload": record["payload"],
+            "match": match
+        }
+
+
+# Shared index instance
+_autocomplete_index = None
+
+
+def get_ingredient_autocomplete() -> IngredientAutocompleteIndex:
+    """Get the process-wide ingredient autocomplete index"""
+    global _autocomplete_index
+    if _autocomplete_index is None:
+        _autocomplete_index = IngredientAutocompleteIndex()
+    return _autocomplete_index
+
+
+async def load_database_sources(db, product_limit: int = 20000):
+    """Load specialty heritage ingredients and the local product catalog into the shared index"""
+    index = get_ingredient_autocomplete()
+    logger = logging.getLogger(__name__)
+
+    try:
+        specialty = await db.specialty_ingredients.find(
+            {}, {"_id": 0, "ingredient_name": 1, "alternative_names": 1}
+        ).sort("ingredient_name", 1).to_list(length=None)
+        index.replace_source("specialty", specialty_entries(specialty))
+        # Alternative names are synonyms in the shared ingredient vocabulary too
+        canonicalizer = get_ingredient_canonicalizer()
+        for ingredient in specialty:
+            if ingredient.get("ingredient_name"):
+                canonicalizer.register(ingredient["ingredient_name"], ingredient.get("alternative_names", []))
+    except Exception as e:
+        logger.error(f"Failed to load specialty ingredients for autocomplete: {str(e)}")
+
+    try:
+        products = await db.grocery_products.find(
+            {}, {"_id": 0, "product_name": 1}
+        ).sort("last_modified_t", -1).to_list(length=product_limit)
+        index.replace_source("products", [
+            {"term": product["product_name"], "popularity": 1}
+            for product in products if product.get("product_name")
+        ])
+    except Exception as e:
+        logger.error(f"Failed to load product catalog for autocomplete: {str(e)}")
+
+
+def specialty_entries(ingredients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Autocomplete entries for specialty ingredient documents"""
+    entries = []
+    for ingredient in ingredients:
+        name = ingredient.get("ingredient_name")
+        if not name:
+            continue
+        entries.append({"term": name, "popularity": 5})
+        entries.extend(
+            {"term": alternative, "popularity": 3, "payload": {"canonical_name": name}}
+            for alternative in ingredient.get("alternative_names", [])
+        )
+    return entries
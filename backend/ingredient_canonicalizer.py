@@ -0,0 +1,295 @@
+# Ingredient Canonicalizer - one vocabulary for pantry, recipe, farm and grocery matching
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+NON_WORD = re.compile(r"[^a-z0-9%]+")
+
+# Leading preparation words that do not change what the ingredient is
+DESCRIPTORS = {"fresh", "freshly", "chopped", "diced", "minced", "sliced", "organic", "raw", "large", "small", "medium"}
+
+# Words that look plural but are not
+INVARIANT_WORDS = {
+    "asparagus", "couscous", "hummus", "molasses", "swiss", "bass", "grits",
+    "citrus", "octopus", "hibiscus", "cactus", "lemongrass", "watercress", "series", "species"
+}
+IRREGULAR_PLURALS = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife", "geese": "goose"}
+
+# Cuts and parts folded into the animal they come from ("chicken breast fillets" -> "chicken")
+CUT_WORDS = {"breast", "thigh", "fillet", "filet", "drumstick", "wing", "leg", "tenderloin", "cutlet", "steak", "tender"}
+CUT_ANIMALS = {
+    "chicken", "turkey", "duck", "lamb", "goat", "pork", "veal", "salmon", "tuna", "cod",
+    "tilapia", "trout", "haddock", "mackerel", "catfish", "fish"
+}
+
+# Bumped whenever canonical names change, so stored canonical names can be recomputed
+CANONICAL_VERSION = 5
+
+# Cross-vocabulary equivalences (US/UK names, recipe shorthand, grocery labels)
+SEED_SYNONYMS = {
+    "green onion": ["scallion", "spring onion"],
+    "chickpea": ["garbanzo bean", "garbanzo"],
+    "eggplant": ["aubergine"],
+    "zucchini": ["courgette"],
+    "shrimp": ["prawn", "prawns"],
+    "cornstarch": ["corn starch", "cornflour"],
+    "powdered sugar": ["icing sugar", "confectioners sugar"],
+    "heavy cream": ["double cream", "whipping cream"],
+    "vegetable oil": ["canola oil", "cooking oil"],
+    "ground beef": ["beef mince", "minced beef"],
+    "beet": ["beetroot"],
+    "arugula": ["rocket"],
+    "chili pepper": ["chile", "chili", "chilli"],
+    "plantain": ["cooking banana"],
+    "cassava": ["yuca", "manioc"],
+}
+
+
+class IngredientCanonicalizer:
+    """
+    Maps every spelling of an ingredient to one interned integer ID.
+
+    Surface forms are folded (accents, case, punctuation, leading preparation
+    words, plural of the head noun, trailing cuts of an animal) into a lookup key, and a precomputed table
+    sends each key to its canonical ID. Synonym groups are the connected
+    components of the synonym graph. Only curated vocabularies (the seed
+    synonyms, ingredient databases) register ingredients; lookups never add
+    any. A canonical name is the folded key of the ingredient's canonical
+    spelling, and an unknown spelling's canonical name is its own key, so
+    names stored in the database are the same in every process. A synonym
+    claimed by two ingredients goes to the same one whatever the order of
+    registration (see _attach).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+        # canonical id -> canonical name (a folded key)
+        self._names: List[str] = []
+        # folded key -> canonical id
+        self._lookup: Dict[str, int] = {}
+        # canonical id -> folded keys that resolve to it
+        self._members: Dict[int, Set[str]] = {}
+        self._max_words = 1
+        # raw spelling -> folded key, so repeat lookups skip folding entirely
+        self._raw_cache: Dict[str, str] = {}
+        # Ingredients from SEED_SYNONYMS, which win synonym conflicts
+        self._seeded: Set[int] = set()
+
+        self.stats = {"lookups": 0, "misses": 0, "ignored_synonyms": 0}
+        self.add_synonym_graph(
+            (canonical, synonym) for canonical, synonyms in SEED_SYNONYMS.items() for synonym in synonyms
+        )
+        # Every cut folds into its animal, so the animal itself is a known ingredient
+        for animal in sorted(CUT_ANIMALS):
+            self.register(animal)
+        self._seeded = set(range(len(self._names)))
+
+    # VOCABULARY
+
+    def register(self, canonical: str, synonyms: Iterable[str] = ()) -> Optional[int]:
+        """Register an ingredient and the other names it goes by"""
+        canonical_key = self.key(canonical)
+        if not canonical_key:
+            return None
+        ingredient_id = self._lookup.get(canonical_key)
+        if ingredient_id is None:
+            ingredient_id = self._new_id(canonical_key)
+        for synonym in synonyms:
+            self._attach(self.key(synonym), ingredient_id)
+        return ingredient_id
+
+    def add_synonym_graph(self, edges: Iterable[Tuple[str, str]]):
+        """Register synonym pairs; each connected group of unseen names becomes one ingredient"""
+        parent: Dict[str, str] = {}
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        order = []
+        for left, right in edges:
+            left_key, right_key = self.key(left), self.key(right)
+            if not left_key or not right_key:
+                continue
+            for key in (left_key, right_key):
+                if key not in parent:
+                    parent[key] = key
+                    order.append(key)
+            root_left, root_right = find(left_key), find(right_key)
+            if root_left != root_right:
+                # The earlier name stays the canonical one
+                if order.index(root_right) < order.index(root_left):
+                    root_left, root_right = root_right, root_left
+                parent[root_right] = root_left
+
+        groups: Dict[str, List[str]] = {}
+        for key in order:
+            groups.setdefault(find(key), []).append(key)
+        for root, keys in groups.items():
+            # A group touching an existing ingredient joins it
+            known = [self._lookup[key] for key in keys if key in self._lookup]
+            ingredient_id = known[0] if known else self._new_id(root)
+            for key in keys:
+                self._attach(key, ingredient_id)
+
+    # LOOKUP
+
+    def canonical_id(self, text: str) -> Optional[int]:
+        """Interned ID for any spelling of a registered ingredient, or None"""
+        self.stats["lookups"] += 1
+        ingredient_id = self._lookup.get(self._cached_key(text))
+        if ingredient_id is None:
+            self.stats["misses"] += 1
+        return ingredient_id
+
+    def canonical_name(self, text: str) -> str:
+        """Canonical name of a registered ingredient, otherwise the spelling's folded key"""
+        key = self._cached_key(text)
+        ingredient_id = self._lookup.get(key)
+        return self._names[ingredient_id] if ingredient_id is not None else key
+
+    def canonical_names(self, texts: Iterable[str]) -> List[str]:
+        """Canonical names for a list of ingredients, duplicates removed, order kept"""
+        names = []
+        for text in texts:
+            name = self.canonical_name(text)
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def canonical_ids(self, texts: Iterable[str]) -> Set[int]:
+        ids = set()
+        for text in texts:
+            ingredient_id = self.canonical_id(text)
+            if ingredient_id is not None:
+                ids.add(ingredient_id)
+        return ids
+
+    def canonical_terms(self, text: str) -> List[str]:
+        """
+        Canonical names of every known ingredient mentioned in a product name or
+        ingredient list, longest phrases first ("Organic Roma Tomatoes" -> ["tomato"]).
+        """
+        words = self._words(text)
+        singular = [self.singularize(word) for word in words]
+        terms = []
+        covered = [False] * len(words)
+        for length in range(min(self._max_words, len(words)), 0, -1):
+            for start in range(len(words) - length + 1):
+                if any(covered[start:start + length]):
+                    continue
+                phrase = " ".join(words[start:start + length - 1] + [singular[start + length - 1]])
+                ingredient_id = self._lookup.get(phrase)
+                if ingredient_id is not None:
+                    covered[start:start + length] = [True] * length
+                    name = self._names[ingredient_id]
+                    if name not in terms:
+                        terms.append(name)
+        return terms
+
+    def name(self, ingredient_id: int) -> str:
+        return self._names[ingredient_id]
+
+    def synonyms(self, text: str) -> List[str]:
+        """Every folded spelling that resolves to the same ingredient"""
+        ingredient_id = self.canonical_id(text)
+        return sorted(self._members.get(ingredient_id, ())) if ingredient_id is not None else []
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            "ingredients": len(self._names),
+            "lookup_entries": len(self._lookup)
+        }
+
+    # FOLDING
+
+    def key(self, text: str) -> str:
+        """Folded lookup key: accents, case, punctuation, leading descriptors, head-noun plural and cuts"""
+        words = self._words(text)
+        while len(words) > 1 and words[0] in DESCRIPTORS:
+            words = words[1:]
+        if not words:
+            return ""
+        words[-1] = self.singularize(words[-1])
+        cut = len(words)
+        while cut > 1 and self.singularize(words[cut - 1]) in CUT_WORDS:
+            cut -= 1
+        if cut < len(words) and words[cut - 1] in CUT_ANIMALS:
+            words = words[:cut]
+        return " ".join(words)
+
+    def singularize(self, word: str) -> str:
+        if word in INVARIANT_WORDS or len(word) <= 3:
+            return word
+        if word in IRREGULAR_PLURALS:
+            return IRREGULAR_PLURALS[word]
+        if word.endswith("ies"):
+            return word[:-3] + "y"
+        if word.endswith(("oes", "ches", "shes", "xes", "sses", "zes")):
+            return word[:-2]
+        if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            return word[:-1]
+        return word
+
+    # PRIVATE HELPER METHODS
+
+    def _words(self, text: str) -> List[str]:
+        text = unicodedata.normalize("NFKD", text or "")
+        text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+        return NON_WORD.sub(" ", text).split()
+
+    def _cached_key(self, text: str) -> str:
+        key = self._raw_cache.get(text)
+        if key is None:
+            key = self.key(text)
+            if len(self._raw_cache) >= 50000:
+                self._raw_cache.clear()
+            self._raw_cache[text] = key
+        return key
+
+    def _new_id(self, key: str) -> int:
+        ingredient_id = len(self._names)
+        self._names.append(key)
+        self._members[ingredient_id] = set()
+        self._attach(key, ingredient_id)
+        return ingredient_id
+
+    def _claim_rank(self, key: str, ingredient_id: int) -> Tuple[int, int, str]:
+        """Lower wins a contested key: the ingredient it names, then seeded ingredients, then by name"""
+        return (
+            0 if self._names[ingredient_id] == key else 1,
+            0 if ingredient_id in self._seeded else 1,
+            self._names[ingredient_id]
+        )
+
+    def _attach(self, key: str, ingredient_id: int):
+        if not key:
+            return
+        current = self._lookup.get(key)
+        if current is not None and current != ingredient_id:
+            self.stats["ignored_synonyms"] += 1
+            if self._claim_rank(key, current) <= self._claim_rank(key, ingredient_id):
+                self.logger.debug(f"Synonym '{key}' already means '{self._names[current]}'")
+                return
+            self.logger.debug(f"Synonym '{key}' moves from '{self._names[current]}' to '{self._names[ingredient_id]}'")
+            self._members[current].discard(key)
+        self._lookup[key] = ingredient_id
+        self._members[ingredient_id].add(key)
+        self._max_words = max(self._max_words, key.count(" ") + 1)
+
+
+# Shared canonicalizer instance
+_canonicalizer = None
+
+
+def get_ingredient_canonicalizer() -> IngredientCanonicalizer:
+    """Get the process-wide ingredient canonicalizer"""
+    global _canonicalizer
+    if _canonicalizer is None:
+        _canonicalizer = IngredientCanonicalizer()
+    return _canonicalizer
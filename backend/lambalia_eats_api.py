@@ -1,11 +1,12 @@
 # Lambalia Eats API Routes - Real-time Food Marketplace
-from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, Header
 from typing import List, Optional, Dict, Any
 import json
 import uuid
 from datetime import datetime, timedelta
 
 from lambalia_eats_service import LambaliaEatsService, EatsMatchingEngine
+from translation_service import get_translation_service
 from lambalia_eats_models import (
     FoodRequestSubmission, FoodOfferSubmission, OrderPlacementRequest,
     RealTimeUpdate, EatsStatsResponse, FoodRequest, FoodOffer, ActiveOrder,
@@ -158,9 +159,11 @@ def create_lambalia_eats_router(eats_service: LambaliaEatsService, get_current_u
         radius_km: float = 15,
         cuisine: Optional[str] = None,
         max_price: Optional[float] = None,
-        service_type: Optional[str] = None
+        service_type: Optional[str] = None,
+        auto_translate: bool = False,
+        accept_language: Optional[str] = Header(None)
     ):
-        """Get nearby food offers for browsing"""
+        """Get nearby food offers for browsing (auto_translate uses Accept-Language)"""
         try:
             eater_location = {"lat": lat, "lng": lng}
             offers = await eats_service.get_nearby_offers(eater_location, radius_km, cuisine)
@@ -172,6 +175,14 @@ def create_lambalia_eats_router(eats_service: LambaliaEatsService, get_current_u
             if service_type:
                 offers = [o for o in offers if service_type in o["available_service_types"]]
             
+            if auto_translate and offers:
+                translation_service = await get_translation_service()
+                target_language = translation_service.resolve_accept_language(accept_language)
+                if target_language:
+                    await translation_service.translate_fields(
+                        offers, ["description", "ingredients", "pickup_instructions"], target_language
+                    )
+            
             return offers
             
         except Exception as e:
@@ -4,6 +4,7 @@ import math
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 import logging
 
 # Simple distance calculation without geopy for now
@@ -37,6 +38,7 @@ from lambalia_eats_models import (
     MatchingResult, EatsAnalytics, ServiceType, RequestStatus, OfferStatus,
     CuisineCategory, TransportationMethod
 )
+from unified_search_service import get_unified_search, REQUEST
 
 class EatsMatchingEngine:
     """Advanced matching engine for connecting eaters with cooks"""
@@ -174,6 +176,7 @@ class LambaliaEatsService:
         )
         
         await self.db.food_requests.insert_one(food_request.dict())
+        get_unified_search().publish_request(food_request.dict())
         
         # Immediately try to find matches
         await self._find_and_notify_matches(food_request)
@@ -205,6 +208,7 @@ class LambaliaEatsService:
         )
         
         await self.db.food_offers.insert_one(food_offer.dict())
+        get_unified_search().publish_offer(food_offer.dict())
         
         # Find matching requests
         await self._find_matching_requests(food_offer)
@@ -283,16 +287,17 @@ class LambaliaEatsService:
         request_id = order_data.get("request_id")
         
         if offer_id:
-            # Ordering from an available offer
-            offer = await self.db.food_offers.find_one({"id": offer_id}, {"_id": 0})
-            if not offer or offer["quantity_remaining"] <= 0:
-                raise ValueError("Offer not available")
-            
-            # Update offer quantity
-            await self.db.food_offers.update_one(
-                {"id": offer_id},
-                {"$inc": {"quantity_remaining": -order_data.get("quantity", 1)}}
+            # Ordering from an available offer; the portions are taken atomically so
+            # concurrent orders cannot oversell, and search gets the stored remainder
+            offer = await self.db.food_offers.find_one_and_update(
+                {"id": offer_id, "quantity_remaining": {"$gte": order_data.get("quantity", 1)}},
+                {"$inc": {"quantity_remaining": -order_data.get("quantity", 1)}},
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
             )
+            if not offer:
+                raise ValueError("Offer not available")
+            get_unified_search().publish_offer(offer)
             
             # Handle datetime parsing for ready_at
             ready_at = offer["ready_at"]
@@ -327,6 +332,7 @@ class LambaliaEatsService:
                 {"id": request_id},
                 {"$set": {"status": RequestStatus.MATCHED, "matched_cook_id": eater_id}}  # Note: eater_id is actually cook_id in this context
             )
+            get_unified_search().publish_removal(REQUEST, request_id)
             
             order = ActiveOrder(
                 eater_id=request["eater_id"],
@@ -0,0 +1,239 @@
+# Pantry Recipe Matcher - inverted index for "cook with what I have" searches
+import heapq
+import time
+from itertools import compress
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ingredient_canonicalizer import IngredientCanonicalizer, get_ingredient_canonicalizer
+
+
+class PantryRecipeMatcher:
+    """
+    Finds every recipe missing at most `max_missing` pantry ingredients without
+    scanning the corpus.
+
+    Each recipe is stored as an ingredient bitset (a Python int with one bit per
+    canonical ingredient name, so synonyms and plurals share a bit). Candidates come from a prefix-filter inverted index: a
+    recipe's ingredients are ordered rarest first, and the recipe is posted
+    under its first k+1 ingredients at rank k. A recipe missing at most m
+    ingredients must contain one of its m+1 rarest, so the union of the rank
+    0..m postings of the pantry's ingredients holds every match. Excluded
+    ingredients remove their recipes as a set mask, and the remaining candidates
+    are verified exactly by popcounting (recipe & ~pantry) in C-level map passes.
+    """
+
+    def __init__(self, max_indexed_missing: int = 5, canonicalizer: Optional[IngredientCanonicalizer] = None):
+        self.max_indexed_missing = max_indexed_missing
+        self.canonicalizer = canonicalizer or get_ingredient_canonicalizer()
+
+        # Canonical ingredient name -> bit position, and bit position -> canonical name
+        self._ingredient_ids: Dict[str, int] = {}
+        self._ingredient_names: List[str] = []
+        self._ingredient_counts: List[int] = []
+
+        # Recipe slots; removed recipes stay in the postings until compaction
+        self._slots: Dict[str, int] = {}
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._masks: List[int] = []
+        self._sizes: List[int] = []
+        self._removed_slots: Set[int] = set()
+
+        # rank -> ingredient id -> recipe slots
+        self._prefix_postings: List[Dict[int, List[int]]] = [{} for _ in range(max_indexed_missing + 1)]
+        # ingredient id -> every recipe slot containing it (for max_missing beyond the prefix index)
+        self._postings: Dict[int, List[int]] = {}
+
+        # Bumped on every corpus change so cached match results can be keyed by it
+        self.generation = 0
+
+        self.stats = {"queries": 0, "candidates": 0, "total_query_ms": 0.0, "compactions": 0}
+
+    # CORPUS MANAGEMENT
+
+    def add_recipes(self, recipes: Iterable[Tuple[str, Iterable[str], Dict[str, Any]]]):
+        """
+        Index (recipe_id, ingredient names, payload) tuples, replacing recipes
+        already indexed under the same id.
+        """
+        batch = {}
+        batch_counts: Dict[str, int] = {}
+        for recipe_id, ingredients, payload in recipes:
+            if recipe_id in self._slots:
+                self.remove_recipe(recipe_id)
+            canonical_names = set(self.canonicalizer.canonical_names(ingredients))
+            batch[recipe_id] = (canonical_names, payload)
+            for canonical_name in canonical_names:
+                batch_counts[canonical_name] = batch_counts.get(canonical_name, 0) + 1
+
+        # New staples get the low bits, which keeps most recipe bitsets short
+        for canonical_name in sorted(batch_counts, key=lambda canonical_name: (-batch_counts[canonical_name], canonical_name)):
+            self._ingredient_counts[self._intern(canonical_name)] += batch_counts[canonical_name]
+
+        prepared = {
+            recipe_id: ({self._ingredient_ids[canonical_name] for canonical_name in canonical_names}, payload)
+            for recipe_id, (canonical_names, payload) in batch.items()
+        }
+
+        for recipe_id, (ingredient_ids, payload) in prepared.items():
+            self._index_recipe(recipe_id, ingredient_ids, payload)
+        self.generation += 1
+
+    def add_recipe(self, recipe_id: str, ingredients: Iterable[str], payload: Dict[str, Any]):
+        self.add_recipes([(recipe_id, ingredients, payload)])
+
+    def remove_recipe(self, recipe_id: str):
+        slot = self._slots.pop(recipe_id, None)
+        if slot is None:
+            return
+        mask = self._masks[slot]
+        for ingredient_id in self._ids_in_mask(mask):
+            self._ingredient_counts[ingredient_id] -= 1
+        self._payloads[slot] = None
+        self._removed_slots.add(slot)
+        self.generation += 1
+        if len(self._removed_slots) > 1000 and len(self._removed_slots) > len(self._payloads) // 4:
+            self._compact()
+
+    # MATCHING
+
+    def match(
+        self,
+        available: Iterable[str],
+        excluded: Iterable[str] = (),
+        max_missing: int = 0,
+        limit: int = 20
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return the best `limit` matches ranked by ingredient coverage and the
+        total number of recipes within `max_missing`. A recipe needs at least
+        one pantry ingredient to match.
+        Each match is {"recipe", "missing_ingredients", "coverage", "matched"}.
+        """
+        start = time.perf_counter()
+        max_missing = max(0, max_missing)
+
+        available_ids = self._known_ids(available)
+        # Positive complement: AND of non-negative ints avoids two's complement conversion
+        not_available = ((1 << len(self._ingredient_names)) - 1) ^ self._mask(available_ids)
+
+        candidate_set = self._candidates(available_ids, max_missing)
+        for ingredient_id in self._known_ids(excluded):
+            candidate_set.difference_update(self._postings.get(ingredient_id, ()))
+        candidate_set -= self._removed_slots
+        candidates = list(candidate_set)
+
+        # missing = popcount(recipe & ~pantry), without a Python-level loop per recipe
+        missing_counts = list(map(int.bit_count, map(not_available.__and__, map(self._masks.__getitem__, candidates))))
+
+        # Within one missing count coverage grows with recipe size, so the best
+        # `limit` of each bucket are the only contenders for the overall top
+        total_found = 0
+        contenders = []
+        for missing in range(max_missing + 1):
+            bucket = list(compress(candidates, map(missing.__eq__, missing_counts)))
+            total_found += len(bucket)
+            for slot in sorted(bucket, key=self._sizes.__getitem__, reverse=True)[:limit]:
+                size = self._sizes[slot]
+                coverage = (size - missing) / size if size else 0.0
+                contenders.append((-coverage, missing - size, slot))
+
+        results = []
+        for negative_coverage, negative_matched, slot in heapq.nsmallest(limit, contenders):
+            missing_mask = self._masks[slot] & not_available
+            results.append({
+                "recipe": self._payloads[slot],
+                "missing_ingredients": [self._ingredient_names[i] for i in self._ids_in_mask(missing_mask)],
+                "coverage": round(-negative_coverage, 4),
+                "matched": -negative_matched
+            })
+
+        self.stats["queries"] += 1
+        self.stats["candidates"] += len(candidates)
+        self.stats["total_query_ms"] += (time.perf_counter() - start) * 1000
+        return results, total_found
+
+    def get_stats(self) -> Dict[str, Any]:
+        queries = self.stats["queries"]
+        return {
+            "recipes": len(self._slots),
+            "ingredients": len(self._ingredient_ids),
+            "queries": queries,
+            "avg_candidates": round(self.stats["candidates"] / queries, 1) if queries else 0,
+            "avg_query_ms": round(self.stats["total_query_ms"] / queries, 4) if queries else 0,
+            "compactions": self.stats["compactions"]
+        }
+
+    # PRIVATE HELPER METHODS
+
+    def _intern(self, canonical_name: str) -> int:
+        ingredient_id = self._ingredient_ids.get(canonical_name)
+        if ingredient_id is None:
+            ingredient_id = len(self._ingredient_names)
+            self._ingredient_ids[canonical_name] = ingredient_id
+            self._ingredient_names.append(canonical_name)
+            self._ingredient_counts.append(0)
+        return ingredient_id
+
+    def _known_ids(self, names: Iterable[str]) -> Set[int]:
+        ids = set()
+        for canonical_name in self.canonicalizer.canonical_names(names):
+            ingredient_id = self._ingredient_ids.get(canonical_name)
+            if ingredient_id is not None:
+                ids.add(ingredient_id)
+        return ids
+
+    def _mask(self, ingredient_ids: Iterable[int]) -> int:
+        mask = 0
+        for ingredient_id in ingredient_ids:
+            mask |= 1 << ingredient_id
+        return mask
+
+    def _ids_in_mask(self, mask: int) -> List[int]:
+        ids = []
+        while mask:
+            lowest = mask & -mask
+            ids.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return ids
+
+    def _index_recipe(self, recipe_id: str, ingredient_ids: Set[int], payload: Dict[str, Any]):
+        slot = len(self._payloads)
+        self._slots[recipe_id] = slot
+        self._payloads.append(payload)
+        self._masks.append(self._mask(ingredient_ids))
+        self._sizes.append(len(ingredient_ids))
+
+        counts = self._ingredient_counts
+        ordered = sorted(ingredient_ids, key=lambda ingredient_id: (counts[ingredient_id], ingredient_id))
+        for rank, ingredient_id in enumerate(ordered[:self.max_indexed_missing + 1]):
+            self._prefix_postings[rank].setdefault(ingredient_id, []).append(slot)
+        for ingredient_id in ordered:
+            self._postings.setdefault(ingredient_id, []).append(slot)
+
+    def _candidates(self, available_ids: Set[int], max_missing: int) -> Set[int]:
+        candidates: Set[int] = set()
+        if max_missing <= self.max_indexed_missing:
+            for postings in self._prefix_postings[:max_missing + 1]:
+                for ingredient_id in available_ids:
+                    slots = postings.get(ingredient_id)
+                    if slots:
+                        candidates.update(slots)
+        else:
+            for ingredient_id in available_ids:
+                candidates.update(self._postings.get(ingredient_id, ()))
+        return candidates
+
+    def _compact(self):
+        """Drop removed recipes and rebuild the postings"""
+        self.stats["compactions"] += 1
+        live = [
+            (recipe_id, set(self._ids_in_mask(self._masks[slot])), self._payloads[slot])
+            for recipe_id, slot in sorted(self._slots.items(), key=lambda item: item[1])
+        ]
+        self._slots = {}
+        self._payloads, self._masks, self._sizes = [], [], []
+        self._prefix_postings = [{} for _ in range(self.max_indexed_missing + 1)]
+        self._postings = {}
+        self._removed_slots = set()
+        for recipe_id, ingredient_ids, payload in live:
+            self._index_recipe(recipe_id, ingredient_ids, payload)
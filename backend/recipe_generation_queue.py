@@ -0,0 +1,325 @@
+# Recipe Generation Queue - background AI recipe generation for smart cooking sessions
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ingredient_canonicalizer import get_ingredient_canonicalizer
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when the generation backlog is at capacity"""
+
+
+class RecipeGenerationQueue:
+    """
+    Runs LLM recipe generation off the request path.
+
+    Jobs are keyed by the normalized ingredient set plus preferences, so:
+      - a finished result is served from a TTL cache without touching the LLM
+      - an identical job already queued or running is joined instead of duplicated
+        (every session that asked for it receives the result)
+      - at most `workers` generations run at once and at most `max_pending` wait
+
+    Job state lives in the recipe_generation_jobs collection for polling; waiters
+    in this process can also block on the job until it finishes (long polling),
+    and the session owner gets a stored notification when it completes.
+    """
+
+    def __init__(
+        self,
+        db,
+        generate: Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]],
+        apply_results: Callable[[List[str], List[Dict[str, Any]]], Awaitable[Any]],
+        workers: int = 4,
+        max_pending: int = 200,
+        cache_ttl: int = 3600,
+        cache_size: int = 2000
+    ):
+        self.db = db
+        self.jobs = db.recipe_generation_jobs
+        self.logger = logging.getLogger(__name__)
+        self.canonicalizer = get_ingredient_canonicalizer()
+
+        # generate(session) -> recipe dicts; apply_results(session_ids, recipes) stores them
+        self._generate = generate
+        self._apply_results = apply_results
+
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # generation key -> job id, for jobs queued or running
+        self._inflight: Dict[str, str] = {}
+        # job id -> future resolved with the recipes (or the failure)
+        self._futures: Dict[str, asyncio.Future] = {}
+        # job id -> job context (session snapshot and requesting sessions)
+        self._contexts: Dict[str, Dict[str, Any]] = {}
+        self.result_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        self.stats = {
+            "submitted": 0, "deduplicated": 0, "cache_hits": 0, "completed": 0,
+            "failed": 0, "rejected": 0, "inline": 0, "total_generation_ms": 0.0
+        }
+
+    # LIFECYCLE
+
+    async def start(self):
+        """Create indexes and start the worker pool"""
+        if self._workers:
+            return
+        await self.jobs.create_index("id", unique=True)
+        await self.jobs.create_index("created_at", expireAfterSeconds=7 * 24 * 3600)
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        self.logger.info(f"Recipe generation queue started with {self.worker_count} workers")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    # JOBS
+
+    def generation_key(self, session: Dict[str, Any]) -> str:
+        """Stable key for a session's ingredient set and preferences"""
+        ingredients = sorted(self.canonicalizer.canonical_names(
+            ingredient["name"] for ingredient in session.get("available_ingredients", [])
+        ))
+        preferences = {
+            name: sorted(str(item).strip().lower() for item in value) if isinstance(value, list) else value
+            for name, value in (session.get("preferences") or {}).items()
+        }
+        payload = json.dumps({"ingredients": ingredients, "preferences": preferences}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    async def submit(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue generation for a session and return the job immediately.
+        Cached results complete the job on the spot; an identical job in flight is joined.
+        """
+        self.stats["submitted"] += 1
+        key = self.generation_key(session)
+        now = datetime.utcnow()
+
+        cached = self._get_cached(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            job = self._new_job(key, session, now)
+            job.update({"status": COMPLETED, "completed_at": now, "recipes": cached, "cache_hit": True})
+            await self.jobs.insert_one(dict(job))
+            await self._apply_results([session["id"]], cached)
+            await self._notify(job)
+            return self._public(job)
+
+        job_id = self._inflight.get(key)
+        if job_id is not None:
+            self.stats["deduplicated"] += 1
+            self._contexts[job_id]["session_ids"].add(session["id"])
+            self._contexts[job_id]["user_ids"].add(session.get("user_id"))
+            job = await self.jobs.find_one_and_update(
+                {"id": job_id},
+                {"$addToSet": {"session_ids": session["id"]}},
+                projection={"_id": 0}
+            )
+            return self._public({**job, "deduplicated": True})
+
+        if self._queue is None or self._queue.full():
+            self.stats["rejected"] += 1
+            raise QueueFullError("Recipe generation is busy, please try again shortly")
+
+        job = self._new_job(key, session, now)
+        await self.jobs.insert_one(dict(job))
+        self._inflight[key] = job["id"]
+        self._futures[job["id"]] = asyncio.get_running_loop().create_future()
+        self._contexts[job["id"]] = {
+            "key": key,
+            "session": session,
+            "session_ids": {session["id"]},
+            "user_ids": {session.get("user_id")}
+        }
+        self._queue.put_nowait(job["id"])
+        return self._public({**job, "position": self._queue.qsize()})
+
+    async def get_job(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Current job state; with wait > 0, block up to that many seconds for it to finish"""
+        future = self._futures.get(job_id)
+        if wait > 0 and future is not None and not future.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=wait)
+            except Exception:
+                # Timed out or failed; the stored job says which
+                pass
+        job = await self.jobs.find_one({"id": job_id}, {"_id": 0})
+        return self._public(job) if job else None
+
+    async def generate_now(self, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Generate inline for callers that need the recipes in the response,
+        still sharing the cache and any identical job in flight.
+        """
+        key = self.generation_key(session)
+        cached = self._get_cached(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        job_id = self._inflight.get(key)
+        if job_id is not None and job_id in self._futures:
+            self.stats["deduplicated"] += 1
+            self._contexts[job_id]["session_ids"].add(session["id"])
+            return await asyncio.shield(self._futures[job_id])
+
+        start = time.perf_counter()
+        recipes = await self._generate(session)
+        self.stats["inline"] += 1
+        self.stats["total_generation_ms"] += (time.perf_counter() - start) * 1000
+        self._save_cached(key, recipes)
+        return recipes
+
+    def get_stats(self) -> Dict[str, Any]:
+        generations = self.stats["completed"] + self.stats["inline"]
+        return {
+            **{name: value for name, value in self.stats.items() if name != "total_generation_ms"},
+            "workers": len(self._workers),
+            "pending": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._inflight),
+            "cached_results": len(self.result_cache),
+            "avg_generation_ms": round(self.stats["total_generation_ms"] / generations, 1) if generations else 0
+        }
+
+    # PRIVATE HELPER METHODS
+
+    async def _worker(self, number: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                self.logger.error(f"Recipe generation worker {number} failed on job {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        context = self._contexts[job_id]
+        future = self._futures[job_id]
+        try:
+            await self.jobs.update_one(
+                {"id": job_id},
+                {"$set": {"status": RUNNING, "started_at": datetime.utcnow()}}
+            )
+
+            start = time.perf_counter()
+            recipes = await self._generate(context["session"])
+            generation_ms = (time.perf_counter() - start) * 1000
+            self._save_cached(context["key"], recipes)
+
+            session_ids = sorted(context["session_ids"])
+            await self._apply_results(session_ids, recipes)
+            job = await self.jobs.find_one_and_update(
+                {"id": job_id},
+                {"$set": {"status": COMPLETED, "recipes": recipes, "completed_at": datetime.utcnow()}},
+                projection={"_id": 0, "recipes": 0}
+            )
+        except asyncio.CancelledError:
+            # Worker shut down mid-job; callers waiting on the future see the cancellation
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.error(f"Recipe generation job {job_id} failed: {str(e)}")
+            try:
+                await self.jobs.update_one(
+                    {"id": job_id},
+                    {"$set": {"status": FAILED, "error": str(e), "completed_at": datetime.utcnow()}}
+                )
+            except Exception as update_error:
+                self.logger.error(f"Failed to mark recipe generation job {job_id} failed: {str(update_error)}")
+            if not future.done():
+                future.set_exception(e)
+                # Nobody may be waiting; mark the exception as retrieved
+                future.exception()
+            return
+        finally:
+            # Always release the in-flight slot so identical requests never attach to a dead job
+            self._finish(job_id)
+
+        self.stats["completed"] += 1
+        self.stats["total_generation_ms"] += generation_ms
+        future.set_result(recipes)
+
+        for user_id in context["user_ids"]:
+            await self._notify({**(job or {}), "user_id": user_id, "session_ids": session_ids})
+
+    def _finish(self, job_id: str):
+        context = self._contexts.pop(job_id, None)
+        if context and self._inflight.get(context["key"]) == job_id:
+            del self._inflight[context["key"]]
+        # Keep the future briefly so long-polling callers still see it resolve
+        asyncio.get_running_loop().call_later(60, self._futures.pop, job_id, None)
+
+    async def _notify(self, job: Dict[str, Any]):
+        """Push a completion notice to the session owner's notification feed"""
+        user_id = job.get("user_id")
+        if not user_id or user_id.startswith("guest_"):
+            return
+        try:
+            await self.db.notifications.insert_one({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "type": "recipe_generation_completed",
+                "job_id": job.get("id"),
+                "session_ids": job.get("session_ids", []),
+                "message": "Your AI recipe suggestions are ready",
+                "read": False,
+                "timestamp": datetime.utcnow()
+            })
+        except Exception as e:
+            self.logger.error(f"Failed to store recipe generation notification: {str(e)}")
+
+    def _new_job(self, key: str, session: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "generation_key": key,
+            "status": QUEUED,
+            "user_id": session.get("user_id"),
+            "session_ids": [session["id"]],
+            "cache_hit": False,
+            "created_at": now
+        }
+
+    def _public(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job = {name: value for name, value in job.items() if name not in ("_id", "generation_key")}
+        job["job_id"] = job.pop("id")
+        return job
+
+    def _get_cached(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self.result_cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["timestamp"] > self.cache_ttl:
+            del self.result_cache[key]
+            return None
+        self.result_cache.move_to_end(key)
+        return entry["data"]
+
+    def _save_cached(self, key: str, recipes: List[Dict[str, Any]]):
+        self.result_cache[key] = {"data": recipes, "timestamp": time.time()}
+        self.result_cache.move_to_end(key)
+        while len(self.result_cache) > self.cache_size:
+            self.result_cache.popitem(last=False)
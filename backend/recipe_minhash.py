@@ -0,0 +1,106 @@
+# Recipe MinHash - near-duplicate signatures and LSH band keys for heritage recipes
+import hashlib
+import random
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from dish_search_index import tokenize
+from ingredient_canonicalizer import get_ingredient_canonicalizer
+
+# 32 bands of 4 rows: pairs above ~0.42 Jaccard usually share a band, pairs at 0.8 almost always do
+NUM_PERM = 128
+BANDS = 32
+# Estimated Jaccard similarity at which two recipes count as near-duplicates
+DUPLICATE_THRESHOLD = 0.8
+# Words per instruction shingle
+SHINGLE_WORDS = 3
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def recipe_shingles(recipe: Dict[str, Any]) -> Set[str]:
+    """
+    Shingle set of a recipe: its folded ingredient names ("i:" prefix) and
+    every run of SHINGLE_WORDS words in its preparation steps ("s:" prefix).
+    """
+    canonicalizer = get_ingredient_canonicalizer()
+    shingles = set()
+    for ingredient in recipe.get("traditional_ingredients") or []:
+        key = canonicalizer.key(ingredient.get("name", "") if isinstance(ingredient, dict) else str(ingredient))
+        if key:
+            shingles.add(f"i:{key}")
+
+    words = tokenize(" ".join(recipe.get("preparation_steps") or []))
+    if 0 < len(words) < SHINGLE_WORDS:
+        shingles.add("s:" + " ".join(words))
+    for start in range(len(words) - SHINGLE_WORDS + 1):
+        shingles.add("s:" + " ".join(words[start:start + SHINGLE_WORDS]))
+    return shingles
+
+
+class RecipeMinHasher:
+    """
+    MinHash signatures over recipe shingles, split into LSH bands.
+
+    Each shingle is hashed once (64-bit blake2b) and pushed through NUM_PERM
+    universal hash functions (a*x + b mod 2^61-1); the signature keeps the
+    minimum of each. The permutations come from a fixed seed, so signatures
+    and band keys stored in the database stay comparable across processes.
+    Recipes whose signatures agree on every row of any band become candidates;
+    agreement across the whole signature estimates their Jaccard similarity.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: Set[str]) -> List[int]:
+        """MinHash signature, or an empty list when there is nothing to hash"""
+        if not shingles:
+            return []
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for shingle in shingles
+        ]
+        return [min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in self._permutations]
+
+    def band_keys(self, signature: Sequence[int]) -> List[str]:
+        """One "band:digest" key per band, for an indexed $in lookup of candidates"""
+        if len(signature) != self.num_perm:
+            return []
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(struct.pack(f">{self.rows}Q", *rows), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    def similarity(self, first: Sequence[int], second: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of the recipes behind two signatures"""
+        if not first or len(first) != len(second):
+            return 0.0
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+    def fingerprint(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        """The minhash_signature and lsh_bands fields stored on a recipe"""
+        signature = self.signature(recipe_shingles(recipe))
+        return {"minhash_signature": signature, "lsh_bands": self.band_keys(signature)}
+
+
+# Shared minhasher instance
+_minhasher: Optional[RecipeMinHasher] = None
+
+
+def get_recipe_minhasher() -> RecipeMinHasher:
+    """Get the process-wide recipe minhasher"""
+    global _minhasher
+    if _minhasher is None:
+        _minhasher = RecipeMinHasher()
+    return _minhasher
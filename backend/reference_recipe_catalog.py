@@ -0,0 +1,139 @@
+# Reference Recipe Catalog - frozen, pre-indexed view of the static reference recipes
+import bisect
+import json
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN = re.compile(r"[^\W_]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents so 'Crème' and 'creme' index the same"""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize like FastAPI's JSON response (ISO datetimes, UTF-8)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+class ReferenceRecipeCatalog:
+    """
+    Read-only reference recipe catalog with every lookup precomputed.
+
+    Built once from the compiled catalog artifact:
+      - dict indexes by id, country, category, English name and featured flag
+      - an inverted index from folded tokens of names and key ingredients to
+        recipe positions, with a sorted token list for prefix lookups
+      - JSON bytes for the responses that return whole lists
+    Lists are stored as tuples; callers get fresh lists so the catalog cannot
+    be mutated through a helper's return value.
+    """
+
+    def __init__(self, recipes: Iterable[Any], records: List[Dict[str, Any]]):
+        self.recipes: Tuple[Any, ...] = tuple(recipes)
+
+        by_country: Dict[str, List[Any]] = {}
+        by_category: Dict[str, List[Any]] = {}
+        postings: Dict[str, set] = {}
+        self.by_id: Dict[str, Any] = {}
+        self.by_name: Dict[str, Any] = {}
+        # Folded searchable fields per recipe, for verifying phrase matches
+        self._search_fields: List[Tuple[str, ...]] = []
+
+        for position, recipe in enumerate(self.recipes):
+            self.by_id[recipe.id] = recipe
+            self.by_name.setdefault(recipe.name_english, recipe)
+            by_country.setdefault(recipe.country_id, []).append(recipe)
+            by_category.setdefault(recipe.category, []).append(recipe)
+
+            fields = tuple(fold(text) for text in [recipe.name_english, recipe.name_local, *recipe.key_ingredients])
+            self._search_fields.append(fields)
+            for field in fields:
+                for token in TOKEN.findall(field):
+                    postings.setdefault(token, set()).add(position)
+
+        self.by_country = {key: tuple(value) for key, value in by_country.items()}
+        self.by_category = {key: tuple(value) for key, value in by_category.items()}
+        self.featured = tuple(recipe for recipe in self.recipes if recipe.is_featured)
+        self.countries = tuple(sorted(self.by_country))
+
+        self._postings = {token: tuple(sorted(positions)) for token, positions in postings.items()}
+        self._tokens = sorted(self._postings)
+
+        # Whole-list responses, serialized once
+        self.json_recipes = dumps(records)
+        self.json_countries = dumps(list(self.countries))
+
+    # LOOKUPS
+
+    def get(self, recipe_id: str) -> Optional[Any]:
+        return self.by_id.get(recipe_id)
+
+    def get_by_name(self, name: str) -> Optional[Any]:
+        return self.by_name.get(name)
+
+    def for_country(self, country_id: str) -> List[Any]:
+        return list(self.by_country.get(country_id, ()))
+
+    def for_category(self, category: str) -> List[Any]:
+        return list(self.by_category.get(category, ()))
+
+    def get_featured(self) -> List[Any]:
+        return list(self.featured)
+
+    # SEARCH
+
+    def search(self, query: str) -> List[Any]:
+        """
+        Recipes whose name, local name or a key ingredient contains the query,
+        in catalog order. Every query word must begin a word of the recipe, so
+        candidates come from the token index; the phrase itself is then
+        checked against the pre-folded fields.
+        """
+        phrase = fold(query).strip()
+        words = TOKEN.findall(phrase)
+        if not words:
+            return []
+
+        candidates: Optional[set] = None
+        for word in sorted(set(words), key=len, reverse=True):
+            matches = self._prefix_matches(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        return [
+            self.recipes[position] for position in sorted(candidates)
+            if any(phrase in field for field in self._search_fields[position])
+        ]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "recipes": len(self.recipes),
+            "countries": len(self.countries),
+            "categories": len(self.by_category),
+            "featured": len(self.featured),
+            "tokens": len(self._tokens),
+            "json_bytes": len(self.json_recipes)
+        }
+
+    # PRIVATE HELPER METHODS
+
+    def _prefix_matches(self, word: str) -> set:
+        positions = set()
+        tokens = self._tokens
+        index = bisect.bisect_left(tokens, word)
+        while index < len(tokens) and tokens[index].startswith(word):
+            positions.update(self._postings[tokens[index]])
+            index += 1
+        return positions
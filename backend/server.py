@@ -1,13 +1,14 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Form, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Form, Request, Header, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Awaitable, Callable
 import uuid
 from datetime import datetime, timedelta
 import jwt
@@ -34,7 +35,7 @@ from expanded_reference_recipes import (
     COMPREHENSIVE_REFERENCE_RECIPES, NATIVE_RECIPES_BY_COUNTRY,
     get_recipes_by_country, get_featured_recipes, get_recipe_by_name,
     get_all_countries_with_recipes, get_recipes_by_category, search_recipes,
-    get_native_recipes_json
+    get_native_recipes_json, REFERENCE_CATALOG
 )
 from marketplace_models import (
     VendorApplication, HomeRestaurant, TraditionalRestaurantProfile, MenuOffering, 
@@ -46,9 +47,14 @@ from marketplace_models import (
 )
 from payment_service import payment_service, pricing_engine
 from translation_service import get_translation_service
+from catalog_bundle_service import CatalogBundleService
 from sms_notification_service import get_sms_service
 from tip_rating_service import get_tip_rating_service, RatingRequest, ServiceType
 from grocery_service import get_grocery_service
+from grocery_catalog_importer import GroceryCatalogImporter
+from ingredient_autocomplete import load_database_sources
+from dish_search_index import DishSearchIndex
+from unified_search_service import get_unified_search, DOCUMENT_TYPES
 from daily_marketplace_service import DailyMarketplaceService
 from marketplace_daily_models import (
     CookingOfferRequest, EatingRequestRequest, AppointmentRequest,
@@ -592,7 +598,8 @@ async def health_check():
 @api_router.get("/countries")
 async def get_countries():
     """Get all countries with native recipes"""
-    return get_all_countries_with_recipes()
+    # Serialized once when the reference catalog is built
+    return Response(content=REFERENCE_CATALOG.json_countries, media_type="application/json")
 
 @api_router.get("/users/me")
 async def get_current_user_profile(current_user_id: str = Depends(get_current_user)):
@@ -679,6 +686,7 @@ async def verify_email(email: str, code: str):
     
     user = UserProfile(**user_dict)
     await db.users.insert_one(user.dict())
+    await heritage_recipes_service.record_user_contribution(None, user.dict())
     
     # NEW: Create user type profile
     try:
@@ -1558,68 +1566,13 @@ async def create_white_label_opportunity(licensing_request: Dict[str, Any]):
 @api_router.get("/heritage/user-contributions")
 async def get_user_heritage_contributions():
     """Get aggregated data from user registrations about native dishes"""
-    
-    users_with_heritage = await db.users.find({
-        "$or": [
-            {"native_dishes": {"$exists": True, "$ne": ""}},
-            {"consultation_specialties": {"$exists": True, "$ne": ""}},
-            {"cultural_background": {"$exists": True, "$ne": ""}}
-        ]
-    }, {"_id": 0, "native_dishes": 1, "consultation_specialties": 1, "cultural_background": 1, "username": 1}).to_list(length=1000)
-    
-    # Aggregate data for insights
-    cultural_backgrounds = {}
-    native_dishes_list = []
-    consultation_specialties_list = []
-    
-    for user in users_with_heritage:
-        if user.get('cultural_background'):
-            bg = user['cultural_background'].lower()
-            cultural_backgrounds[bg] = cultural_backgrounds.get(bg, 0) + 1
-        
-        if user.get('native_dishes'):
-            dishes = [d.strip() for d in user['native_dishes'].split(',')]
-            native_dishes_list.extend(dishes)
-        
-        if user.get('consultation_specialties'):
-            specialties = [s.strip() for s in user['consultation_specialties'].split(',')]
-            consultation_specialties_list.extend(specialties)
-    
-    return {
-        "total_contributors": len(users_with_heritage),
-        "cultural_backgrounds": cultural_backgrounds,
-        "top_native_dishes": dict(sorted({dish: native_dishes_list.count(dish) for dish in set(native_dishes_list)}.items(), key=lambda x: x[1], reverse=True)[:20]),
-        "top_consultation_specialties": dict(sorted({spec: consultation_specialties_list.count(spec) for spec in set(consultation_specialties_list)}.items(), key=lambda x: x[1], reverse=True)[:15]),
-        "recent_contributors": users_with_heritage[:10]
-    }
+    # Maintained on registration and profile updates, so this reads only the rollup
+    return await heritage_recipes_service.get_user_contributions()
 
 @api_router.get("/heritage/dishes-by-culture/{cultural_background}")
 async def get_dishes_by_culture(cultural_background: str):
     """Get native dishes from users of a specific cultural background"""
-    
-    users = await db.users.find({
-        "cultural_background": {"$regex": cultural_background, "$options": "i"},
-        "native_dishes": {"$exists": True, "$ne": ""}
-    }, {"_id": 0, "native_dishes": 1, "username": 1, "consultation_specialties": 1}).to_list(length=100)
-    
-    dishes_data = []
-    for user in users:
-        if user.get('native_dishes'):
-            dishes = [d.strip() for d in user['native_dishes'].split(',')]
-            for dish in dishes:
-                dishes_data.append({
-                    "dish_name": dish,
-                    "contributor": user['username'],
-                    "consultation_available": bool(user.get('consultation_specialties')),
-                    "specialties": user.get('consultation_specialties', '')
-                })
-    
-    return {
-        "cultural_background": cultural_background,
-        "total_contributors": len(users),
-        "dishes": dishes_data[:50],  # Limit to 50 for performance
-        "total_dishes": len(dishes_data)
-    }
+    return await heritage_recipes_service.get_dishes_by_culture(cultural_background)
 
 # SUBSCRIPTION BOX & VIRTUAL EVENTS MONETIZATION
 @api_router.get("/revenue/subscription-products")
@@ -2754,6 +2707,9 @@ async def book_special_order(
 # Initialize daily marketplace service
 daily_marketplace = DailyMarketplaceService(db)
 
+# Initialize pre-translated static catalog bundles
+catalog_bundle_service = CatalogBundleService(db)
+
 @api_router.post("/daily-marketplace/cooking-offers", response_model=dict)
 async def create_cooking_offer(
     offer_data: CookingOfferRequest,
@@ -2802,9 +2758,15 @@ async def get_local_cooking_offers(
     is_vegetarian: Optional[bool] = None,
     is_vegan: Optional[bool] = None,
     is_gluten_free: Optional[bool] = None,
+    auto_translate: bool = False,
+    accept_language: Optional[str] = Header(None),
     current_user_id: str = Depends(get_current_user_optional)
 ):
-    """Get local cooking offers based on location and preferences"""
+    """Get local cooking offers based on location and preferences
+    
+    With auto_translate=true, offer text is translated into the Accept-Language
+    language server-side in one batch (dish names are preserved).
+    """
     try:
         # Default location (NYC) - in production would get from user profile or geocoding
         user_location = {
@@ -2838,6 +2800,14 @@ async def get_local_cooking_offers(
             offer["cook_rating"] = cook.get("rating", 0.0) if cook else 0.0
             enriched_offers.append(offer)
         
+        if auto_translate and enriched_offers:
+            translation_service = await get_translation_service()
+            target_language = translation_service.resolve_accept_language(accept_language)
+            if target_language:
+                await translation_service.translate_fields(
+                    enriched_offers, ["title", "description", "special_instructions"], target_language
+                )
+        
         return enriched_offers
         
     except Exception as e:
@@ -3010,40 +2980,40 @@ async def get_my_appointments(current_user_id: str = Depends(get_current_user)):
         logger.error(f"Failed to get user appointments: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+MEAL_CATEGORIES = [
+    {"value": "quick_meals", "label": "Quick Meals", "icon": "⚡"},
+    {"value": "family_dinner", "label": "Family Dinner", "icon": "👨‍👩‍👧‍👦"},
+    {"value": "cultural_specialties", "label": "Cultural Specialties", "icon": "🌍"},
+    {"value": "breakfast", "label": "Breakfast", "icon": "🌅"},
+    {"value": "lunch", "label": "Lunch", "icon": "🥪"},
+    {"value": "dinner", "label": "Dinner", "icon": "🍽️"},
+    {"value": "brunch", "label": "Brunch", "icon": "🥐"},
+    {"value": "desserts", "label": "Desserts", "icon": "🍰"},
+    {"value": "july_4th", "label": "July 4th", "icon": "🇺🇸"},
+    {"value": "cinco_de_mayo", "label": "Cinco de Mayo", "icon": "🇲🇽"},
+    {"value": "thanksgiving", "label": "Thanksgiving", "icon": "🦃"},
+    {"value": "christmas", "label": "Christmas", "icon": "🎄"},
+    {"value": "new_year", "label": "New Year", "icon": "🎊"},
+    {"value": "valentines_day", "label": "Valentine's Day", "icon": "💕"},
+    {"value": "mothers_day", "label": "Mother's Day", "icon": "👩"},
+    {"value": "fathers_day", "label": "Father's Day", "icon": "👨"},
+    {"value": "easter", "label": "Easter", "icon": "🐰"},
+    {"value": "halloween", "label": "Halloween", "icon": "🎃"},
+    {"value": "diwali", "label": "Diwali", "icon": "🪔"},
+    {"value": "chinese_new_year", "label": "Chinese New Year", "icon": "🐉"},
+    {"value": "ramadan", "label": "Ramadan", "icon": "🌙"},
+    {"value": "birthday", "label": "Birthday", "icon": "🎂"},
+    {"value": "anniversary", "label": "Anniversary", "icon": "💒"},
+    {"value": "comfort_food", "label": "Comfort Food", "icon": "🍲"},
+    {"value": "healthy", "label": "Healthy", "icon": "🥗"},
+    {"value": "vegan", "label": "Vegan", "icon": "🌱"},
+    {"value": "vegetarian", "label": "Vegetarian", "icon": "🥕"}
+]
+
 @api_router.get("/daily-marketplace/categories", response_model=List[dict])
-async def get_meal_categories():
+async def get_meal_categories(lang: Optional[str] = None):
     """Get available meal categories"""
-    categories = [
-        {"value": "quick_meals", "label": "Quick Meals", "icon": "⚡"},
-        {"value": "family_dinner", "label": "Family Dinner", "icon": "👨‍👩‍👧‍👦"},
-        {"value": "cultural_specialties", "label": "Cultural Specialties", "icon": "🌍"},
-        {"value": "breakfast", "label": "Breakfast", "icon": "🌅"},
-        {"value": "lunch", "label": "Lunch", "icon": "🥪"},
-        {"value": "dinner", "label": "Dinner", "icon": "🍽️"},
-        {"value": "brunch", "label": "Brunch", "icon": "🥐"},
-        {"value": "desserts", "label": "Desserts", "icon": "🍰"},
-        {"value": "july_4th", "label": "July 4th", "icon": "🇺🇸"},
-        {"value": "cinco_de_mayo", "label": "Cinco de Mayo", "icon": "🇲🇽"},
-        {"value": "thanksgiving", "label": "Thanksgiving", "icon": "🦃"},
-        {"value": "christmas", "label": "Christmas", "icon": "🎄"},
-        {"value": "new_year", "label": "New Year", "icon": "🎊"},
-        {"value": "valentines_day", "label": "Valentine's Day", "icon": "💕"},
-        {"value": "mothers_day", "label": "Mother's Day", "icon": "👩"},
-        {"value": "fathers_day", "label": "Father's Day", "icon": "👨"},
-        {"value": "easter", "label": "Easter", "icon": "🐰"},
-        {"value": "halloween", "label": "Halloween", "icon": "🎃"},
-        {"value": "diwali", "label": "Diwali", "icon": "🪔"},
-        {"value": "chinese_new_year", "label": "Chinese New Year", "icon": "🐉"},
-        {"value": "ramadan", "label": "Ramadan", "icon": "🌙"},
-        {"value": "birthday", "label": "Birthday", "icon": "🎂"},
-        {"value": "anniversary", "label": "Anniversary", "icon": "💒"},
-        {"value": "comfort_food", "label": "Comfort Food", "icon": "🍲"},
-        {"value": "healthy", "label": "Healthy", "icon": "🥗"},
-        {"value": "vegan", "label": "Vegan", "icon": "🌱"},
-        {"value": "vegetarian", "label": "Vegetarian", "icon": "🥕"}
-    ]
-    
-    return categories
+    return await catalog_bundle_service.localize("meal_categories", MEAL_CATEGORIES, lang)
 
 @api_router.get("/daily-marketplace/stats", response_model=dict)
 async def get_daily_marketplace_stats():
@@ -3127,9 +3097,11 @@ async def get_local_farms(
     certifications: Optional[str] = None,
     farming_methods: Optional[str] = None,
     has_farm_dining: Optional[bool] = None,
+    skip: int = 0,
+    limit: int = 50,
     current_user_id: str = Depends(get_current_user_optional)
 ):
-    """Get local farms based on location and preferences"""
+    """Get local farms based on location and preferences, nearest first"""
     try:
         # Default location (would use geocoding in production)
         user_location = {
@@ -3148,7 +3120,8 @@ async def get_local_farms(
             filters["has_farm_dining"] = has_farm_dining
         
         farms = await farm_ecosystem_service.get_local_farms(
-            user_location, postal_code, country, max_distance_km, filters
+            user_location, postal_code, country, max_distance_km, filters,
+            skip=max(0, skip), limit=min(max(1, limit), 100)
         )
         
         return farms
@@ -3338,51 +3311,27 @@ async def get_farm_dining_venues(
     max_distance_km: float = 50.0,
     venue_type: Optional[str] = None,
     max_capacity: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 50,
     current_user_id: str = Depends(get_current_user_optional)
 ):
-    """Get farm dining venues for outdoor farm-to-table experiences"""
+    """Get farm dining venues for outdoor farm-to-table experiences, nearest first"""
     try:
         user_location = {
             "type": "Point",
             "coordinates": [-73.935242, 40.730610]
         }
         
-        # Get local farms first
-        farms = await farm_matching_service.find_local_farms(
-            user_location, postal_code, country, max_distance_km, {"has_farm_dining": True}
-        )
-        
-        # Get dining venues for these farms
-        farm_ids = [farm["id"] for farm in farms]
-        
-        query = {
-            "farm_id": {"$in": farm_ids},
-            "is_active": True,
-            "is_accepting_bookings": True
-        }
-        
+        # Venues of the nearest farms, joined and paged inside one $geoNear aggregation
+        filters = {}
         if venue_type:
-            query["venue_type"] = venue_type
+            filters["venue_type"] = venue_type
         if max_capacity:
-            query["max_capacity"] = {"$gte": max_capacity}
-        
-        venues_cursor = db.farm_dining_venues.find(query, {"_id": 0})
-        venues = await venues_cursor.to_list(length=50)
+            filters["max_capacity"] = max_capacity
         
-        # Enrich with farm information and distance
-        enriched_venues = []
-        for venue in venues:
-            farm = next((f for f in farms if f["id"] == venue["farm_id"]), None)
-            if farm:
-                venue["farm_name"] = farm["farm_name"]
-                venue["distance_km"] = farm["distance_km"]
-                venue["farm_certifications"] = farm.get("certifications", [])
-                enriched_venues.append(venue)
-        
-        # Sort by distance
-        enriched_venues.sort(key=lambda x: x["distance_km"])
-        
-        return enriched_venues
+        return await farm_matching_service.find_dining_venues(
+            user_location, max_distance_km, filters, skip=max(0, skip), limit=min(max(1, limit), 100)
+        )
         
     except Exception as e:
         logger.error(f"Failed to get farm dining venues: {str(e)}")
@@ -3660,66 +3609,66 @@ async def upgrade_to_premium(
         logger.error(f"Failed to upgrade to premium: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+PREMIUM_TIERS = [
+    {
+        "tier": "cook_plus",
+        "name": "Cook Plus",
+        "monthly_price": 4.99,
+        "annual_price": 49.99,
+        "savings_annual": "17%",
+        "description": "Enhanced features for home cooks",
+        "features": [
+            "Ad-free experience",
+            "Unlimited cooking offers",
+            "Enhanced profile customization",
+            "Priority customer support",
+            "Advanced cooking analytics"
+        ],
+        "target_audience": "Active home cooks",
+        "popular": False
+    },
+    {
+        "tier": "foodie_pro",
+        "name": "Foodie Pro",
+        "monthly_price": 7.99,
+        "annual_price": 79.99,
+        "savings_annual": "17%",
+        "description": "Premium experience for food lovers",
+        "features": [
+            "Ad-free experience",
+            "Priority booking for popular meals",
+            "Access to premium recipe collection",
+            "Custom dietary filters",
+            "Bulk translation capabilities",
+            "Priority customer support"
+        ],
+        "target_audience": "Food enthusiasts",
+        "popular": True
+    },
+    {
+        "tier": "culinary_vip",
+        "name": "Culinary VIP",
+        "monthly_price": 12.99,
+        "annual_price": 129.99,
+        "savings_annual": "17%",
+        "description": "Complete premium culinary experience",
+        "features": [
+            "All Cook Plus and Foodie Pro features",
+            "Video calling with chefs",
+            "Exclusive VIP events and tastings",
+            "Personal culinary concierge",
+            "Advanced recipe analytics",
+            "Beta access to new features"
+        ],
+        "target_audience": "Culinary professionals and enthusiasts",
+        "popular": False
+    }
+]
+
 @api_router.get("/premium/tiers", response_model=List[dict])
-async def get_premium_tiers():
+async def get_premium_tiers(lang: Optional[str] = None):
     """Get available premium tiers and pricing"""
-    tiers = [
-        {
-            "tier": "cook_plus",
-            "name": "Cook Plus",
-            "monthly_price": 4.99,
-            "annual_price": 49.99,
-            "savings_annual": "17%",
-            "description": "Enhanced features for home cooks",
-            "features": [
-                "Ad-free experience",
-                "Unlimited cooking offers",
-                "Enhanced profile customization",
-                "Priority customer support",
-                "Advanced cooking analytics"
-            ],
-            "target_audience": "Active home cooks",
-            "popular": False
-        },
-        {
-            "tier": "foodie_pro",
-            "name": "Foodie Pro",
-            "monthly_price": 7.99,
-            "annual_price": 79.99,
-            "savings_annual": "17%",
-            "description": "Premium experience for food lovers",
-            "features": [
-                "Ad-free experience",
-                "Priority booking for popular meals",
-                "Access to premium recipe collection",
-                "Custom dietary filters",
-                "Bulk translation capabilities",
-                "Priority customer support"
-            ],
-            "target_audience": "Food enthusiasts",
-            "popular": True
-        },
-        {
-            "tier": "culinary_vip",
-            "name": "Culinary VIP",
-            "monthly_price": 12.99,
-            "annual_price": 129.99,
-            "savings_annual": "17%",
-            "description": "Complete premium culinary experience",
-            "features": [
-                "All Cook Plus and Foodie Pro features",
-                "Video calling with chefs",
-                "Exclusive VIP events and tastings",
-                "Personal culinary concierge",
-                "Advanced recipe analytics",
-                "Beta access to new features"
-            ],
-            "target_audience": "Culinary professionals and enthusiasts",
-            "popular": False
-        }
-    ]
-    
-    return tiers
+    return await catalog_bundle_service.localize("premium_tiers", PREMIUM_TIERS, lang)
 
 @api_router.get("/engagement/profile", response_model=dict)
 async def get_user_engagement_profile(current_user_id: str = Depends(get_current_user)):
@@ -4383,69 +4332,69 @@ async def get_local_charity_organizations(
         logger.error(f"Failed to get local charity organizations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+CHARITY_ACTIVITY_TYPES = [
+    {
+        "value": "food_bank",
+        "label": "Food Bank",
+        "icon": "🏪",
+        "description": "Volunteering at local food banks",
+        "typical_activities": ["Food sorting", "Distribution", "Inventory management"],
+        "impact_multiplier": 1.2
+    },
+    {
+        "value": "homeless_shelter", 
+        "label": "Homeless Shelter",
+        "icon": "🏠",
+        "description": "Supporting homeless individuals and families",
+        "typical_activities": ["Meal service", "Shelter support", "Case management"],
+        "impact_multiplier": 1.3
+    },
+    {
+        "value": "community_kitchen",
+        "label": "Community Kitchen", 
+        "icon": "👩‍🍳",
+        "description": "Community meal preparation and service",
+        "typical_activities": ["Cooking", "Meal prep", "Teaching cooking skills"],
+        "impact_multiplier": 1.1
+    },
+    {
+        "value": "seniors_center",
+        "label": "Seniors Center",
+        "icon": "👵",
+        "description": "Supporting elderly community members",
+        "typical_activities": ["Meal delivery", "Social activities", "Transportation"],
+        "impact_multiplier": 1.1
+    },
+    {
+        "value": "school_program",
+        "label": "School Program",
+        "icon": "🏫", 
+        "description": "Supporting school nutrition programs",
+        "typical_activities": ["Breakfast programs", "After-school snacks", "Nutrition education"],
+        "impact_multiplier": 1.2
+    },
+    {
+        "value": "emergency_relief",
+        "label": "Emergency Relief",
+        "icon": "🚨",
+        "description": "Emergency disaster and crisis response",
+        "typical_activities": ["Emergency meals", "Disaster relief", "Crisis support"],
+        "impact_multiplier": 1.5
+    },
+    {
+        "value": "local_charity",
+        "label": "Local Charity",
+        "icon": "❤️",
+        "description": "Other local charitable organizations",
+        "typical_activities": ["Community events", "Fundraising", "General volunteering"],
+        "impact_multiplier": 1.0
+    }
+]
+
 @api_router.get("/charity/activity-types", response_model=List[dict])
-async def get_charity_activity_types():
+async def get_charity_activity_types(lang: Optional[str] = None):
     """Get available charity activity types for submissions"""
-    types = [
-        {
-            "value": "food_bank",
-            "label": "Food Bank",
-            "icon": "🏪",
-            "description": "Volunteering at local food banks",
-            "typical_activities": ["Food sorting", "Distribution", "Inventory management"],
-            "impact_multiplier": 1.2
-        },
-        {
-            "value": "homeless_shelter", 
-            "label": "Homeless Shelter",
-            "icon": "🏠",
-            "description": "Supporting homeless individuals and families",
-            "typical_activities": ["Meal service", "Shelter support", "Case management"],
-            "impact_multiplier": 1.3
-        },
-        {
-            "value": "community_kitchen",
-            "label": "Community Kitchen", 
-            "icon": "👩‍🍳",
-            "description": "Community meal preparation and service",
-            "typical_activities": ["Cooking", "Meal prep", "Teaching cooking skills"],
-            "impact_multiplier": 1.1
-        },
-        {
-            "value": "seniors_center",
-            "label": "Seniors Center",
-            "icon": "👵",
-            "description": "Supporting elderly community members",
-            "typical_activities": ["Meal delivery", "Social activities", "Transportation"],
-            "impact_multiplier": 1.1
-        },
-        {
-            "value": "school_program",
-            "label": "School Program",
-            "icon": "🏫", 
-            "description": "Supporting school nutrition programs",
-            "typical_activities": ["Breakfast programs", "After-school snacks", "Nutrition education"],
-            "impact_multiplier": 1.2
-        },
-        {
-            "value": "emergency_relief",
-            "label": "Emergency Relief",
-            "icon": "🚨",
-            "description": "Emergency disaster and crisis response",
-            "typical_activities": ["Emergency meals", "Disaster relief", "Crisis support"],
-            "impact_multiplier": 1.5
-        },
-        {
-            "value": "local_charity",
-            "label": "Local Charity",
-            "icon": "❤️",
-            "description": "Other local charitable organizations",
-            "typical_activities": ["Community events", "Fundraising", "General volunteering"],
-            "impact_multiplier": 1.0
-        }
-    ]
-    
-    return types
+    return await catalog_bundle_service.localize("charity_activity_types", CHARITY_ACTIVITY_TYPES, lang)
 
 @api_router.get("/charity/impact-calculator", response_model=dict)
 async def calculate_charity_impact(
@@ -5549,127 +5498,140 @@ EUROPEAN_DISHES_BY_COUNTRY = {
     ]
 }
 
+# Heritage dish catalogs by cuisine: route key -> (display name, dishes by country)
+HERITAGE_CUISINE_DATABASES = {
+    "african": ("African", AFRICAN_DISHES_BY_COUNTRY),
+    "caribbean": ("Caribbean", CARIBBEAN_DISHES_BY_COUNTRY),
+    "asian": ("Asian", ASIAN_DISHES_BY_COUNTRY),
+    "latin_american": ("Latin American", LATIN_AMERICAN_DISHES_BY_COUNTRY),
+    "middle_eastern": ("Middle Eastern", MIDDLE_EASTERN_DISHES_BY_COUNTRY),
+    "european": ("European", EUROPEAN_DISHES_BY_COUNTRY)
+}
+
+def _format_dishes_by_country(dishes_dict: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Group a cuisine's dishes under display country names"""
+    formatted_countries = {}
+    for country, dishes in dishes_dict.items():
+        formatted_countries[country.replace('_', ' ').title()] = {
+            "country_code": country,
+            "dishes": dishes,
+            "count": len(dishes)
+        }
+    return formatted_countries
+
+# The dish catalogs are static, so they are formatted and indexed once at import
+FORMATTED_HERITAGE_DISHES = {
+    cuisine_key: {
+        "countries": _format_dishes_by_country(dishes_dict),
+        "total_countries": len(dishes_dict),
+        "total_dishes": sum(len(dishes) for dishes in dishes_dict.values())
+    }
+    for cuisine_key, (_, dishes_dict) in HERITAGE_CUISINE_DATABASES.items()
+}
+
+GLOBAL_DISHES_RESPONSE = {
+    "success": True,
+    "global_cuisines": {
+        cuisine_name: FORMATTED_HERITAGE_DISHES[cuisine_key]
+        for cuisine_key, (cuisine_name, _) in HERITAGE_CUISINE_DATABASES.items()
+    },
+    "summary": {
+        "total_cuisines": len(HERITAGE_CUISINE_DATABASES),
+        "total_countries": sum(cuisine["total_countries"] for cuisine in FORMATTED_HERITAGE_DISHES.values()),
+        "total_dishes": sum(cuisine["total_dishes"] for cuisine in FORMATTED_HERITAGE_DISHES.values())
+    },
+    "usage": "Use in registration form to help users select dishes they can prepare from their cultural heritage",
+    "cultural_note": "Comprehensive collection from across the globe to support authentic cultural representation and diaspora connection"
+}
+
+# Translated once as a template; the cuisine name is filled in per request
+DISHES_BY_CUISINE_NOTE = "Traditional dishes from {cuisine} heritage for authentic cultural representation"
+
+AFRICAN_DISHES_RESPONSE = {
+    "success": True,
+    "african_dishes": FORMATTED_HERITAGE_DISHES["african"]["countries"],
+    "total_countries": FORMATTED_HERITAGE_DISHES["african"]["total_countries"],
+    "total_dishes": FORMATTED_HERITAGE_DISHES["african"]["total_dishes"],
+    "usage": "Use in registration form to help users select dishes they can prepare",
+    "cultural_note": "Comprehensive collection from across Africa to support authentic cultural representation",
+    "migration_note": "Consider using /api/heritage/global-dishes for all cuisines"
+}
+
+heritage_dish_index = DishSearchIndex(
+    (
+        {
+            "fields": {"name": dish},
+            "facets": {"cuisine": cuisine_name, "country": country.replace('_', ' ').title()},
+            "payload": {"dish": dish, "cuisine": cuisine_name, "cuisine_key": cuisine_key, "country_code": country}
+        }
+        for cuisine_key, (cuisine_name, dishes_dict) in HERITAGE_CUISINE_DATABASES.items()
+        for country, dishes in dishes_dict.items()
+        for dish in dishes
+    ),
+    field_weights={"name": 1.0},
+    facets=["cuisine", "country"]
+)
+
 # ENHANCED REGISTRATION WITH AFRICAN DISHES
 # GLOBAL DISHES API ENDPOINTS
 @api_router.get("/heritage/global-dishes")
-async def get_global_dishes():
+async def get_global_dishes(lang: Optional[str] = None):
     """Get comprehensive list of dishes from all global cuisines for registration"""
-    
-    all_dishes_databases = {
-        "African": AFRICAN_DISHES_BY_COUNTRY,
-        "Caribbean": CARIBBEAN_DISHES_BY_COUNTRY,
-        "Asian": ASIAN_DISHES_BY_COUNTRY,
-        "Latin American": LATIN_AMERICAN_DISHES_BY_COUNTRY,
-        "Middle Eastern": MIDDLE_EASTERN_DISHES_BY_COUNTRY,
-        "European": EUROPEAN_DISHES_BY_COUNTRY
-    }
-    
-    formatted_cuisines = {}
-    total_dishes = 0
-    total_countries = 0
-    
-    for cuisine_type, countries_dict in all_dishes_databases.items():
-        formatted_countries = {}
-        cuisine_dishes = 0
-        
-        for country, dishes in countries_dict.items():
-            country_name = country.replace('_', ' ').title()
-            formatted_countries[country_name] = {
-                "country_code": country,
-                "dishes": dishes,
-                "count": len(dishes)
-            }
-            cuisine_dishes += len(dishes)
-            total_dishes += len(dishes)
-        
-        formatted_cuisines[cuisine_type] = {
-            "countries": formatted_countries,
-            "total_countries": len(countries_dict),
-            "total_dishes": cuisine_dishes
-        }
-        total_countries += len(countries_dict)
-    
-    return {
-        "success": True,
-        "global_cuisines": formatted_cuisines,
-        "summary": {
-            "total_cuisines": len(all_dishes_databases),
-            "total_countries": total_countries,
-            "total_dishes": total_dishes
-        },
-        "usage": "Use in registration form to help users select dishes they can prepare from their cultural heritage",
-        "cultural_note": "Comprehensive collection from across the globe to support authentic cultural representation and diaspora connection"
-    }
+    return await catalog_bundle_service.localize("heritage_dishes", GLOBAL_DISHES_RESPONSE, lang)
 
 @api_router.get("/heritage/african-dishes")
-async def get_african_dishes():
+async def get_african_dishes(lang: Optional[str] = None):
     """Get comprehensive list of African dishes by country for registration - LEGACY ENDPOINT"""
-    
-    # Format for frontend consumption
-    formatted_dishes = {}
-    total_dishes = 0
-    
-    for country, dishes in AFRICAN_DISHES_BY_COUNTRY.items():
-        country_name = country.replace('_', ' ').title()
-        formatted_dishes[country_name] = {
-            "country_code": country,
-            "dishes": dishes,
-            "count": len(dishes)
-        }
-        total_dishes += len(dishes)
-    
-    return {
-        "success": True,
-        "african_dishes": formatted_dishes,
-        "total_countries": len(AFRICAN_DISHES_BY_COUNTRY),
-        "total_dishes": total_dishes,
-        "usage": "Use in registration form to help users select dishes they can prepare",
-        "cultural_note": "Comprehensive collection from across Africa to support authentic cultural representation",
-        "migration_note": "Consider using /api/heritage/global-dishes for all cuisines"
-    }
+    return await catalog_bundle_service.localize("heritage_dishes", AFRICAN_DISHES_RESPONSE, lang, variant="african")
 
 @api_router.get("/heritage/dishes-by-cuisine/{cuisine_type}")
-async def get_dishes_by_cuisine(cuisine_type: str):
+async def get_dishes_by_cuisine(cuisine_type: str, lang: Optional[str] = None):
     """Get dishes from a specific cuisine type (African, Caribbean, Asian, etc.)"""
     
-    cuisine_databases = {
-        "african": AFRICAN_DISHES_BY_COUNTRY,
-        "caribbean": CARIBBEAN_DISHES_BY_COUNTRY,
-        "asian": ASIAN_DISHES_BY_COUNTRY,
-        "latin_american": LATIN_AMERICAN_DISHES_BY_COUNTRY,
-        "middle_eastern": MIDDLE_EASTERN_DISHES_BY_COUNTRY,
-        "european": EUROPEAN_DISHES_BY_COUNTRY
-    }
-    
     cuisine_key = cuisine_type.lower().replace(' ', '_').replace('-', '_')
     
-    if cuisine_key not in cuisine_databases:
+    if cuisine_key not in FORMATTED_HERITAGE_DISHES:
         raise HTTPException(
             status_code=404, 
-            detail=f"Cuisine type '{cuisine_type}' not found. Available: {', '.join(cuisine_databases.keys())}"
+            detail=f"Cuisine type '{cuisine_type}' not found. Available: {', '.join(FORMATTED_HERITAGE_DISHES.keys())}"
         )
     
-    dishes_dict = cuisine_databases[cuisine_key]
-    formatted_dishes = {}
-    total_dishes = 0
-    
-    for country, dishes in dishes_dict.items():
-        country_name = country.replace('_', ' ').title()
-        formatted_dishes[country_name] = {
-            "country_code": country,
-            "dishes": dishes,
-            "count": len(dishes)
-        }
-        total_dishes += len(dishes)
+    # Named from the catalog, not the requested spelling, since the payload is memoized per cuisine
+    cuisine_name = HERITAGE_CUISINE_DATABASES[cuisine_key][0]
+    response = {
+        "success": True,
+        "cuisine_type": cuisine_name,
+        **FORMATTED_HERITAGE_DISHES[cuisine_key],
+        "cultural_note": DISHES_BY_CUISINE_NOTE
+    }
     
+    return await catalog_bundle_service.localize(
+        "heritage_dishes", response, lang, variant=cuisine_key, params={"cuisine": cuisine_name}
+    )
+
+@api_router.get("/heritage/dishes/search")
+async def search_heritage_dishes(
+    q: str = "",
+    cuisine: str = "",
+    country: str = "",
+    offset: int = 0,
+    limit: int = 20
+):
+    """Search heritage dish names across all cuisines (prefix matching, ranked, with facet counts)"""
+    found = heritage_dish_index.search(
+        q, filters={"cuisine": cuisine.replace('_', ' '), "country": country}, offset=offset, limit=min(limit, 100)
+    )
     return {
         "success": True,
-        "cuisine_type": cuisine_type.title(),
-        "countries": formatted_dishes,
-        "total_countries": len(dishes_dict),
-        "total_dishes": total_dishes,
-        "cultural_note": f"Traditional dishes from {cuisine_type.title()} heritage for authentic cultural representation"
+        "query": q,
+        "filters": {"cuisine": cuisine, "country": country},
+        "results": [{**hit["payload"], "relevance": hit["score"]} for hit in found["results"]],
+        "count": len(found["results"]),
+        "total": found["total"],
+        "offset": offset,
+        "facets": found["facets"]
     }
+
 @api_router.post("/admin/setup-platform-owner")
 async def setup_platform_owner(
     owner_data: Dict[str, Any]
@@ -6199,6 +6161,7 @@ async def update_user_profile(
         
         # Get updated user data
         updated_user = await db.users.find_one({"id": current_user_id})
+        await heritage_recipes_service.record_user_contribution(current_user, updated_user)
         
         return {
             "success": True,
@@ -7093,6 +7056,26 @@ AFRICAN_CUISINE_DATABASE = {
     }
 }
 
+# Compiled once: ranked text search with country and category facets for /recipes/search
+african_recipe_index = DishSearchIndex(
+    (
+        {
+            "fields": dish,
+            "facets": {"country": country_data["country"], "category": dish["category"]},
+            "payload": {
+                **dish,
+                "country_id": country_code,
+                "country": country_data["country"],
+                "popularity_score": 85
+            }
+        }
+        for country_code, country_data in AFRICAN_CUISINE_DATABASE.items()
+        for dish in country_data["dishes"]
+    ),
+    field_weights={"name_english": 4.0, "name_local": 4.0, "key_ingredients": 2.0, "description": 1.0},
+    facets=["country", "category"]
+)
+
 @api_router.get("/native-recipes")
 async def get_native_recipes():
     """Get native recipes by country for browse templates page"""
@@ -7122,7 +7105,7 @@ async def get_native_recipes():
         raise HTTPException(status_code=500, detail=f"Failed to fetch native recipes: {str(e)}")
 
 @api_router.get("/reference-recipes") 
-async def get_reference_recipes():
+async def get_reference_recipes(lang: Optional[str] = None):
     """Get comprehensive reference recipes for browse templates page"""
     try:
         # Create comprehensive recipe list from African database
@@ -7150,69 +7133,97 @@ async def get_reference_recipes():
         except:
             pass  # Continue with African dishes only
         
-        return {
+        response = {
             "success": True,
             "featured_recipes": featured_recipes,
             "countries": [data["country"] for data in AFRICAN_CUISINE_DATABASE.values()],
             "recipes": all_recipes,
             "total_count": len(all_recipes)
         }
+        
+        return await catalog_bundle_service.localize("reference_recipes", response, lang)
     except Exception as e:
         logger.error(f"Failed to fetch reference recipes: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch reference recipes: {str(e)}")
 
+@api_router.get("/reference-recipes/catalog")
+async def get_reference_recipe_catalog():
+    """Full reference recipe catalog with stable recipe IDs"""
+    # Serialized once when the reference catalog is built
+    return Response(content=REFERENCE_CATALOG.json_recipes, media_type="application/json")
+
 @api_router.get("/recipes/search")
 async def search_recipes_endpoint(
     query: str = "",
     country: str = "",
     category: str = "",
-    limit: int = 20
+    limit: int = 20,
+    offset: int = 0
 ):
     """Search recipes with filters"""
     try:
         # Search in African cuisine database
-        results = []
-        
-        for country_code, country_data in AFRICAN_CUISINE_DATABASE.items():
-            if country and country.lower() not in country_data["country"].lower():
-                continue
-                
-            for dish in country_data["dishes"]:
-                # Text search in name and description
-                if query:
-                    search_text = f"{dish['name_english']} {dish['description']} {' '.join(dish['key_ingredients'])}".lower()
-                    if query.lower() not in search_text:
-                        continue
-                
-                # Category filter
-                if category and category.lower() != dish["category"].lower():
-                    continue
-                    
-                recipe_data = {
-                    **dish,
-                    "country_id": country_code,
-                    "country": country_data["country"],
-                    "popularity_score": 85
-                }
-                results.append(recipe_data)
-                
-                if len(results) >= limit:
-                    break
-            
-            if len(results) >= limit:
-                break
+        found = african_recipe_index.search(
+            query, filters={"country": country, "category": category}, offset=offset, limit=limit
+        )
+        results = [
+            {**hit["payload"], "relevance": hit["score"]} if hit["score"] is not None else hit["payload"]
+            for hit in found["results"]
+        ]
         
         return {
             "success": True,
             "results": results,
             "query": query,
             "filters": {"country": country, "category": category},
-            "count": len(results)
+            "count": len(results),
+            "total": found["total"],
+            "offset": offset,
+            "facets": found["facets"]
         }
     except Exception as e:
         logger.error(f"Failed to search recipes: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to search recipes: {str(e)}")
 
+@api_router.get("/search")
+async def unified_search(
+    q: str,
+    types: str = "",
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    offset: int = 0,
+    limit: int = 20
+):
+    """Search offers, requests, heritage and reference recipes, farm products and ethnic stores at once"""
+    requested_types = [doc_type.strip() for doc_type in types.split(",") if doc_type.strip()]
+    unknown_types = [doc_type for doc_type in requested_types if doc_type not in DOCUMENT_TYPES]
+    if unknown_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown result types: {', '.join(unknown_types)}. Available: {', '.join(DOCUMENT_TYPES)}"
+        )
+    
+    found = get_unified_search().search(
+        q, types=requested_types or None, lat=lat, lng=lng, radius_km=radius_km,
+        offset=offset, limit=min(limit, 100)
+    )
+    return {
+        "success": True,
+        "query": q,
+        "results": found["results"],
+        "count": len(found["results"]),
+        "total": found["total"],
+        "offset": offset,
+        "type_counts": found["type_counts"],
+        "took_ms": found["took_ms"]
+    }
+
+@api_router.get("/search/stats")
+async def unified_search_stats():
+    """Index size, update lag and query latency of the unified search index"""
+    return {"success": True, "stats": get_unified_search().get_stats()}
+
 # Real Grocery Store Integration
 @api_router.get("/grocery/search")
 async def search_grocery_stores(
@@ -7387,9 +7398,67 @@ async def get_store_details(store_id: str):
         logger.error(f"Failed to get store details: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get store details: {str(e)}")
 
+# PRE-TRANSLATED CATALOG BUNDLES
+# Static catalogs are translated offline (see build_catalog_bundles.py) and served per language.
+# Brand names (premium tier names) and heritage dish names are never translated.
+catalog_bundle_service.register_catalog("meal_categories", lambda: MEAL_CATEGORIES, ["label"])
+catalog_bundle_service.register_catalog(
+    "premium_tiers", lambda: PREMIUM_TIERS, ["description", "features", "target_audience"]
+)
+catalog_bundle_service.register_catalog(
+    "charity_activity_types", lambda: CHARITY_ACTIVITY_TYPES, ["label", "description", "typical_activities"]
+)
+catalog_bundle_service.register_catalog(
+    "reference_recipes", get_reference_recipes,
+    ["description", "cultural_significance", "serving_size", "key_ingredients"]
+)
+catalog_bundle_service.register_catalog(
+    "heritage_dishes", lambda: [GLOBAL_DISHES_RESPONSE, AFRICAN_DISHES_RESPONSE], ["usage", "cultural_note"],
+    templates=[DISHES_BY_CUISINE_NOTE]
+)
+
+@api_router.get("/admin/catalog-bundles")
+async def get_catalog_bundle_status(current_user_id: str = Depends(get_current_user)):
+    """List the pre-translated catalog bundles - Platform Owner Access Only"""
+    user = await db.users.find_one({"id": current_user_id})
+    if not user or not user.get("is_platform_owner"):
+        raise HTTPException(status_code=403, detail="Platform owner access required")
+    
+    return catalog_bundle_service.get_bundle_status()
+
+@api_router.post("/admin/catalog-bundles/build")
+async def build_catalog_bundles(
+    languages: Optional[List[str]] = None,
+    force: bool = False,
+    current_user_id: str = Depends(get_current_user)
+):
+    """Translate static catalogs into bundles for the given languages - Platform Owner Access Only"""
+    user = await db.users.find_one({"id": current_user_id})
+    if not user or not user.get("is_platform_owner"):
+        raise HTTPException(status_code=403, detail="Platform owner access required")
+    
+    try:
+        summary = await catalog_bundle_service.build_bundles(languages=languages, force=force)
+        return {"success": len(summary["failed"]) == 0, **summary}
+    except Exception as e:
+        logger.error(f"Catalog bundle build failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Include main API router (must be after all route definitions)
 app.include_router(api_router, prefix="/api")
 
+async def run_startup_backfill(backfill: Callable[[], Awaitable[Any]], done: str):
+    """
+    Run a one-off data backfill in the background so startup never waits on a
+    collection scan; `done` is logged, formatted with the result, when it changed anything
+    """
+    try:
+        result = await backfill()
+        if result and (not isinstance(result, dict) or any(result.values())):
+            logger.info(done.format(result))
+    except Exception as e:
+        logger.error(f"Startup backfill {backfill.__name__} failed: {str(e)}")
+
 @app.on_event("startup")
 async def startup_event():
     # Create indexes for marketplace
@@ -7476,12 +7545,23 @@ async def startup_event():
     await db.farm_products.create_index("availability_type")
     await db.farm_products.create_index("seasonal_months")
     await db.farm_products.create_index("is_active")
+    await db.farm_products.create_index("canonical_ingredients")
+    await db.farm_products.create_index([
+        ("farm_location", "2dsphere"), ("canonical_ingredients", 1), ("is_active", 1), ("is_available", 1)
+    ])
+    asyncio.create_task(run_startup_backfill(
+        farm_ecosystem_service.backfill_product_farm_locations, "Stored farm locations on {} farm products"
+    ))
     await db.farm_product_orders.create_index("customer_id")
     await db.farm_product_orders.create_index("farm_id")
     await db.farm_product_orders.create_index("vendor_id")
     await db.farm_product_orders.create_index("order_date")
     await db.farm_product_orders.create_index("status")
     await db.farm_dining_venues.create_index("farm_id")
+    await db.farm_dining_venues.create_index([("farm_id", 1), ("is_active", 1), ("is_accepting_bookings", 1)])
+    flagged = await farm_ecosystem_service.backfill_farm_dining_flags()
+    if flagged:
+        logger.info(f"Updated the farm dining flag on {flagged} farms")
     await db.farm_dining_venues.create_index("vendor_id")
     await db.farm_dining_venues.create_index("venue_type")
     await db.farm_dining_venues.create_index("is_active")
@@ -7539,6 +7619,7 @@ async def startup_event():
     await db.matching_results.create_index("created_at")
     
     # Create indexes for Heritage Recipes system
+    await db.heritage_recipes.create_index("id")
     await db.heritage_recipes.create_index("created_by")
     await db.heritage_recipes.create_index("country_region") 
     await db.heritage_recipes.create_index("cultural_significance")
@@ -7548,15 +7629,32 @@ async def startup_event():
     await db.heritage_recipes.create_index("elder_approved")
     await db.heritage_recipes.create_index("specialty_ingredients")
     await db.heritage_recipes.create_index("created_at")
+    await db.heritage_recipes.create_index([("country_region", 1), ("cultural_significance", 1), ("is_public", 1)])
+    await heritage_recipes_service.create_search_indexes()
+    # Search falls back to a neutral authenticity score for recipes not scored yet
+    asyncio.create_task(run_startup_backfill(
+        heritage_recipes_service.backfill_authenticity_scores, "Stored authenticity scores on {} heritage recipes"
+    ))
+    # Fingerprinting recipes saved before near-duplicate detection can take a while; don't hold up startup
+    asyncio.create_task(heritage_recipes_service.run_duplicate_index_backfill())
+    await db.specialty_ingredients.create_index("id")
     await db.specialty_ingredients.create_index("ingredient_name")
     await db.specialty_ingredients.create_index("rarity_level")
     await db.specialty_ingredients.create_index("origin_countries")
     await db.specialty_ingredients.create_index("added_by")
     await db.specialty_ingredients.create_index("available_at_stores")
+    await db.specialty_ingredients.create_index("name_keys")
+    asyncio.create_task(run_startup_backfill(
+        heritage_recipes_service.backfill_specialty_name_keys, "Stored name keys on {} specialty ingredients"
+    ))
     await db.ethnic_grocery_stores.create_index("store_name")
     await db.ethnic_grocery_stores.create_index("store_type")
     await db.ethnic_grocery_stores.create_index("specialties")
-    await db.ethnic_grocery_stores.create_index([("location.lat", 1), ("location.lng", 1)])
+    await db.ethnic_grocery_stores.create_index([("geo_location", "2dsphere"), ("specialty_ingredients", 1), ("is_active", 1)])
+    await db.store_chain_locations.create_index([("geo_location", "2dsphere"), ("chain_id", 1)])
+    asyncio.create_task(run_startup_backfill(
+        heritage_recipes_service.backfill_store_geo_points, "Indexed store locations: {}"
+    ))
     await db.ethnic_grocery_stores.create_index("postal_code")
     await db.ethnic_grocery_stores.create_index("is_active")
     await db.ethnic_grocery_stores.create_index("added_by")
@@ -7572,6 +7670,19 @@ async def startup_event():
     await db.store_chains.create_index("chain_id", unique=True)
     await db.store_chains.create_index("specialties")
     await db.store_chains.create_index("integration_status")
+    await heritage_recipes_service.inventory_sync.create_indexes()
+    await db.heritage_recipe_engagement.create_index([("recipe_id", 1), ("user_id", 1), ("action", 1)], unique=True)
+    await db.heritage_insights.create_index("id", unique=True)
+    await db.heritage_contributions.create_index([("kind", 1), ("key", 1)], unique=True)
+    await db.heritage_contributions.create_index([("kind", 1), ("count", -1)])
+    await db.heritage_contributions.create_index([("kind", 1), ("culture", 1), ("count", -1)])
+    asyncio.create_task(run_startup_backfill(
+        heritage_recipes_service.backfill_user_contributions, "Built heritage contributions from {} user profiles"
+    ))
+    # Rebuild the rolled-up preservation insights now and then, repairing any drift in the counters
+    asyncio.create_task(heritage_recipes_service.run_insights_reconciliation(
+        interval_hours=float(os.environ.get('HERITAGE_INSIGHTS_RECONCILE_HOURS', 6))
+    ))
     
     # Existing indexes
     await db.users.create_index("email", unique=True)
@@ -7580,8 +7691,55 @@ async def startup_event():
     await db.snippets.create_index("author_id")
     await db.snippet_interactions.create_index([("snippet_id", 1), ("user_id", 1)])
     
+    # Shared grocery search cache tier and local product catalog
+    await get_grocery_service(db)
+    grocery_catalog_importer = GroceryCatalogImporter(db)
+    await grocery_catalog_importer.create_indexes()
+    if os.environ.get('GROCERY_CATALOG_DELTA_PATH'):
+        # Ops drop the latest Open Food Facts delta at this path; only newer products are written
+        asyncio.create_task(grocery_catalog_importer.run_periodic_refresh(
+            os.environ['GROCERY_CATALOG_DELTA_PATH'],
+            interval_hours=float(os.environ.get('GROCERY_CATALOG_REFRESH_HOURS', 24)),
+            country=os.environ.get('GROCERY_CATALOG_COUNTRY'),
+            on_complete=lambda: load_database_sources(db)
+        ))
+    
+    # Ingredient autocomplete vocabulary (specialty ingredients and local catalog names)
+    await load_database_sources(db)
+    
+    # Pantry recipe matching index over stored recipes
+    await db.enhanced_recipes.create_index("id", unique=True)
+    enhanced_cooking_service = await get_enhanced_cooking_service(db)
+    merged_pantries = await enhanced_cooking_service.create_pantry_indexes()
+    if merged_pantries:
+        logger.info(f"Merged {merged_pantries} duplicate user pantries")
+    
+    # Canonical ingredient names on farm listings (needs the shared vocabulary loaded above)
+    asyncio.create_task(run_startup_backfill(
+        farm_ecosystem_service.backfill_canonical_ingredients, "Stored canonical ingredients on {} farm products"
+    ))
+    
+    # Background AI recipe generation workers
+    await smart_cooking_service.generation_queue.start()
+    
+    # Unified cross-domain search index (write paths publish changes after this)
+    await get_unified_search().start(db, reference_recipes=[
+        {**dish, "id": f"{country_code}:{dish['name_english']}", "country_id": country_code, "country": country_data["country"]}
+        for country_code, country_data in AFRICAN_CUISINE_DATABASE.items()
+        for dish in country_data["dishes"]
+    ])
+    
+    # Pre-translated catalog bundles
+    await db.catalog_bundles.create_index([("catalog", 1), ("language", 1)], unique=True)
+    await catalog_bundle_service.load_bundles()
+    
     logger.info("Lambalia Marketplace API started with comprehensive vetting and payment system including traditional restaurants, daily marketplace, enhanced monetization system, local farm ecosystem, charity program, Lambalia Eats real-time food marketplace, and global heritage recipes preservation system")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    grocery_service = await get_grocery_service()
+    await grocery_service.close()
+    await smart_cooking_service.generation_queue.stop()
+    await get_unified_search().stop()
+    await heritage_recipes_service.inventory_sync.stop()
     client.close()
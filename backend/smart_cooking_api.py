@@ -8,6 +8,7 @@ from smart_cooking_tool import (
     SmartCookingToolService, IngredientInput, CookingPreferences, 
     SmartRecipeSuggestion, CookingToolSession
 )
+from recipe_generation_queue import QueueFullError
 
 def create_smart_cooking_router(cooking_service: SmartCookingToolService, get_current_user, get_current_user_optional):
     """Create Smart Cooking Tool API router with dependency injection"""
@@ -137,6 +138,54 @@ def create_smart_cooking_router(cooking_service: SmartCookingToolService, get_cu
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.post("/session/{session_id}/generate-recipes/async", response_model=dict)
+    async def submit_recipe_generation(
+        session_id: str,
+        preferences: Optional[dict] = None
+    ):
+        """Queue AI recipe generation and return a job ID immediately"""
+        try:
+            cooking_prefs = CookingPreferences(**preferences) if preferences else None
+            job = await cooking_service.submit_recipe_generation(session_id, cooking_prefs)
+            
+            return {
+                "success": True,
+                **job,
+                "poll_url": f"/api/smart-cooking/jobs/{job['job_id']}",
+                "message": "Recipes ready!" if job["status"] == "completed" else "Generating your recipes..."
+            }
+            
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/jobs/{job_id}", response_model=dict)
+    async def get_recipe_generation_job(job_id: str, wait: float = 0):
+        """Poll a recipe generation job; wait (up to 30s) holds the request until it finishes"""
+        try:
+            job = await cooking_service.get_generation_job(job_id, min(max(wait, 0), 30))
+            if not job:
+                raise HTTPException(status_code=404, detail="Job not found")
+            
+            return {
+                "success": True,
+                **job,
+                "total_recipes": len(job.get("recipes", []))
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/generation-stats", response_model=dict)
+    async def get_generation_stats():
+        """Recipe generation queue, cache and deduplication counters"""
+        return {"success": True, "stats": cooking_service.generation_queue.get_stats()}
+    
     # PREMIUM FEATURES & MONETIZATION
     
     @router.post("/session/{session_id}/activate-premium", response_model=dict)
@@ -11,6 +11,8 @@ import requests
 import os
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
+from recipe_generation_queue import RecipeGenerationQueue
+
 class IngredientInput(BaseModel):
     """Model for user ingredient input"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -92,6 +94,14 @@ class SmartCookingToolService:
         self.basic_price = 2.99
         self.premium_price = 4.99
         
+        # Background AI generation shared by identical ingredient sets
+        self.generation_queue = RecipeGenerationQueue(
+            db,
+            generate=self._generate_recipe_dicts,
+            apply_results=self._store_recipe_suggestions,
+            workers=int(os.environ.get('RECIPE_GENERATION_WORKERS', 4))
+        )
+        
     async def create_cooking_session(self, user_id: str, session_name: str = None) -> CookingToolSession:
         """Create a new cooking tool session for a user"""
         
@@ -126,35 +136,57 @@ class SmartCookingToolService:
     async def generate_smart_recipes(self, session_id: str, preferences: CookingPreferences = None) -> List[SmartRecipeSuggestion]:
         """Generate AI-powered recipe suggestions based on available ingredients"""
         
+        session = await self._load_session_for_generation(session_id, preferences)
+        
+        # Generate AI-powered recipe suggestions (cached and shared with identical jobs in flight)
+        recipe_dicts = await self.generation_queue.generate_now(session)
+        
+        # Store suggestions in session
+        await self._store_recipe_suggestions([session_id], recipe_dicts)
+        
+        return [SmartRecipeSuggestion(**recipe) for recipe in recipe_dicts]
+    
+    async def submit_recipe_generation(self, session_id: str, preferences: CookingPreferences = None) -> Dict[str, Any]:
+        """Queue AI recipe generation and return the job without waiting for the LLM"""
+        
+        session = await self._load_session_for_generation(session_id, preferences)
+        return await self.generation_queue.submit(session)
+    
+    async def get_generation_job(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Get a recipe generation job, optionally waiting for it to finish"""
+        return await self.generation_queue.get_job(job_id, wait)
+    
+    async def _load_session_for_generation(self, session_id: str, preferences: CookingPreferences = None) -> Dict[str, Any]:
+        """Load a session and save new preferences before generation"""
+        
         # Get session data
         session = await self.db.cooking_tool_sessions.find_one({"id": session_id}, {"_id": 0})
         if not session:
             raise ValueError("Session not found")
         
-        session_obj = CookingToolSession(**session)
-        
         if preferences:
-            session_obj.preferences = preferences
+            session["preferences"] = preferences.dict()
             await self.db.cooking_tool_sessions.update_one(
                 {"id": session_id},
                 {"$set": {"preferences": preferences.dict()}}
             )
         
-        # Generate AI-powered recipe suggestions
-        recipe_suggestions = await self._generate_ai_recipes(session_obj)
-        
-        # Store suggestions in session
-        await self.db.cooking_tool_sessions.update_one(
-            {"id": session_id},
+        return session
+    
+    async def _generate_recipe_dicts(self, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        recipes = await self._generate_ai_recipes(CookingToolSession(**session))
+        return [recipe.dict() for recipe in recipes]
+    
+    async def _store_recipe_suggestions(self, session_ids: List[str], recipe_dicts: List[Dict[str, Any]]):
+        await self.db.cooking_tool_sessions.update_many(
+            {"id": {"$in": session_ids}},
             {
                 "$set": {
-                    "recipe_suggestions": [recipe.dict() for recipe in recipe_suggestions],
+                    "recipe_suggestions": recipe_dicts,
                     "last_accessed": datetime.utcnow()
                 }
             }
         )
-        
-        return recipe_suggestions
     
     async def _generate_ai_recipes(self, session: CookingToolSession) -> List[SmartRecipeSuggestion]:
         """Use AI to generate personalized recipe suggestions"""
@@ -0,0 +1,266 @@
+# Translation Memory for Lambalia - Segment-level reuse of previous translations
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Sentence boundaries: terminal punctuation followed by whitespace, or line breaks
+SEGMENT_BOUNDARY = re.compile(r'(?<=[.!?。！？])\s+|\n+')
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,:]\d+)*')
+TRAILING_PUNCTUATION = '.!?。！？…:;,'
+
+
+class TranslationMemory:
+    """
+    Sentence-level translation memory shared by all translation requests.
+
+    Each language pair keeps normalized segment keys mapped to translations.
+    Lookups reuse a stored translation only for:
+      1. exact match on the normalized segment (case, spacing, end punctuation)
+      2. number-templated match, e.g. "Pickup after 6pm" reuses "Pickup after 7pm"
+    A fuzzy match through a character-trigram index is never returned as the
+    translation; suggest() hands it to the caller as context for a new one.
+    """
+
+    def __init__(self, max_entries_per_pair: int = 20000, similarity_threshold: float = 0.92):
+        self.max_entries_per_pair = max_entries_per_pair
+        self.similarity_threshold = similarity_threshold
+
+        # pair -> OrderedDict(normalized key -> translation)
+        self.entries: Dict[str, "OrderedDict[str, str]"] = {}
+        # pair -> number template -> normalized key
+        self.templates: Dict[str, Dict[str, str]] = {}
+        # pair -> trigram -> normalized keys
+        self.trigram_index: Dict[str, Dict[str, Set[str]]] = {}
+
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    # SEGMENTATION AND NORMALIZATION
+
+    def split_segments(self, text: str) -> Tuple[List[str], List[str]]:
+        """Split text into sentence segments and the separators between them"""
+        segments, separators = [], []
+        position = 0
+        for match in SEGMENT_BOUNDARY.finditer(text):
+            segments.append(text[position:match.start()])
+            separators.append(match.group(0))
+            position = match.end()
+        segments.append(text[position:])
+        separators.append("")
+        return segments, separators
+
+    def normalize(self, segment: str) -> str:
+        """Normalize a segment for matching: unicode form, case, spacing and end punctuation"""
+        normalized = unicodedata.normalize('NFKC', segment).lower()
+        normalized = ' '.join(normalized.split())
+        return normalized.rstrip(TRAILING_PUNCTUATION + ' ')
+
+    def _template(self, normalized: str) -> str:
+        return NUMBER_PATTERN.sub('#', normalized)
+
+    def _trigrams(self, normalized: str) -> Set[str]:
+        padded = f"  {normalized} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    # LOOKUP
+
+    def lookup(self, segment: str, target_language: str, source_language: Optional[str] = None) -> Optional[str]:
+        """Return a reusable translation for the segment, or None if it is novel"""
+        pair = self._pair(target_language, source_language)
+        stats = self._pair_stats(pair)
+        stats['segments'] += 1
+
+        normalized = self.normalize(segment)
+        if not normalized:
+            return segment
+
+        entries = self.entries.get(pair)
+        translation = None
+        if entries:
+            if normalized in entries:
+                entries.move_to_end(normalized)
+                translation = entries[normalized]
+                stats['exact_hits'] += 1
+            else:
+                translation = self._lookup_template(pair, normalized)
+                if translation is not None:
+                    stats['template_hits'] += 1
+
+        if translation is None:
+            stats['misses'] += 1
+            return None
+
+        stats['tokens_saved'] += self.estimate_tokens(segment) + self.estimate_tokens(translation)
+        return self._restore_punctuation(segment, translation)
+
+    def _lookup_template(self, pair: str, normalized: str) -> Optional[str]:
+        """Reuse a translation whose segment differs only in its numbers"""
+        numbers = NUMBER_PATTERN.findall(normalized)
+        if not numbers:
+            return None
+
+        key = self.templates.get(pair, {}).get(self._template(normalized))
+        if key is None:
+            return None
+
+        stored_numbers = NUMBER_PATTERN.findall(key)
+        translation = self.entries[pair][key]
+        if len(stored_numbers) != len(numbers):
+            return None
+
+        # Each number in the translation is a placeholder for one stored number.
+        # Numbers kept in source order map by position; reordered ones map by
+        # value, which is only unambiguous when the stored numbers are distinct.
+        # Bail out if the translation reformatted, added or dropped a number.
+        spans = list(NUMBER_PATTERN.finditer(translation))
+        found = [match.group(0) for match in spans]
+        if found == stored_numbers:
+            replacements = numbers
+        elif sorted(found) == sorted(stored_numbers) and len(set(stored_numbers)) == len(stored_numbers):
+            replacements = [numbers[stored_numbers.index(value)] for value in found]
+        else:
+            return None
+
+        parts, position = [], 0
+        for match, replacement in zip(spans, replacements):
+            parts.append(translation[position:match.start()])
+            parts.append(replacement)
+            position = match.end()
+        parts.append(translation[position:])
+        return ''.join(parts)
+
+    def suggest(self, segment: str, target_language: str, source_language: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        Most similar stored (segment, translation) above the similarity threshold.
+
+        A near match is usually a different sentence ("Add salt" / "Add salt later"),
+        so it is only ever context for translating the segment, never its translation.
+        """
+        pair = self._pair(target_language, source_language)
+        normalized = self.normalize(segment)
+        if not normalized:
+            return None
+        suggestion = self._lookup_fuzzy(pair, normalized)
+        if suggestion is not None:
+            self._pair_stats(pair)['fuzzy_suggestions'] += 1
+        return suggestion
+
+    def _lookup_fuzzy(self, pair: str, normalized: str) -> Optional[Tuple[str, str]]:
+        """Find the most similar stored segment above the similarity threshold"""
+        index = self.trigram_index.get(pair)
+        if not index:
+            return None
+
+        query_grams = self._trigrams(normalized)
+
+        # Prefix filter: a key reaching the threshold shares at least `min_shared`
+        # trigrams with the query, so it must appear in the postings of the
+        # (len - min_shared + 1) rarest query trigrams. Only those are scanned.
+        threshold = self.similarity_threshold
+        min_shared = int(threshold * len(query_grams) / (2 - threshold))
+        rarest = sorted(query_grams, key=lambda gram: len(index.get(gram, ())))
+        candidates: Set[str] = set()
+        for gram in rarest[:len(query_grams) - min_shared + 1]:
+            candidates.update(index.get(gram, ()))
+
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            key_grams = self._trigrams(key)
+            # Dice coefficient over trigram sets
+            score = 2.0 * len(query_grams & key_grams) / (len(query_grams) + len(key_grams))
+            if score > best_score:
+                best_key, best_score = key, score
+
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        return best_key, self.entries[pair][best_key]
+
+    # STORAGE
+
+    def store(self, segment: str, translation: str, target_language: str, source_language: Optional[str] = None):
+        """Remember a segment translation for future reuse"""
+        normalized = self.normalize(segment)
+        translation = translation.strip()
+        if not normalized or not translation:
+            return
+
+        pair = self._pair(target_language, source_language)
+        entries = self.entries.setdefault(pair, OrderedDict())
+        if normalized in entries:
+            entries.move_to_end(normalized)
+            entries[normalized] = translation
+            return
+
+        entries[normalized] = translation
+        self.templates.setdefault(pair, {})[self._template(normalized)] = normalized
+        index = self.trigram_index.setdefault(pair, {})
+        for gram in self._trigrams(normalized):
+            index.setdefault(gram, set()).add(normalized)
+
+        while len(entries) > self.max_entries_per_pair:
+            evicted, _ = entries.popitem(last=False)
+            self._unindex(pair, evicted)
+
+    def _unindex(self, pair: str, normalized: str):
+        templates = self.templates.get(pair, {})
+        template = self._template(normalized)
+        if templates.get(template) == normalized:
+            del templates[template]
+
+        index = self.trigram_index.get(pair, {})
+        for gram in self._trigrams(normalized):
+            keys = index.get(gram)
+            if keys:
+                keys.discard(normalized)
+                if not keys:
+                    del index[gram]
+
+    # STATISTICS
+
+    def estimate_tokens(self, text: str) -> int:
+        """Rough LLM token estimate (about four characters per token)"""
+        return max(1, len(text) // 4)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit rate and tokens saved per language pair"""
+        report = {}
+        for pair, stats in self.stats.items():
+            hits = stats['exact_hits'] + stats['template_hits']
+            report[pair] = {
+                **stats,
+                'entries': len(self.entries.get(pair, {})),
+                'hit_rate': round((hits / stats['segments']) * 100, 2) if stats['segments'] else 0
+            }
+        return report
+
+    def clear(self):
+        self.entries.clear()
+        self.templates.clear()
+        self.trigram_index.clear()
+
+    # PRIVATE HELPER METHODS
+
+    def _pair(self, target_language: str, source_language: Optional[str]) -> str:
+        return f"{source_language or 'auto'}->{target_language}"
+
+    def _pair_stats(self, pair: str) -> Dict[str, int]:
+        if pair not in self.stats:
+            self.stats[pair] = {
+                'segments': 0,
+                'exact_hits': 0,
+                'template_hits': 0,
+                'fuzzy_suggestions': 0,
+                'misses': 0,
+                'tokens_saved': 0
+            }
+        return self.stats[pair]
+
+    def _restore_punctuation(self, segment: str, translation: str) -> str:
+        """Match the reused translation's end punctuation to the source segment"""
+        source = segment.rstrip()
+        source_end = source[len(source.rstrip(TRAILING_PUNCTUATION)):]
+        if not source_end:
+            return translation.rstrip(TRAILING_PUNCTUATION)
+        if translation.rstrip(TRAILING_PUNCTUATION) == translation:
+            return translation + source_end
+        return translation
@@ -9,6 +9,8 @@ from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
+from translation_memory import TranslationMemory
+
 # Import emergent integrations for AI translation
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
@@ -42,6 +44,13 @@ class TranslationService:
         self.translation_cache = {}
         self.cache_ttl = 3600  # 1 hour
         
+        # Sentence-level memory so repeated phrases across listings are translated once
+        self.translation_memory = TranslationMemory()
+        
+        # Limits on the strings sent together in one batched AI prompt
+        self.batch_max_strings = 50
+        self.batch_max_chars = 8000
+        
         # Usage tracking
         self.usage_stats = {
             'ai_translations': 0,
@@ -231,8 +240,14 @@ Examples:
             'timestamp': time.time()
         }
     
-    async def translate_with_ai(self, text: str, target_language: str, source_language: Optional[str] = None) -> Dict[str, Any]:
-        """Translate text using AI with cultural preservation"""
+    async def translate_with_ai(self, text: str, target_language: str, source_language: Optional[str] = None,
+                                references: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Translate text using AI with cultural preservation
+
+        references: similar (source, translation) pairs from the translation memory,
+                    given to the model for consistent terminology only
+        """
         try:
             if not self.ai_chat:
                 raise Exception("AI translation service not initialized")
@@ -249,6 +264,13 @@ Text to translate: "{text}"
 
 Provide only the translation:"""
             
+            if references:
+                examples = "\n".join(f'- "{source}" -> "{translation}"' for source, translation in references)
+                prompt = f"""{prompt}
+
+Similar sentences translated earlier (keep terminology consistent, but translate the text above exactly; it may differ from them):
+{examples}"""
+            
             message = UserMessage(text=prompt)
             response = await self.ai_chat.send_message(message)
             
@@ -282,6 +304,74 @@ Provide only the translation:"""
                 'method': 'ai'
             }
     
+    async def translate_with_memory(self, text: str, target_language: str, source_language: Optional[str] = None) -> Dict[str, Any]:
+        """Translate sentence by sentence, sending only segments missing from the translation memory to the AI"""
+        memory = self.translation_memory
+        segments, separators = memory.split_segments(text)
+        translated = [memory.lookup(segment, target_language, source_language) for segment in segments]
+        novel = [i for i, segment in enumerate(translated) if segment is None]
+        
+        if not novel:
+            return {
+                'success': True,
+                'translated_text': ''.join(t + sep for t, sep in zip(translated, separators)),
+                'method': 'memory',
+                'source_language': source_language,
+                'target_language': target_language,
+                'character_count': len(text),
+                'segments_reused': len(segments)
+            }
+        
+        # Near matches are different sentences; they only inform the new translations
+        references = {i: memory.suggest(segments[i], target_language, source_language) for i in novel}
+        
+        if len(novel) == len(segments):
+            # Nothing to reuse: keep the full text in one request for context
+            result = await self.translate_with_ai(
+                text, target_language, source_language,
+                references=list(dict.fromkeys(r for r in references.values() if r)) or None
+            )
+            if result['success']:
+                translated_segments, _ = memory.split_segments(result['translated_text'])
+                if len(translated_segments) == len(segments):
+                    for segment, translation in zip(segments, translated_segments):
+                        memory.store(segment, translation, target_language, source_language)
+                result['segments_reused'] = 0
+            return result
+        
+        # Translate each distinct novel segment once
+        unique_novel = {}
+        for i in novel:
+            unique_novel.setdefault(memory.normalize(segments[i]), i)
+        
+        results = await asyncio.gather(*[
+            self.translate_with_ai(
+                segments[i], target_language, source_language,
+                references=[references[i]] if references[i] else None
+            )
+            for i in unique_novel.values()
+        ])
+        
+        novel_translations = {}
+        for (key, i), result in zip(unique_novel.items(), results):
+            if not result['success']:
+                return result
+            novel_translations[key] = result['translated_text']
+            memory.store(segments[i], result['translated_text'], target_language, source_language)
+        
+        for i in novel:
+            translated[i] = novel_translations[memory.normalize(segments[i])]
+        
+        return {
+            'success': True,
+            'translated_text': ''.join(t + sep for t, sep in zip(translated, separators)),
+            'method': 'ai',
+            'source_language': source_language,
+            'target_language': target_language,
+            'character_count': len(text),
+            'segments_reused': len(segments) - len(novel)
+        }
+    
     async def translate_with_google(self, text: str, target_language: str, source_language: Optional[str] = None) -> Dict[str, Any]:
         """Translate text using Google Translate as backup"""
         try:
@@ -360,7 +450,7 @@ Provide only the translation:"""
         
         # Try AI translation first (with cultural preservation if requested)
         if preserve_cultural:
-            result = await self.translate_with_ai(text, target_language, source_language)
+            result = await self.translate_with_memory(text, target_language, source_language)
         else:
             # For non-cultural content, try Google first for speed
             result = await self.translate_with_google(text, target_language, source_language)
@@ -477,6 +567,170 @@ Language code:"""
             'errors': errors
         }
     
+    def resolve_accept_language(self, accept_language: Optional[str], source_language: str = 'en') -> Optional[str]:
+        """
+        Pick the highest-weighted supported language from an Accept-Language header
+        
+        Returns None when the reader's best language is the one the content was
+        written in (English by default), since there is nothing to translate.
+        """
+        if not accept_language:
+            return None
+        
+        candidates = []
+        for position, part in enumerate(accept_language.split(',')):
+            pieces = part.strip().split(';')
+            code = pieces[0].strip().lower().split('-')[0]
+            weight = 1.0
+            for param in pieces[1:]:
+                if param.strip().startswith('q='):
+                    try:
+                        weight = float(param.strip()[2:])
+                    except ValueError:
+                        weight = 0.0
+            if code in self.supported_languages and weight > 0:
+                candidates.append((-weight, position, code))
+        
+        if not candidates:
+            return None
+        best = min(candidates)[2]
+        return None if best == source_language else best
+    
+    async def translate_fields(self, items: List[Dict[str, Any]], fields: List[str], target_language: str, source_language: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Translate the given fields across all items in one deduplicated batch and inline the results
+        
+        Uncached strings are sent to the AI together in one prompt per chunk; any a
+        batch fails to return are translated one by one. String and list-of-string
+        fields are supported. Each item keeps its original
+        values under 'translation.original' so clients can toggle back.
+        """
+        unique_texts = []
+        seen = set()
+        total_strings = 0
+        for item in items:
+            for field in fields:
+                values = item.get(field)
+                for value in (values if isinstance(values, list) else [values]):
+                    if isinstance(value, str) and value.strip():
+                        total_strings += 1
+                        if value not in seen:
+                            seen.add(value)
+                            unique_texts.append(value)
+        
+        translations = {}
+        pending = []
+        for text in unique_texts:
+            cached = self._get_from_cache(self._generate_cache_key(text.strip(), target_language, source_language))
+            if cached:
+                self.usage_stats['cache_hits'] += 1
+                translations[text] = cached['translated_text']
+            else:
+                pending.append(text)
+        
+        # The remaining strings go to the AI together, a bounded chunk per prompt
+        chunks, chunk, chunk_chars = [], [], 0
+        for text in pending:
+            if chunk and (len(chunk) >= self.batch_max_strings or chunk_chars + len(text) > self.batch_max_chars):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append(text)
+            chunk_chars += len(text)
+        if chunk:
+            chunks.append(chunk)
+        
+        for chunk_translations in await asyncio.gather(*[
+            self._translate_batch_with_ai(chunk, target_language, source_language) for chunk in chunks
+        ]):
+            translations.update(chunk_translations)
+        
+        # Strings a batch could not return fall back to one request each
+        leftovers = [text for text in pending if text not in translations]
+        semaphore = asyncio.Semaphore(10)
+        
+        async def translate(text: str):
+            async with semaphore:
+                return await self.translate_text(text, target_language, source_language, preserve_cultural=True)
+        
+        results = await asyncio.gather(*[translate(text) for text in leftovers], return_exceptions=True)
+        translations.update({
+            text: result['translated_text']
+            for text, result in zip(leftovers, results)
+            if not isinstance(result, Exception) and result.get('success')
+        })
+        
+        for item in items:
+            original = {}
+            for field in fields:
+                value = item.get(field)
+                if isinstance(value, str) and value in translations:
+                    original[field] = value
+                    item[field] = translations[value]
+                elif isinstance(value, list) and any(isinstance(v, str) and v in translations for v in value):
+                    original[field] = value
+                    item[field] = [translations.get(v, v) if isinstance(v, str) else v for v in value]
+            if original:
+                item['translation'] = {'language': target_language, 'original': original}
+        
+        return {
+            'target_language': target_language,
+            'total_strings': total_strings,
+            'unique_strings': len(unique_texts),
+            'translated_strings': len(translations)
+        }
+    
+    async def _translate_batch_with_ai(self, texts: List[str], target_language: str, source_language: Optional[str] = None) -> Dict[str, str]:
+        """
+        Translate several strings in one AI request, sent and returned as a JSON array
+        
+        Returns only the strings that came back; a failed request or a reply that
+        does not line up with the input returns an empty dict.
+        """
+        if not self.ai_chat or not texts:
+            return {}
+        
+        try:
+            source_lang_name = self.supported_languages.get(source_language, source_language) if source_language else "auto-detected language"
+            target_lang_name = self.supported_languages.get(target_language, target_language)
+            
+            prompt = f"""Translate each string in the following JSON array from {source_lang_name} to {target_lang_name}.
+
+REMEMBER: Preserve native dish names, recipe names, and cultural food terms in their original language.
+
+Strings to translate:
+{json.dumps(texts, ensure_ascii=False)}
+
+Respond with only a JSON array of the {len(texts)} translations, in the same order:"""
+            
+            message = UserMessage(text=prompt)
+            response = await self.ai_chat.send_message(message)
+            
+            reply = response.strip()
+            translated = json.loads(reply[reply.find('['):reply.rfind(']') + 1])
+            if (not isinstance(translated, list) or len(translated) != len(texts)
+                    or not all(isinstance(t, str) and t.strip() for t in translated)):
+                raise ValueError(f"expected {len(texts)} translations")
+            
+            self.usage_stats['ai_translations'] += 1
+            self.usage_stats['total_requests'] += 1
+            
+            translations = {}
+            for text, translation in zip(texts, translated):
+                translations[text] = translation.strip()
+                self._save_to_cache(self._generate_cache_key(text.strip(), target_language, source_language), {
+                    'success': True,
+                    'translated_text': translation.strip(),
+                    'method': 'ai',
+                    'source_language': source_language,
+                    'target_language': target_language,
+                    'character_count': len(text)
+                })
+            return translations
+            
+        except Exception as e:
+            logging.warning(f"Batched AI translation of {len(texts)} strings failed: {str(e)}")
+            return {}
+    
     def get_supported_languages(self) -> Dict[str, str]:
         """Get list of supported languages"""
         return self.supported_languages.copy()
@@ -493,11 +747,14 @@ Language code:"""
             stats['ai_usage_rate'] = 0
             stats['google_usage_rate'] = 0
         
+        stats['translation_memory'] = self.translation_memory.get_stats()
+        
         return stats
     
     async def cleanup(self):
         """Cleanup resources"""
         self.translation_cache.clear()
+        self.translation_memory.clear()
         logging.info("Translation service cleanup completed")
 
 # Global translation service instance
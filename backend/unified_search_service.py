@@ -0,0 +1,495 @@
+# Unified Search Service - one incrementally maintained index across every food domain
+import asyncio
+import bisect
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dish_search_index import tokenize
+from ingredient_canonicalizer import get_ingredient_canonicalizer
+
+# Document types
+OFFER = "offer"
+REQUEST = "request"
+HERITAGE_RECIPE = "heritage_recipe"
+REFERENCE_RECIPE = "reference_recipe"
+FARM_PRODUCT = "farm_product"
+ETHNIC_STORE = "ethnic_store"
+DOCUMENT_TYPES = [OFFER, REQUEST, HERITAGE_RECIPE, REFERENCE_RECIPE, FARM_PRODUCT, ETHNIC_STORE]
+
+# Field weights: title > tags (cuisine, ingredients, specialties) > body text
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "body": 1.0}
+
+K1 = 1.2
+B = 0.75
+PREFIX_DISCOUNT = 0.7
+MAX_PREFIX_EXPANSIONS = 64
+# Located results lose half their text score by this distance
+GEO_HALF_SCORE_KM = 10.0
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return value.timestamp()
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return None
+
+
+def _point(location: Any) -> Optional[Tuple[float, float]]:
+    """(lat, lng) from {"lat", "lng"} or a GeoJSON Point"""
+    if not isinstance(location, dict):
+        return None
+    try:
+        if "coordinates" in location:
+            lng, lat = location["coordinates"][:2]
+        else:
+            lat, lng = location["lat"], location["lng"]
+        lat, lng = float(lat), float(lng)
+    except (KeyError, TypeError, ValueError):
+        return None
+    # [0, 0] is the models' placeholder for "not geocoded"
+    if lat == 0.0 and lng == 0.0:
+        return None
+    return lat, lng
+
+
+def _distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(h))
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, (list, tuple)):
+        return " ".join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return " ".join(_text(item) for item in value.values())
+    return str(value)
+
+
+class UnifiedSearchService:
+    """
+    In-memory BM25 index over offers, requests, heritage and reference recipes,
+    farm products and ethnic stores.
+
+    Services publish upserts and removals from their write paths; publishing
+    only enqueues, and a background indexer applies the changes, recording how
+    long each waited (update lag). Scores use live corpus statistics so the
+    index never needs a rebuild. Documents carry an optional location (results
+    are filtered by radius and decay with distance) and an optional expiry
+    (offers and requests drop out when they lapse).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.canonicalizer = get_ingredient_canonicalizer()
+
+        # (type, id) -> {"tfs", "length", "point", "expires", "payload"}
+        self._documents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # token -> {(type, id): weighted term frequency}
+        self._postings: Dict[str, Dict[Tuple[str, str], float]] = {}
+        self._vocabulary: List[str] = []
+        self._total_length = 0.0
+
+        self._changes: Optional[asyncio.Queue] = None
+        self._indexer: Optional[asyncio.Task] = None
+
+        self.stats = {"upserts": 0, "removals": 0, "queries": 0, "expired": 0}
+        self._lags_ms: deque = deque(maxlen=1000)
+        self._query_ms: deque = deque(maxlen=1000)
+
+    # LIFECYCLE
+
+    async def start(self, db, reference_recipes: Iterable[Dict[str, Any]] = ()):
+        """Index the current contents of every source, then apply published changes in the background"""
+        if self._indexer is not None:
+            return
+        # Applied in place until the queue exists, so bootstrap does not count as update lag
+        await self._bootstrap(db, reference_recipes)
+        self._changes = asyncio.Queue()
+        self._indexer = asyncio.create_task(self._run_indexer())
+
+    async def stop(self):
+        if self._indexer is not None:
+            self._indexer.cancel()
+            await asyncio.gather(self._indexer, return_exceptions=True)
+            self._indexer = None
+
+    # WRITE PATH FEEDS
+
+    def publish_offer(self, offer: Dict[str, Any]):
+        if offer.get("status", "available") != "available" or offer.get("quantity_remaining", 1) <= 0:
+            self.publish_removal(OFFER, offer["id"])
+            return
+        self._publish(OFFER, offer["id"], {
+            "title": offer.get("dish_name"),
+            "tags": [offer.get("cuisine_type"), offer.get("ingredients"), offer.get("dietary_info")],
+            "body": [offer.get("description"), offer.get("cook_name")]
+        }, offer.get("cook_location"), offer.get("available_until"), {
+            "title": offer.get("dish_name"),
+            "subtitle": offer.get("cook_name") or offer.get("cuisine_type"),
+            "cuisine_type": offer.get("cuisine_type"),
+            "price": offer.get("price_per_serving"),
+            "quantity_remaining": offer.get("quantity_remaining")
+        })
+
+    def publish_request(self, request: Dict[str, Any]):
+        if request.get("status", "posted") != "posted":
+            self.publish_removal(REQUEST, request["id"])
+            return
+        self._publish(REQUEST, request["id"], {
+            "title": request.get("dish_name"),
+            "tags": [request.get("cuisine_type"), request.get("dietary_restrictions")],
+            "body": request.get("description")
+        }, request.get("eater_location"), request.get("expires_at"), {
+            "title": request.get("dish_name"),
+            "subtitle": request.get("cuisine_type"),
+            "cuisine_type": request.get("cuisine_type"),
+            "max_price": request.get("max_price")
+        })
+
+    def publish_heritage_recipe(self, recipe: Dict[str, Any]):
+        if recipe.get("is_public") is not True:
+            # Private family recipes never reach search
+            self.publish_removal(HERITAGE_RECIPE, recipe["id"])
+            return
+        self._publish(HERITAGE_RECIPE, recipe["id"], {
+            "title": [recipe.get("recipe_name"), recipe.get("recipe_name_local")],
+            "tags": [
+                recipe.get("country_region"),
+                [ingredient.get("name") for ingredient in recipe.get("traditional_ingredients", [])]
+            ],
+            "body": [recipe.get("description"), recipe.get("historical_context")]
+        }, None, None, {
+            "title": recipe.get("recipe_name"),
+            "subtitle": recipe.get("recipe_name_local") or recipe.get("country_region"),
+            "country_region": recipe.get("country_region")
+        })
+
+    def publish_reference_recipe(self, recipe: Dict[str, Any]):
+        self._publish(REFERENCE_RECIPE, recipe["id"], {
+            "title": [recipe.get("name_english"), recipe.get("name_local")],
+            "tags": [recipe.get("country"), recipe.get("country_id"), recipe.get("key_ingredients")],
+            "body": [recipe.get("description"), recipe.get("cultural_significance")]
+        }, None, None, {
+            "title": recipe.get("name_english"),
+            "subtitle": recipe.get("name_local"),
+            "country_id": recipe.get("country_id"),
+            "category": recipe.get("category")
+        })
+
+    def publish_farm_product(self, product: Dict[str, Any], farm: Optional[Dict[str, Any]] = None):
+        farm = farm or {}
+        if (not product.get("is_active", True) or not product.get("is_available", True)
+                or product.get("quantity_available") == 0
+                or not product.get("farm_is_active", True) or not farm.get("is_active", True)):
+            self.publish_removal(FARM_PRODUCT, product["id"])
+            return
+        farm_name = farm.get("farm_name") or product.get("farm_name")
+        self._publish(FARM_PRODUCT, product["id"], {
+            "title": [product.get("product_name"), product.get("variety")],
+            "tags": [product.get("category"), product.get("canonical_ingredients"), product.get("growing_method")],
+            "body": [product.get("description"), farm_name]
+        }, farm.get("location") or product.get("farm_location"), None, {
+            "title": product.get("product_name"),
+            "subtitle": farm_name or product.get("variety"),
+            "farm_id": product.get("farm_id"),
+            "price_per_unit": product.get("price_per_unit"),
+            "unit_type": product.get("unit_type")
+        })
+
+    def publish_ethnic_store(self, store: Dict[str, Any]):
+        if not store.get("is_active", True):
+            self.publish_removal(ETHNIC_STORE, store["id"])
+            return
+        self._publish(ETHNIC_STORE, store["id"], {
+            "title": store.get("store_name"),
+            "tags": [store.get("specialties"), store.get("store_type")],
+            "body": [store.get("city"), store.get("state_province"), store.get("languages_spoken")]
+        }, store.get("location"), None, {
+            "title": store.get("store_name"),
+            "subtitle": ", ".join(part for part in [store.get("city"), store.get("state_province")] if part),
+            "address": store.get("address")
+        })
+
+    def publish_removal(self, doc_type: str, doc_id: str):
+        self._enqueue(("remove", doc_type, doc_id, None))
+
+    # QUERYING
+
+    def search(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Ranked results across every document type. With a location, located
+        documents outside radius_km are dropped and the rest are boosted by
+        proximity; recipes have no location and are never filtered out by it.
+        """
+        start = time.perf_counter()
+        wanted_types = set(types) if types else None
+        origin = (lat, lng) if lat is not None and lng is not None else None
+        now = time.time()
+
+        text_scores = self._score(query)
+        hits = []
+        type_counts: Dict[str, int] = {}
+        for key, text_score in text_scores.items():
+            document = self._documents[key]
+            if document["expires"] is not None and document["expires"] <= now:
+                continue
+            distance = None
+            score = text_score
+            if origin is not None and document["point"] is not None:
+                distance = _distance_km(origin, document["point"])
+                if radius_km is not None and distance > radius_km:
+                    continue
+                score *= 0.5 + 0.5 * GEO_HALF_SCORE_KM / (GEO_HALF_SCORE_KM + distance)
+            type_counts[key[0]] = type_counts.get(key[0], 0) + 1
+            if wanted_types is not None and key[0] not in wanted_types:
+                continue
+            hits.append((-score, key, distance))
+
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        offset = max(0, offset)
+        results = [
+            {
+                "type": key[0],
+                "id": key[1],
+                "score": round(-negative_score, 4),
+                "distance_km": round(distance, 1) if distance is not None else None,
+                **self._documents[key]["payload"]
+            }
+            for negative_score, key, distance in hits[offset:offset + max(0, limit)]
+        ]
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats["queries"] += 1
+        self._query_ms.append(elapsed_ms)
+        return {"results": results, "total": len(hits), "type_counts": type_counts, "took_ms": round(elapsed_ms, 3)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        by_type: Dict[str, int] = {}
+        for doc_type, _ in self._documents:
+            by_type[doc_type] = by_type.get(doc_type, 0) + 1
+        return {
+            "documents": len(self._documents),
+            "documents_by_type": by_type,
+            "tokens": len(self._vocabulary),
+            "postings": sum(len(postings) for postings in self._postings.values()),
+            "pending_updates": self._changes.qsize() if self._changes else 0,
+            "update_lag_ms": self._summary(self._lags_ms),
+            "query_latency_ms": self._summary(self._query_ms),
+            **self.stats
+        }
+
+    # PRIVATE HELPER METHODS
+
+    def _publish(self, doc_type, doc_id, fields, location, expires, payload):
+        document = {
+            "tfs": self._weighted_tfs(fields),
+            "point": _point(location),
+            "expires": _timestamp(expires),
+            "payload": payload
+        }
+        self._enqueue(("upsert", doc_type, doc_id, document))
+
+    def _enqueue(self, change):
+        if self._changes is None:
+            # Not started (scripts, tests): apply in place
+            self._apply(change)
+            return
+        self._changes.put_nowait((time.perf_counter(), change))
+
+    async def _run_indexer(self):
+        while True:
+            try:
+                published_at, change = await asyncio.wait_for(self._changes.get(), timeout=60)
+            except asyncio.TimeoutError:
+                self._purge_expired()
+                continue
+            try:
+                self._apply(change)
+                self._lags_ms.append((time.perf_counter() - published_at) * 1000)
+            except Exception as e:
+                self.logger.error(f"Failed to apply search index change {change[:3]}: {str(e)}")
+
+    def _apply(self, change):
+        action, doc_type, doc_id, document = change
+        key = (doc_type, doc_id)
+        self._remove(key)
+        if action == "upsert":
+            self.stats["upserts"] += 1
+            document["length"] = sum(document["tfs"].values())
+            self._documents[key] = document
+            self._total_length += document["length"]
+            for token, tf in document["tfs"].items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                postings[key] = tf
+        else:
+            self.stats["removals"] += 1
+
+    def _remove(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        self._total_length -= document["length"]
+        for token in document["tfs"]:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                position = bisect.bisect_left(self._vocabulary, token)
+                if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                    del self._vocabulary[position]
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [key for key, document in self._documents.items()
+                   if document["expires"] is not None and document["expires"] <= now]
+        for key in expired:
+            self._remove(key)
+        self.stats["expired"] += len(expired)
+
+    def _weighted_tfs(self, fields: Dict[str, Any]) -> Dict[str, float]:
+        tfs: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in self._tokens(_text(fields.get(field))):
+                tfs[token] = tfs.get(token, 0.0) + weight
+        return tfs
+
+    def _tokens(self, text: str) -> List[str]:
+        # Singular forms, so "tomatoes" and "tomato" share a token
+        return [self.canonicalizer.singularize(token) for token in tokenize(text)]
+
+    def _score(self, query: str) -> Dict[Tuple[str, str], float]:
+        words = list(dict.fromkeys(self._tokens(query)))
+        if not words or not self._documents:
+            return {}
+        count = len(self._documents)
+        average_length = self._total_length / count or 1.0
+
+        scores: Optional[Dict[Tuple[str, str], float]] = None
+        for word in words:
+            word_scores: Dict[Tuple[str, str], float] = {}
+            for token, discount in self._expansions(word):
+                postings = self._postings[token]
+                df = len(postings)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                for key, tf in postings.items():
+                    norm = K1 * (1 - B + B * self._documents[key]["length"] / average_length)
+                    score = discount * idf * tf * (K1 + 1) / (tf + norm)
+                    if score > word_scores.get(key, 0.0):
+                        word_scores[key] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {key: score + word_scores[key] for key, score in scores.items() if key in word_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _expansions(self, word: str) -> List[Tuple[str, float]]:
+        """The word itself plus indexed words it begins (as-you-type matching)"""
+        expansions = [(word, 1.0)] if word in self._postings else []
+        if len(word) < 2:
+            return expansions
+        vocabulary = self._vocabulary
+        index = bisect.bisect_left(vocabulary, word)
+        while index < len(vocabulary) and vocabulary[index].startswith(word) and len(expansions) < MAX_PREFIX_EXPANSIONS:
+            if vocabulary[index] != word:
+                expansions.append((vocabulary[index], PREFIX_DISCOUNT))
+            index += 1
+        return expansions
+
+    def _summary(self, samples: deque) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0, "p95": 0, "max": 0}
+        ordered = sorted(samples)
+        return {
+            "avg": round(sum(ordered) / len(ordered), 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            "max": round(ordered[-1], 3)
+        }
+
+    async def _bootstrap(self, db, reference_recipes: Iterable[Dict[str, Any]]):
+        """Index everything already stored; later changes arrive through the publish_* feeds"""
+        from expanded_reference_recipes import COMPREHENSIVE_REFERENCE_RECIPES
+
+        start = time.perf_counter()
+        for recipe in COMPREHENSIVE_REFERENCE_RECIPES:
+            self.publish_reference_recipe(recipe.dict())
+        for recipe in reference_recipes:
+            self.publish_reference_recipe(recipe)
+
+        now = datetime.utcnow()
+        sources = [
+            (db.food_offers, {"status": "available", "quantity_remaining": {"$gt": 0}, "available_until": {"$gt": now}},
+             self.publish_offer),
+            (db.food_requests, {"status": "posted", "expires_at": {"$gt": now}}, self.publish_request),
+            (db.heritage_recipes, {"is_public": True}, self.publish_heritage_recipe),
+            (db.ethnic_grocery_stores, {"is_active": {"$ne": False}}, self.publish_ethnic_store)
+        ]
+        for collection, query, publish in sources:
+            try:
+                async for document in collection.find(query, {"_id": 0}):
+                    publish(document)
+            except Exception as e:
+                self.logger.error(f"Failed to index {collection.name}: {str(e)}")
+
+        try:
+            farms = {
+                farm["id"]: farm async for farm in db.farm_profiles.find(
+                    {"is_active": {"$ne": False}}, {"_id": 0, "id": 1, "farm_name": 1, "location": 1, "is_active": 1}
+                )
+            }
+            async for product in db.farm_products.find(
+                {"is_active": {"$ne": False}, "is_available": {"$ne": False}, "quantity_available": {"$ne": 0}},
+                {"_id": 0}
+            ):
+                farm = farms.get(product.get("farm_id"))
+                if farm is not None:
+                    self.publish_farm_product(product, farm)
+        except Exception as e:
+            self.logger.error(f"Failed to index farm products: {str(e)}")
+
+        self.logger.info(f"Unified search indexed {len(self._documents)} documents in {time.perf_counter() - start:.1f}s")
+
+
+# Shared search instance
+_unified_search = None
+
+
+def get_unified_search() -> UnifiedSearchService:
+    """Get the process-wide unified search index"""
+    global _unified_search
+    if _unified_search is None:
+        _unified_search = UnifiedSearchService()
+    return _unified_search
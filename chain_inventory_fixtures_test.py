@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Fixture test for ChainInventorySync: syncs every chain from the recorded catalog
+pages in backend/fixtures/chain_inventory into a scratch MongoDB database.
+
+For each chain it checks that the first sync writes every fixture item and marks
+a stale stored item discontinued, and that an immediate re-sync writes nothing
+and reports every item unchanged.
+
+    MONGO_URL=mongodb://localhost:27017 python chain_inventory_fixtures_test.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from chain_inventory_sync import COMPLETED, FIXTURES_DIR, ChainInventorySync, default_fetchers
+
+DATABASE = "lambalia_chain_inventory_fixtures_test"
+
+
+def fixture_skus(fetcher):
+    """Distinct SKUs across a chain's recorded pages"""
+    skus = set()
+    page = 1
+    while True:
+        path = os.path.join(FIXTURES_DIR, fetcher.chain_id, f"page_{page}.json")
+        if not os.path.exists(path):
+            return skus
+        with open(path, "rb") as handle:
+            items, _ = fetcher.parse_page(json.loads(handle.read()))
+        skus.update(item["sku"] for item in items)
+        page += 1
+
+
+class ChainInventoryFixturesTester:
+    def __init__(self):
+        self.tests_run = 0
+        self.tests_passed = 0
+
+    def check(self, name, actual, expected):
+        self.tests_run += 1
+        if actual == expected:
+            self.tests_passed += 1
+            print(f"✅ {name}: {actual}")
+        else:
+            print(f"❌ {name}: expected {expected}, got {actual}")
+
+    async def test_chain(self, sync, db, fetcher):
+        chain_id = fetcher.chain_id
+        expected = len(fixture_skus(fetcher))
+        print(f"\n🛒 {chain_id} ({expected} fixture items)")
+
+        # An item the chain no longer lists should be discontinued by a complete sync
+        await db.chain_inventory.insert_one({
+            "chain_id": chain_id, "sku": "STALE-0001", "name": "Discontinued Item",
+            "content_hash": "stale", "discontinued": False, "in_stock": True
+        })
+
+        first = await sync.run(chain_id)
+        self.check("initial sync status", first["status"], COMPLETED)
+        self.check("initial sync items", first["items_seen"], expected)
+        self.check("initial sync written", first["items_written"], expected)
+        self.check("initial sync discontinued", first["discontinued"], 1)
+
+        second = await sync.run(chain_id)
+        self.check("re-sync status", second["status"], COMPLETED)
+        self.check("re-sync items", second["items_seen"], expected)
+        self.check("re-sync written", second["items_written"], 0)
+        self.check("re-sync unchanged", second["unchanged"], expected)
+        self.check("re-sync discontinued", second["discontinued"], 0)
+
+        stored = await db.chain_inventory.count_documents({"chain_id": chain_id, "discontinued": False})
+        self.check("stored active items", stored, expected)
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    await client.drop_database(DATABASE)
+    db = client[DATABASE]
+    sync = ChainInventorySync(db, fixtures_dir=FIXTURES_DIR)
+    tester = ChainInventoryFixturesTester()
+
+    print("📦 Chain inventory sync fixture test")
+    print("=" * 60)
+    try:
+        await sync.create_indexes()
+        for fetcher in default_fetchers():
+            await tester.test_chain(sync, db, fetcher)
+    finally:
+        await sync.stop()
+        await client.drop_database(DATABASE)
+        client.close()
+
+    print("=" * 60)
+    print(f"📊 {tester.tests_passed}/{tester.tests_run} checks passed")
+    return 0 if tester.tests_passed == tester.tests_run else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for ChainInventorySync against a local store-chain catalog stand-in.
+
+Starts an aiohttp server that serves a synthetic Patel Brothers style catalog
+(paged JSON with a last_page count) with a fixed per-page delay, then syncs it
+into a scratch MongoDB database twice: a first full import, and an incremental
+re-sync after a small share of the SKUs changed price or stock, where only the
+changed items should be written.
+
+    MONGO_URL=mongodb://localhost:27017 python chain_inventory_sync_benchmark.py [--skus 50000] [--delay-ms 150] [--rps 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+from aiohttp import web
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from chain_inventory_sync import ChainInventorySync, PatelBrothersFetcher
+
+PRODUCTS = [
+    "Basmati Rice", "Toor Dal", "Chana Dal", "Curry Leaves", "Ghee", "Paneer", "Garam Masala",
+    "Turmeric Powder", "Cumin Seeds", "Mustard Seeds", "Tamarind Paste", "Jaggery", "Atta Flour"
+]
+DEPARTMENTS = ["Rice & Grains", "Lentils & Beans", "Produce", "Dairy", "Spices", "Flours"]
+
+
+class CatalogStandIn:
+    """Local HTTP stand-in paging through a synthetic chain catalog after a fixed delay"""
+
+    def __init__(self, skus: int, page_size: int, delay_ms: float):
+        rng = random.Random(7)
+        self.items = [
+            {
+                "item_code": f"PB-{number:06d}",
+                "description": f"{rng.choice(PRODUCTS)} {rng.choice(['1 lb', '2 lb', '4 lb', '10 lb'])}",
+                "department": rng.choice(DEPARTMENTS),
+                "unit_price": round(rng.uniform(0.99, 39.99), 2),
+                "qty_on_hand": rng.randint(0, 200),
+                "pack_size": "each"
+            }
+            for number in range(skus)
+        ]
+        self.page_size = page_size
+        self.delay = delay_ms / 1000.0
+        self.requests_served = 0
+        self.runner = None
+        self.url = None
+
+    def change(self, share: float) -> int:
+        """Reprice or restock a share of the catalog; returns how many items changed"""
+        rng = random.Random(11)
+        changed = rng.sample(self.items, int(len(self.items) * share))
+        for item in changed:
+            item["unit_price"] = round(item["unit_price"] + 0.5, 2)
+        return len(changed)
+
+    async def handle_page(self, request):
+        self.requests_served += 1
+        await asyncio.sleep(self.delay)
+        page = int(request.query.get("page", 1))
+        last_page = max(1, -(-len(self.items) // self.page_size))
+        start = (page - 1) * self.page_size
+        body = {
+            "data": {"items": self.items[start:start + self.page_size]},
+            "meta": {"current_page": page, "last_page": last_page, "per_page": self.page_size}
+        }
+        return web.Response(body=json.dumps(body).encode("utf-8"), content_type="application/json")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/catalog", self.handle_page)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/catalog"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def report(label, run):
+    print(f"{label:<22} {run['status']:<10} {run['elapsed_seconds']:8.1f} s   "
+          f"{run['items_per_second']:9.1f} items/s   {run['pages_fetched']:5} pages   "
+          f"written {run['items_written']:6}   unchanged {run['unchanged']:6}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--skus", type=int, default=50000)
+    parser.add_argument("--delay-ms", type=float, default=150.0)
+    parser.add_argument("--rps", type=float, default=5.0, help="Per-host request rate limit")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--changed", type=float, default=0.02, help="Share of SKUs changed before the re-sync")
+    parser.add_argument("--database", default="lambalia_inventory_sync_benchmark")
+    args = parser.parse_args()
+
+    fetcher = PatelBrothersFetcher()
+    fetcher.requests_per_second = args.rps
+
+    stand_in = CatalogStandIn(args.skus, fetcher.page_size, args.delay_ms)
+    await stand_in.start()
+    fetcher.base_url = stand_in.url
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    await client.drop_database(args.database)
+    db = client[args.database]
+    sync = ChainInventorySync(db, fetchers=[fetcher], concurrency=args.concurrency)
+
+    print(f"📦 {args.skus:,} SKUs, {args.delay_ms:.0f} ms per page, {args.rps:g} requests/s per host, "
+          f"{args.concurrency} concurrent fetches")
+    print("=" * 100)
+    try:
+        await sync.create_indexes()
+        report("Initial sync", await sync.run(fetcher.chain_id))
+        changed = stand_in.change(args.changed)
+        report(f"Re-sync ({changed:,} changed)", await sync.run(fetcher.chain_id))
+        print("=" * 100)
+        print(f"Stored items: {await db.chain_inventory.count_documents({}):,}   "
+              f"requests served: {stand_in.requests_served}")
+    finally:
+        await sync.stop()
+        await client.drop_database(args.database)
+        client.close()
+        await stand_in.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for GroceryAPIService against a local Open Food Facts stand-in.
+
+Starts an aiohttp server that mimics /cgi/search.pl with a fixed upstream delay,
+then compares a recipe lookup done the old way (new ClientSession per ingredient,
+ingredients searched one after another) with the pooled session and concurrent
+fan-out now used by generate_grocery_stores_response.
+
+    python grocery_latency_benchmark.py [--ingredients 15] [--delay-ms 80] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from grocery_service import GroceryAPIService
+
+
+class OpenFoodFactsStandIn:
+    """Local HTTP stand-in returning canned search results after a fixed delay"""
+
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000.0
+        self.requests_served = 0
+        self.runner = None
+        self.url = None
+
+    async def handle_search(self, request):
+        self.requests_served += 1
+        await asyncio.sleep(self.delay)
+        term = request.query.get("search_terms", "item")
+        page_size = int(request.query.get("page_size", 5))
+        products = [
+            {
+                "code": f"{abs(hash(term)) % 10**12:012d}{i}",
+                "product_name": f"{term.title()} Product {i}",
+                "brands": "Organic Farms" if i % 2 else "Store Brand",
+                "ingredients_text": f"{term}, salt, water",
+                "nutrition_grades": "b",
+                "categories": "Groceries, Pantry",
+                "image_url": None,
+                "stores": "Walmart, Kroger",
+                "countries_tags": ["en:united-states"]
+            }
+            for i in range(page_size)
+        ]
+        return web.json_response({"count": len(products), "products": products})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/cgi/search.pl", self.handle_search)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/cgi/search.pl"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def legacy_lookup(search_url: str, ingredients):
+    """Previous behaviour: a fresh session per search, ingredients awaited in sequence"""
+    for ingredient in ingredients:
+        async with aiohttp.ClientSession() as session:
+            params = {"search_terms": ingredient, "json": "1", "page_size": 5}
+            async with session.get(search_url, params=params) as response:
+                await response.json()
+
+
+async def pooled_lookup(service: GroceryAPIService, ingredients):
+    """Current behaviour, with the result cache cleared so every run hits the stand-in"""
+    service.cache.clear()
+    await service.generate_grocery_stores_response(ingredients, "10001", 10.0)
+
+
+async def time_runs(label, runs, coroutine_factory):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await coroutine_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<38} median {statistics.median(timings):8.1f} ms   "
+          f"min {min(timings):8.1f} ms   max {max(timings):8.1f} ms")
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ingredients", type=int, default=15)
+    parser.add_argument("--delay-ms", type=float, default=80.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    ingredients = [f"ingredient {i}" for i in range(args.ingredients)]
+
+    stand_in = OpenFoodFactsStandIn(args.delay_ms)
+    await stand_in.start()
+    service = GroceryAPIService(search_url=stand_in.url)
+
+    print(f"🛒 {args.ingredients} ingredients, {args.delay_ms:.0f} ms simulated upstream latency, {args.runs} runs")
+    print("=" * 80)
+    try:
+        legacy = await time_runs("Sequential, session per request", args.runs,
+                                 lambda: legacy_lookup(stand_in.url, ingredients))
+        pooled = await time_runs("Pooled session, concurrent fan-out", args.runs,
+                                 lambda: pooled_lookup(service, ingredients))
+        print("=" * 80)
+        print(f"Speedup: {legacy / pooled:.1f}x  (requests served: {stand_in.requests_served})")
+    finally:
+        await service.close()
+        await stand_in.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
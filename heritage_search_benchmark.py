@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Query plan and latency benchmark for heritage recipe search on a large collection.
+
+Seeds a scratch database with synthetic heritage recipes, creates the search
+indexes through HeritageRecipesService, then runs the same queries two ways:
+the previous five-field case-insensitive $regex $or (which cannot use an index
+and scans every recipe) and the current $text aggregation ranked by text score
+and stored authenticity. The $text aggregation is measured both as the search
+API runs it by default, keyset-paged without collapsing, and with the opt-in
+collapse of near-duplicate clusters, which groups every match before paging.
+Plans are printed from explain() so the collection scan,
+or its absence, is visible next to the timings.
+
+    MONGO_URL=mongodb://localhost:27017 python heritage_search_benchmark.py [--recipes 1000000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from heritage_recipes_service import HeritageRecipesService
+
+DISH_WORDS = [
+    "jollof", "egusi", "fufu", "suya", "callaloo", "ackee", "saltfish", "pepperpot", "injera", "doro",
+    "wat", "bobotie", "chakalaka", "pelau", "roti", "oxtail", "moin", "akara", "kelewele", "thieboudienne",
+    "yassa", "mafe", "plantain", "cassava", "okra", "stew", "soup", "rice", "bread", "dumplings"
+]
+INGREDIENTS = [
+    "scotch bonnet", "palm oil", "plantain", "cassava", "yam", "okra", "thyme", "allspice", "berbere",
+    "teff", "peanut", "black-eyed peas", "coconut milk", "salted cod", "goat", "smoked fish", "ginger"
+]
+COUNTRIES = ["nigeria", "ghana", "jamaica", "ethiopia", "senegal", "trinidad_tobago", "south_africa", "haiti"]
+SIGNIFICANCE = ["everyday", "festival", "ceremonial", "family_tradition"]
+QUERIES = ["jollof", "scotch bonnet", "egusi soup", "oxtail stew", "teff"]
+DUPLICATE_SHARE = 0.2
+
+REGEX_FIELDS = ["recipe_name", "recipe_name_local", "description", "traditional_ingredients.name", "historical_context"]
+
+
+def synthetic_recipe(rng: random.Random, cluster_ids: list) -> dict:
+    name = " ".join(rng.sample(DISH_WORDS, 2)).title()
+    ingredients = rng.sample(INGREDIENTS, rng.randint(3, 7))
+    recipe_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    # About a fifth of the recipes are near-duplicates of an earlier one
+    if cluster_ids and rng.random() < DUPLICATE_SHARE:
+        cluster_id = rng.choice(cluster_ids)
+    else:
+        cluster_id = recipe_id
+        cluster_ids.append(recipe_id)
+        if len(cluster_ids) > 1000:
+            del cluster_ids[:500]
+    return {
+        "id": recipe_id,
+        "duplicate_cluster_id": cluster_id,
+        "recipe_name": name,
+        "recipe_name_local": name.lower(),
+        "country_region": rng.choice(COUNTRIES),
+        "cultural_significance": rng.choice(SIGNIFICANCE),
+        "description": f"A {rng.choice(DISH_WORDS)} dish made with {ingredients[0]} and {ingredients[1]}.",
+        "historical_context": f"Passed down in {rng.choice(COUNTRIES).replace('_', ' ')} families for generations.",
+        "traditional_ingredients": [{"name": ingredient, "amount": "1 cup"} for ingredient in ingredients],
+        "authenticity_score": round(rng.uniform(1.0, 5.0), 2),
+        "preservation_priority": rng.randint(1, 5),
+        "is_public": rng.random() > 0.05
+    }
+
+
+async def seed(collection, count: int, batch_size: int = 10000):
+    rng = random.Random(42)
+    cluster_ids = []
+    start = time.perf_counter()
+    inserted = 0
+    while inserted < count:
+        batch = [synthetic_recipe(rng, cluster_ids) for _ in range(min(batch_size, count - inserted))]
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+        if inserted % 100000 == 0 or inserted == count:
+            print(f"   seeded {inserted:,} recipes ({time.perf_counter() - start:.0f} s)")
+
+
+def legacy_filter(query: str) -> dict:
+    return {
+        "$and": [{"$or": [{field: {"$regex": query, "$options": "i"}} for field in REGEX_FIELDS]}],
+        "is_public": True
+    }
+
+
+def plan_summary(explain: dict):
+    """Stage names and documents examined, wherever they sit in a find or aggregate explain"""
+    stages, examined = [], 0
+
+    def walk(node):
+        nonlocal examined
+        if isinstance(node, dict):
+            if isinstance(node.get("stage"), str):
+                stages.append(node["stage"])
+            if isinstance(node.get("totalDocsExamined"), int):
+                examined += node["totalDocsExamined"]
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(explain)
+    return list(dict.fromkeys(stages)), examined
+
+
+async def explain_legacy(db, query: str):
+    return await db.command({
+        "explain": {"find": "heritage_recipes", "filter": legacy_filter(query), "limit": 50},
+        "verbosity": "executionStats"
+    })
+
+
+async def explain_indexed(db, service: HeritageRecipesService, query: str, collapse_duplicates: bool):
+    pipeline = service.build_search_pipeline(query, [], collapse_duplicates=collapse_duplicates)
+    return await db.command({
+        "explain": {"aggregate": "heritage_recipes", "pipeline": pipeline, "cursor": {}},
+        "verbosity": "executionStats"
+    })
+
+
+async def time_runs(label, runs, coroutine_factory):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await coroutine_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"   {label:<28} median {statistics.median(timings):9.1f} ms   "
+          f"min {min(timings):9.1f} ms   max {max(timings):9.1f} ms")
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=1000000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database", default="lambalia_heritage_search_benchmark")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[args.database]
+    service = HeritageRecipesService(db)
+
+    try:
+        existing = await db.heritage_recipes.estimated_document_count()
+        clustered = await db.heritage_recipes.find_one({"duplicate_cluster_id": {"$exists": True}})
+        if existing != args.recipes or not clustered:
+            print(f"🌱 Seeding {args.recipes:,} synthetic heritage recipes into {args.database}")
+            await db.heritage_recipes.drop()
+            await seed(db.heritage_recipes, args.recipes)
+
+        print("🗂️  Creating search indexes")
+        start = time.perf_counter()
+        await service.create_search_indexes()
+        print(f"   done in {time.perf_counter() - start:.1f} s")
+
+        print("=" * 80)
+        for query in QUERIES:
+            legacy_stages, legacy_examined = plan_summary(await explain_legacy(db, query))
+            collapsed_stages, collapsed_examined = plan_summary(await explain_indexed(db, service, query, True))
+            flat_stages, flat_examined = plan_summary(await explain_indexed(db, service, query, False))
+            print(f"🔎 \"{query}\"")
+            print(f"   regex plan:      {' > '.join(legacy_stages)}  ({legacy_examined:,} docs examined)")
+            print(f"   collapsed plan:  {' > '.join(collapsed_stages)}  ({collapsed_examined:,} docs examined)")
+            print(f"   flat plan:       {' > '.join(flat_stages)}  ({flat_examined:,} docs examined)")
+            if "COLLSCAN" in collapsed_stages or "COLLSCAN" in flat_stages:
+                print("   ❌ text search fell back to a collection scan")
+
+            legacy = await time_runs("regex $or (first 50)", args.runs,
+                                     lambda: db.heritage_recipes.find(legacy_filter(query), {"_id": 0}).to_list(length=50))
+            # The search API's default: keyset pages straight off the text match
+            indexed = await time_runs("$text ranked (page of 20)", args.runs,
+                                      lambda: service.search_heritage_recipes(query))
+            page = await service.search_heritage_recipes(query)
+            if page["next_cursor"]:
+                await time_runs("$text ranked (next page)", args.runs,
+                                lambda: service.search_heritage_recipes(query, cursor=page["next_cursor"]))
+            # Opt-in: groups the whole match set into clusters on every page
+            await time_runs("$text collapsed (page of 20)", args.runs,
+                            lambda: service.search_heritage_recipes(query, collapse_duplicates=True))
+            print(f"   speedup {legacy / indexed:.1f}x")
+            print("-" * 80)
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the pantry recipe matcher used by /enhanced-cooking/recipes/find.
+
+Builds a synthetic corpus with a Zipf-like ingredient distribution (a few staples
+such as salt and oil appear everywhere, most ingredients are rare), then times
+pantry queries through PantryRecipeMatcher against the previous approach of
+computing a set difference for every recipe in the corpus.
+
+The 10 ms budget is checked for max_missing 0 and 1 (the endpoint default and the
+usual "one ingredient short" search). Wider searches match thousands of recipes on
+this corpus, and their cost follows the number of matches verified.
+
+    python pantry_matcher_benchmark.py [--recipes 100000] [--ingredients 3000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from pantry_recipe_matcher import PantryRecipeMatcher
+
+
+def build_corpus(recipe_count, ingredient_count, rng):
+    ingredients = [f"ingredient {i}" for i in range(ingredient_count)]
+    weights = [1.0 / (rank + 1) for rank in range(ingredient_count)]
+    corpus = []
+    for i in range(recipe_count):
+        size = rng.randint(4, 14)
+        chosen = set()
+        while len(chosen) < size:
+            chosen.update(rng.choices(ingredients, weights=weights, k=size - len(chosen)))
+        corpus.append((f"recipe_{i}", sorted(chosen), {"id": f"recipe_{i}", "name": f"Recipe {i}"}))
+    return ingredients, weights, corpus
+
+
+def build_pantries(ingredients, weights, count, rng):
+    """Pantries lean on popular ingredients, like real kitchens"""
+    pantries = []
+    for _ in range(count):
+        size = rng.randint(10, 40)
+        pantry = set()
+        while len(pantry) < size:
+            pantry.update(rng.choices(ingredients[:400], weights=weights[:400], k=size - len(pantry)))
+        excluded = set(rng.sample(ingredients[:200], 2))
+        pantries.append((pantry - excluded, excluded))
+    return pantries
+
+
+def linear_scan(corpus_sets, pantry, excluded, max_missing, limit=20):
+    """Previous behaviour: set difference against every recipe"""
+    matches = []
+    for recipe_id, recipe_ingredients in corpus_sets:
+        if recipe_ingredients & excluded:
+            continue
+        missing = recipe_ingredients - pantry
+        if len(missing) <= max_missing and len(missing) < len(recipe_ingredients):
+            matches.append((len(missing), recipe_id))
+    matches.sort()
+    return matches[:limit], len(matches)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def time_queries(label, pantries, run):
+    timings = []
+    found = []
+    for pantry, excluded in pantries:
+        start = time.perf_counter()
+        total = run(pantry, excluded)
+        timings.append((time.perf_counter() - start) * 1000)
+        found.append(total)
+    print(f"{label:<34} p50 {statistics.median(timings):8.3f} ms   p95 {percentile(timings, 0.95):8.3f} ms   "
+          f"max {max(timings):8.3f} ms   avg found {statistics.mean(found):8.1f}")
+    return found, statistics.median(timings), percentile(timings, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--ingredients", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ingredients, weights, corpus = build_corpus(args.recipes, args.ingredients, rng)
+    pantries = build_pantries(ingredients, weights, args.queries, rng)
+
+    start = time.perf_counter()
+    matcher = PantryRecipeMatcher()
+    matcher.add_recipes(corpus)
+    build_seconds = time.perf_counter() - start
+    corpus_sets = [(recipe_id, set(names)) for recipe_id, names, _ in corpus]
+
+    print(f"🍳 {args.recipes} recipes, {args.ingredients} ingredients, {args.queries} pantries "
+          f"(index built in {build_seconds:.1f}s)")
+    print("=" * 100)
+
+    all_within_budget = True
+    for max_missing in (0, 1, 2, 3):
+        print(f"max_missing={max_missing}")
+        indexed, _, indexed_p95 = time_queries(
+            "  Inverted index + bitsets", pantries,
+            lambda pantry, excluded: matcher.match(pantry, excluded, max_missing)[1]
+        )
+        scanned, _, _ = time_queries(
+            "  Linear scan", pantries,
+            lambda pantry, excluded: linear_scan(corpus_sets, pantry, excluded, max_missing)[1]
+        )
+        if indexed != scanned:
+            print("  ❌ Result counts differ from the linear scan")
+            all_within_budget = False
+        if max_missing <= 1 and indexed_p95 > args.budget_ms:
+            all_within_budget = False
+
+    print("=" * 100)
+    print(f"Matcher stats: {matcher.get_stats()}")
+    print(f"✅ p95 under {args.budget_ms:.0f} ms with identical results" if all_within_budget
+          else "⚠️  Budget or correctness check failed")
+    return 0 if all_within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())